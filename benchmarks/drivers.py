@@ -0,0 +1,118 @@
+"""
+Mide las operaciones principales de los controladores contra los equipos simulados.
+
+Para cada operación informa transacciones, bytes escritos y leídos, tiempo de bus modelado y
+tiempo real por llamada, de modo que los cambios de rendimiento se puedan medir sin hardware.
+
+Uso:
+    python benchmarks/drivers.py [--link usbtmc|gpib|rs232|ideal] [--repeticiones N]
+                                 [--sin-espera] [--json ARCHIVO] [--filtro TEXTO]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from labo_instruments import AFG3021B, AGILENT34970A, SR830, TDS1002B, set_resource_manager  # noqa: E402
+from labo_instruments.simulation import addresses, simulated_lab  # noqa: E402
+
+
+def preparar(manager):
+    """Crea los controladores sobre el laboratorio simulado y los deja listos para medir."""
+    set_resource_manager(manager)
+    with contextlib.redirect_stdout(io.StringIO()):
+        generador = AFG3021B(addresses['AFG3021B'])
+        osci = TDS1002B(addresses['TDS1002B'])
+        lockin = SR830(addresses['SR830'])
+        mux = AGILENT34970A(addresses['AGILENT34970A'], scanInterval=1e-3, channelDelay=0,
+                            channelsList=(101, 102, 103, 104))
+    lockin.set_referencia(False, 1000)
+    lockin.set_scale(25)
+    lockin.buffer_config(512)
+    lockin.buffer_start()
+    mux.start_scans()
+    time.sleep(1.1)  # que el buffer del Lock-in y la memoria del multiplexor tengan lecturas
+    onda = np.sin(np.linspace(0, 2 * np.pi, 1000, endpoint=False))
+    return [
+        ('TDS1002B.read_data', lambda: osci.read_data(1)),
+        ('TDS1002B.read_channels', lambda: osci.read_channels((1, 2))),
+        ('TDS1002B.measure scalar', lambda: osci.measure([('vpp', 1), ('frequency', 1), ('vpp', 2)])),
+        ('TDS1002B.measure trace', lambda: osci.measure([('vpp', 2), ('phase', 2)])),
+        ('SR830.get_medicion', lambda: lockin.get_medicion()),
+        ('SR830.get_medicion RT', lambda: lockin.get_medicion(False)),
+        ('SR830.buffer_read 512', lambda: lockin.buffer_read(0, 512)),
+        ('AGILENT34970A.one_scan', lambda: mux.one_scan()),
+        ('AGILENT34970A.fetch_readings', lambda: mux.fetch_readings(40)),
+        ('AFG3021B.setFrequency', lambda: generador.setFrequency(1000)),
+        ('AFG3021B.load_waveform', lambda: (generador.forget_waveforms(), generador.load_waveform(onda))),
+        ('AFG3021B.set_sweep', lambda: generador.set_sweep(100, 1000, 1)),
+    ]
+
+
+def medir(manager, operaciones, repeticiones=20, filtro=''):
+    """
+    Ejecuta cada operación `repeticiones` veces.
+
+    Returns:
+        list of dict: Por operación, 'operacion', 'transacciones', 'bytes_escritos', 'bytes_leidos',
+            'tiempo_bus' y 'tiempo' (mediana del tiempo real), todo por llamada.
+    """
+    resultados = []
+    for nombre, operacion in operaciones:
+        if filtro not in nombre:
+            continue
+        operacion()  # descarta la primera llamada (cachés y preámbulos)
+        manager.reset_stats()
+        tiempos = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            operacion()
+            tiempos.append(time.perf_counter() - inicio)
+        estadisticas = manager.stats()
+        resultados.append({
+            'operacion': nombre,
+            'transacciones': estadisticas['transacciones'] / repeticiones,
+            'bytes_escritos': estadisticas['bytes_escritos'] / repeticiones,
+            'bytes_leidos': estadisticas['bytes_leidos'] / repeticiones,
+            'tiempo_bus': estadisticas['tiempo_bus'] / repeticiones,
+            'tiempo': statistics.median(tiempos),
+        })
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--link', default=None, help='modelo del bus (default: usbtmc y gpib según el equipo)')
+    parser.add_argument('--repeticiones', type=int, default=20)
+    parser.add_argument('--sin-espera', action='store_true',
+                        help='no esperar el tiempo de bus (mide solo el costo de procesamiento)')
+    parser.add_argument('--json', help='archivo donde guardar los resultados')
+    parser.add_argument('--filtro', default='', help='medir solo las operaciones que contienen este texto')
+    args = parser.parse_args()
+
+    manager = simulated_lab(link=args.link, realtime=not args.sin_espera, seed=0)
+    resultados = medir(manager, preparar(manager), args.repeticiones, args.filtro)
+
+    print('{0:<32}{1:>8}{2:>12}{3:>12}{4:>12}{5:>12}'.format(
+        'operación', 'trans.', 'B escritos', 'B leídos', 'bus (ms)', 'real (ms)'))
+    for r in resultados:
+        print('{operacion:<32}{transacciones:>8.1f}{bytes_escritos:>12.0f}{bytes_leidos:>12.0f}'
+              '{bus:>12.2f}{real:>12.2f}'.format(bus=r['tiempo_bus'] * 1e3, real=r['tiempo'] * 1e3, **r))
+    if args.json:
+        with open(args.json, 'w') as archivo:
+            json.dump({'link': args.link, 'repeticiones': args.repeticiones,
+                       'resultados': resultados}, archivo, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
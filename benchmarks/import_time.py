@@ -0,0 +1,52 @@
+"""
+Mide el tiempo de `import labo_instruments` en un intérprete nuevo.
+
+Uso:
+    python benchmarks/import_time.py [--repeticiones N] [--limite SEGUNDOS]
+
+Termina con código 1 si la mediana supera el límite, para usarlo como control en CI.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def medir(modulo='labo_instruments', repeticiones=10):
+    """
+    Importa `modulo` en `repeticiones` intérpretes nuevos y devuelve el tiempo de cada import
+    (sin contar el arranque del intérprete).
+    """
+    entorno = dict(os.environ, PYTHONPATH=os.path.join(RAIZ, 'src') + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    codigo = ('import time; t = time.perf_counter(); import {0}; '
+              'print(time.perf_counter() - t)').format(modulo)
+    tiempos = []
+    for _ in range(repeticiones):
+        salida = subprocess.run([sys.executable, '-c', codigo], env=entorno, check=True,
+                                capture_output=True, text=True).stdout
+        tiempos.append(float(salida.strip().splitlines()[-1]))
+    return tiempos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeticiones', type=int, default=10)
+    parser.add_argument('--limite', type=float, default=0.05, help='mediana máxima admitida en segundos')
+    args = parser.parse_args()
+
+    tiempos = medir(repeticiones=args.repeticiones)
+    mediana = statistics.median(tiempos)
+    print('import labo_instruments: mediana {0:.2f} ms, mínimo {1:.2f} ms ({2} repeticiones)'.format(
+        mediana * 1e3, min(tiempos) * 1e3, len(tiempos)))
+    if mediana > args.limite:
+        print('❌ Supera el límite de {0:.0f} ms'.format(args.limite * 1e3))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,20 +1,57 @@
-from .tektronix_tds1002b import TDS1002B
-from .agilent_34970a import AGILENT34970A
-from .sr830 import SR830
-from .tektronix_afg3021b import AFG3021B
-# from .kurios import KURIOS
+import importlib
 
-import inspect
+# Las clases se importan recién cuando se las usa (PEP 562), para que `import labo_instruments`
+# no cargue numpy, pyvisa ni los controladores que no se van a usar.
+_modulos = {
+        "TDS1002B": ".tektronix_tds1002b",
+        "AGILENT34970A": ".agilent_34970a",
+        "AGILENT34970AService": ".agilent_34970a",
+        "SR830": ".sr830",
+        "AFG3021B": ".tektronix_afg3021b",
+        "FrequencySweep": ".frequency_sweep",
+        "BodeSweep": ".bode",
+        "AsyncTDS1002B": ".aio",
+        "AsyncAGILENT34970A": ".aio",
+        "AsyncSR830": ".aio",
+        "AsyncAFG3021B": ".aio",
+        "AcquisitionScheduler": ".scheduler",
+        "ChunkedLogger": ".datalog",
+        "read_log": ".datalog",
+        "WaveformArchive": ".waveform_archive",
+        "demodulate": ".demodulation",
+        "fit_sine": ".demodulation",
+        "SessionPool": ".sessions",
+        "get_pool": ".sessions",
+        "set_resource_manager": ".sessions",
+        "SimulatedResourceManager": ".simulation",
+        "IOMonitor": ".instrumentation",
+        "simulated_lab": ".simulation",
+        # "KURIOS": ".kurios",
+        }
+
+__all__ = list(_modulos) + ["resumen"]
 
 clases = {
-        "Osciloscopio Tektronix TDS1002B": TDS1002B,
-        "Multiplexor Agilent 34970A": AGILENT34970A,
-        "LOCKIN Stanford Research SR830": SR830,
-        "Generador de funciones Tektronix AFG 3021B": AFG3021B, 
-        # "Kurios® Liquid Crystal Tunable Filter Controller": KURIOS,
+        "Osciloscopio Tektronix TDS1002B": "TDS1002B",
+        "Multiplexor Agilent 34970A": "AGILENT34970A",
+        "LOCKIN Stanford Research SR830": "SR830",
+        "Generador de funciones Tektronix AFG 3021B": "AFG3021B", 
+        # "Kurios® Liquid Crystal Tunable Filter Controller": "KURIOS",
         }
 
+def __getattr__(nombre):
+    if nombre in _modulos:
+        valor = getattr(importlib.import_module(_modulos[nombre], __name__), nombre)
+        globals()[nombre] = valor
+        return valor
+    raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
+
+def __dir__():
+    return sorted(set(globals()) | set(_modulos))
+
 def listar_metodos_con_info(clase):
+    import inspect
+
     metodos = []
     for nombre, miembro in inspect.getmembers(clase):
         if not nombre.startswith('_') and inspect.isfunction(miembro):
@@ -25,17 +62,20 @@ def listar_metodos_con_info(clase):
     return metodos
 
 def resumen():
+    """
+    Imprime las clases disponibles con sus métodos y la primera línea de su descripción.
+
+    Importa todos los controladores, por lo que conviene llamarla solo en sesiones interactivas.
+    """
     print("🧪 Paquete labo-instruments cargado.")
     print("Clases disponibles, métodos y descripción breve:\n")
     
     for nombre, clase in clases.items():
         print(f"📦 {nombre}")
-        for firma, doc in listar_metodos_con_info(clase):
+        for firma, doc in listar_metodos_con_info(__getattr__(clase)):
             print(f"   • {firma}")
             if doc:
                 print(f"     ↪ {doc}")
         print()
 
     print("🛈 Para más información sobre una clase o método, podés usar help(NombreClase) o NombreClase.metodo? en IPython.")
-
-resumen()
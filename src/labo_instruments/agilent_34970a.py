@@ -5,17 +5,102 @@ Manual P (pdf): https://github.com/diegoshalom/labosdf/blob/master/manuales/Agil
 Manual P (chm original): https://github.com/diegoshalom/labosdf/blob/master/manuales/Agilent34970a%20command%20reference.chm
 """
 
-import pyvisa
 import numpy as np
 import datetime
+import queue
+import threading
+import time
+
+from .buffers import RingBuffer
+from .sessions import get_pool
+
+# Lectura del barrido: canal, valor y tiempo (epoch en formato absoluto, segundos desde el inicio en relativo)
+reading_dtype = np.dtype([('chan', np.int32), ('value', np.float64), ('time', np.float64)])
+
+# Valores por lectura según FORMat:READing:TIME:TYPE (con canal y tiempo activados)
+_campos_por_lectura = {'ABS': 8, 'REL': 3}
+
+
+def parse_readings(raw, time_type='ABS', out=None, offset=0):
+    """
+    Convierte la respuesta de READ? / DATA:REMOVE? en un array estructurado de lecturas.
+
+    Todo el parseo y el cálculo de los timestamps se hace en forma vectorizada.
+
+    Args:
+        raw (str, bytes or array_like): Respuesta cruda del equipo, o los valores ya convertidos a float.
+        time_type (str, optional): 'ABS' si cada lectura trae (valor, año, mes, día, hora, minuto,
+            segundo, canal); 'REL' si trae (valor, segundos desde el inicio del barrido, canal). Default: 'ABS'.
+        out (numpy.ndarray, optional): Array con `reading_dtype` donde escribir las lecturas,
+            para acumular varios bloques sin reservar memoria. Default: None.
+        offset (int, optional): Posición de `out` donde escribir la primera lectura. Default: 0.
+
+    Returns:
+        numpy.ndarray: Array estructurado con `reading_dtype` (una vista de `out` si se lo pasó).
+    """
+    if isinstance(raw, bytes):
+        raw = raw.decode('ascii')
+    if isinstance(raw, str):
+        # A diferencia de np.fromstring, un valor que no es un número levanta ValueError
+        valores = np.array(raw.split(','), dtype=float) if raw.strip() else np.empty(0)
+    else:
+        valores = np.asarray(raw, dtype=float)
+    columnas = valores.reshape(-1, _campos_por_lectura[time_type]).T
+
+    if out is None:
+        out = np.empty(columnas.shape[1], dtype=reading_dtype)
+        offset = 0
+    registros = out[offset:offset + columnas.shape[1]]
+    registros['value'] = columnas[0]
+    registros['chan'] = columnas[-1]
+    if time_type == 'REL' or len(registros) == 0:
+        registros['time'] = columnas[1] if len(registros) else 0
+        return registros
+
+    anio, mes, dia, hora, minuto, segundo = columnas[1:7]
+    meses = (anio.astype(np.int64) - 1970) * 12 + mes.astype(np.int64) - 1
+    dias = (meses.astype('datetime64[M]').astype('datetime64[D]') + (dia.astype(np.int64) - 1)).astype(np.int64)
+    locales = dias * 86400.0 + hora * 3600 + minuto * 60 + segundo
+    # El reloj del equipo está en hora local. El huso horario se calcula para cada hora distinta del
+    # bloque, así un bloque que cruza un cambio de horario de verano queda bien
+    horas, indices = np.unique(locales // 3600, return_inverse=True)
+    epoch = datetime.datetime(1970, 1, 1)
+    husos = np.array([(epoch + datetime.timedelta(hours=h)).timestamp() - h * 3600 for h in horas])
+    registros['time'] = locales + husos[indices.ravel()]
+    return registros
+
+
+def _channel_list(channels):
+    """Arma la lista de canales SCPI, por ejemplo (101, 102) -> '(@101,102)'."""
+    return '(@' + ','.join(str(canal) for canal in channels) + ')'
+
 
 class AGILENT34970A:
     """Clase para el manejo multiplexor Agilent34970A usando PyVISA de interfaz"""
 
+    # Perfiles de velocidad/resolución por canal:
+    #   nplc: tiempo de integración en ciclos de línea
+    #   autozero: 'ON' (una medición de cero por lectura), 'ONCE' o 'OFF'
+    #   delay: retardo del canal en segundos
+    channel_profiles = {
+        'fast': {'nplc': 0.02, 'autozero': 'OFF', 'delay': 0},
+        'balanced': {'nplc': 1, 'autozero': 'ONCE', 'delay': 0.01},
+        'precise': {'nplc': 10, 'autozero': 'ON', 'delay': 0.1},
+    }
+
+    # Funciones que admiten NPLC (en VOLT:AC y CURR:AC se usa el ancho de banda)
+    _funciones_nplc = ('VOLT:DC', 'CURR:DC', 'RES', 'FRES', 'TEMP')
+
+    # Tiempo aproximado de conmutación y procesamiento por canal (34901A), en segundos
+    channel_overhead = 0.004
+
     def __init__(self, name, 
                  scanInterval = 1, 
                  channelDelay = 0.2,
-				 channelsList = (101,102,103,104,105,106,107,108)):
+				 channelsList = (101,102,103,104,105,106,107,108),
+                 timeType = 'ABS',
+                 lineFrequency = None,
+                 pool = None):
         """
         Inicializa la interfaz con el multiplexor Agilent 34970A y configura un barrido básico.
 
@@ -25,29 +110,42 @@ class AGILENT34970A:
             channelDelay (float, optional): Retardo entre lecturas de canales. Default: 0.2.
             channelsList (tuple of int, optional): Canales a escanear. Default: (101, ..., 108).
                 ⚠️ Si alguno de los canales está desconectado, dañado o no presente, el barrido fallará.
+            timeType (str, optional): 'ABS' para timestamps absolutos o 'REL' para segundos desde
+                el inicio del barrido (más corto de transferir y de parsear). Default: 'ABS'.
+            lineFrequency (float, optional): Frecuencia de línea en Hz, que fija la duración de un NPLC.
+                Default: None (se consulta al equipo con SYST:LFR?).
+            pool (SessionPool, optional): Pool de sesiones a usar. Default: None (el del proceso).
         """
         self.scanInterval = scanInterval
         self.channelDelay = channelDelay
         self.channelsList = channelsList
         self.nChannels = len(self.channelsList)
-        self._mux = pyvisa.ResourceManager().open_resource(name)
-        print(self._mux.query("*IDN?"))
+        self.channelSettings = {}
+        self._pool = pool if pool is not None else get_pool()
+        self._direccion = name
+        self._mux = self._pool.acquire(name, separator=';:', max_length=256)
+        print(self._pool.idn(name))
+        if lineFrequency is None:
+            lineFrequency = float(self._mux.query_ascii_values('SYST:LFR?')[0])
+        self.lineFrequency = lineFrequency
         self.config(scanInterval =scanInterval, 
                  channelDelay = channelDelay,
-				 channelsList =channelsList) 
+				 channelsList =channelsList,
+                 timeType = timeType) 
 
     def __del__(self):
         """
-        Cierra la conexión VISA con el equipo.
+        Devuelve la conexión VISA con el equipo al pool.
 
-        Esta función se llama automáticamente al eliminar el objeto.
+        Esta función se llama automáticamente al eliminar el objeto. La sesión queda abierta para reutilizarla.
         """
-        self._mux.close()	
+        self._pool.release(self._direccion)	
 	
     def config(  self, 
                  scanInterval = 1, 
                  channelDelay = 0.2,
-				 channelsList = (101,102,103,104,105,106,107,108)):
+				 channelsList = (101,102,103,104,105,106,107,108),
+                 timeType = 'ABS'):
         """
         Configura el barrido del multiplexor Agilent 34970A.
 
@@ -56,6 +154,7 @@ class AGILENT34970A:
             channelDelay (float, optional): Retardo entre lecturas por canal. Default: 0.2.
             channelsList (tuple of int, optional): Canales a escanear. Default: (101–108).
                 ⚠️ Si algún canal no responde correctamente, puede generar un error SCPI.
+            timeType (str, optional): 'ABS' (timestamp absoluto) o 'REL' (segundos desde el inicio). Default: 'ABS'.
         
         Returns:
             None
@@ -66,21 +165,110 @@ class AGILENT34970A:
         self.channelDelay = channelDelay
         self.channelsList = channelsList
         self.nChannels = len(self.channelsList)
+        self.timeType = timeType
+        for ajustes in self.channelSettings.values():
+            ajustes['delay'] = self.channelDelay
 
-        #Limpiar configuración
-        self._mux.write('*CLS')
+        with self._mux.batch():
+            #Limpiar configuración
+            self._mux.write('*CLS')
         
-        #Configurar barrido
-        self._mux.write('ROUTE:SCAN (@' + str(self.channelsList)[1:-1] + ")")
-        self._mux.write('ROUT:CHAN:DELAY ' + str(self.channelDelay))
-        self._mux.write('FORMAT:READING:CHAN ON') #Return channel number with each reading
-        self._mux.write('FORMAT:READING:TIME ON') # Return time stamp with each reading
-		#self._mux.write('FORMat:READing:TIME:TYPE  RELative') #Return time stamp im seconds since scanstart
-        self._mux.write('FORMat:READing:TIME:TYPE  ABSolute') #Return time stamp absolute
-        self._mux.write('FORMat:READing:UNIT OFF')
-        self._mux.write('TRIG:TIMER ' + str(self.scanInterval))		
-        self._mux.write('TRIG:COUNT ' + str(1)) # one scan sweep per measure
+            #Configurar barrido
+            self._mux.write('ROUTE:SCAN ' + _channel_list(self.channelsList))
+            self._mux.write('ROUT:CHAN:DELAY ' + str(self.channelDelay))
+            self._mux.write('FORMAT:READING:CHAN ON') #Return channel number with each reading
+            self._mux.write('FORMAT:READING:TIME ON') # Return time stamp with each reading
+            if self.timeType == 'REL':
+                self._mux.write('FORMat:READing:TIME:TYPE  RELative') #Return time stamp im seconds since scanstart
+            else:
+                self._mux.write('FORMat:READing:TIME:TYPE  ABSolute') #Return time stamp absolute
+            self._mux.write('FORMat:READing:UNIT OFF')
+            self._mux.write('TRIG:TIMER ' + str(self.scanInterval))		
+            self._mux.write('TRIG:COUNT ' + str(1)) # one scan sweep per measure
     
+    def config_channels(self, function='VOLT:DC', channels=None, profile='balanced', rango='AUTO', **ajustes):
+        """
+        Configura función, rango, integración, autocero y retardo de un grupo de canales.
+
+        Args:
+            function (str, optional): Función de medición SCPI, por ejemplo 'VOLT:DC', 'RES' o 'TEMP'. Default: 'VOLT:DC'.
+            channels (tuple of int, optional): Canales a configurar. Default: None (todos los de `channelsList`).
+            profile (str, optional): Perfil de `channel_profiles` ('fast', 'balanced' o 'precise'). Default: 'balanced'.
+            rango (str or float, optional): Parámetros de CONFigure después de la función: un rango fijo
+                (por ejemplo 10), 'AUTO', o el tipo de sensor para temperatura (por ejemplo 'TC,K'). Un rango
+                fijo evita el tiempo de autorango. Default: 'AUTO'.
+            **ajustes: Valores que reemplazan a los del perfil ('nplc', 'autozero', 'delay').
+
+        Returns:
+            None
+
+        Raises:
+            ValueError: Si el perfil no existe.
+        """
+        if profile not in self.channel_profiles:
+            raise ValueError('Perfil inválido: {0}. Opciones: {1}'.format(profile, tuple(self.channel_profiles)))
+        if channels is None:
+            channels = self.channelsList
+        config = dict(self.channel_profiles[profile], **ajustes)
+        lista = _channel_list(channels)
+
+        with self._mux.batch():
+            self._mux.write('CONF:{0} {1},{2}'.format(function, rango, lista))
+            if function.upper() in self._funciones_nplc:
+                self._mux.write('SENS:{0}:NPLC {1},{2}'.format(function, config['nplc'], lista))
+            self._mux.write('SENS:ZERO:AUTO {0},{1}'.format(config['autozero'], lista))
+            self._mux.write('ROUT:CHAN:DELAY {0},{1}'.format(config['delay'], lista))
+            # CONFigure redefine la lista de barrido: se restituye la completa
+            self._mux.write('ROUTE:SCAN ' + _channel_list(self.channelsList))
+
+        for canal in channels:
+            self.channelSettings[canal] = dict(config, function=function, rango=rango, profile=profile)
+
+    def estimate_scan_time(self, settings=None):
+        """
+        Estima la duración de un barrido con la configuración actual de cada canal.
+
+        Suma por canal el tiempo de integración (NPLC / `lineFrequency`, el doble con autocero ON),
+        el retardo y `channel_overhead`. Los canales sin `config_channels` se toman con los valores
+        de fábrica (NPLC 1, autocero ON) y `channelDelay`.
+
+        Args:
+            settings (dict, optional): Ajustes por canal a evaluar en lugar de `channelSettings`. Default: None.
+
+        Returns:
+            float: Duración estimada del barrido en segundos.
+        """
+        if settings is None:
+            settings = self.channelSettings
+        defecto = {'nplc': 1, 'autozero': 'ON', 'delay': self.channelDelay, 'function': 'VOLT:DC'}
+        total = 0.0
+        for canal in self.channelsList:
+            ajustes = settings.get(canal, defecto)
+            integracion = 0.0
+            if ajustes.get('function', 'VOLT:DC').upper() in self._funciones_nplc:
+                integracion = ajustes['nplc'] / self.lineFrequency
+                if ajustes['autozero'] == 'ON':
+                    integracion *= 2
+            total += integracion + ajustes['delay'] + self.channel_overhead
+        return total
+
+    def choose_profile(self, max_scan_time, function='VOLT:DC'):
+        """
+        Elige el perfil más preciso cuyo barrido entra en `max_scan_time`.
+
+        Args:
+            max_scan_time (float): Duración máxima admisible del barrido en segundos (por ejemplo `scanInterval`).
+            function (str, optional): Función de medición a evaluar. Default: 'VOLT:DC'.
+
+        Returns:
+            str or None: Nombre del perfil, o None si ni el más rápido alcanza.
+        """
+        for nombre in ('precise', 'balanced', 'fast'):
+            ajustes = dict(self.channel_profiles[nombre], function=function)
+            if self.estimate_scan_time({canal: ajustes for canal in self.channelsList}) <= max_scan_time:
+                return nombre
+        return None
+
     def get_time(self):	
         """
         Devuelve el tiempo actual del sistema interno del equipo en segundos desde la medianoche.
@@ -121,20 +309,290 @@ class AGILENT34970A:
 
         Returns:
             tuple:
-                - data (list of float): Lecturas crudas del equipo.
-                - temp (list of float): Valores de temperatura (u otra magnitud medida).
-                - tim (list of float): Tiempos absolutos (timestamps) para cada medición.
-                - chan (list of float): Números de canal asociados a cada lectura.
+                - data (numpy.ndarray): Lecturas crudas del equipo.
+                - temp (numpy.ndarray): Valores de temperatura (u otra magnitud medida).
+                - tim (numpy.ndarray): Tiempos absolutos (timestamps) para cada medición,
+                  o segundos desde el inicio si `timeType` es 'REL'.
+                - chan (numpy.ndarray): Números de canal asociados a cada lectura.
         """
         # time.sleep(.5+(self.channelDelay+0.1)*self.nChannels)
         
-        data = self._mux.query_ascii_values('READ?')
-        data2 = np.transpose(np.reshape(np.array(data), (self.nChannels, 8) ) )
-        temp = data2[0]
-        tim = np.array(data2[1:7], dtype=np.int32)
-        tim = [datetime.datetime(x[0], x[1], x[2], x[3], x[4], x[5]).timestamp() for x in np.transpose(tim)]        
-        chan = data2[7]
+        data = np.array(self._mux.query('READ?').split(','), dtype=float)
+        registros = parse_readings(data, self.timeType)
         
-        return data,temp,tim,chan
+        return data,registros['value'],registros['time'],registros['chan']
 
+    def scan_records(self):
+        """
+        Realiza un único barrido y lo devuelve como array estructurado.
+
+        Returns:
+            numpy.ndarray: Lecturas con campos 'chan', 'value' y 'time' (ver `reading_dtype`).
+        """
+        return parse_readings(self._mux.query('READ?'), self.timeType)
+
+    def start_scans(self, n_scans=None):
+        """
+        Arma el equipo para hacer `n_scans` barridos seguidos con el timer interno, sin esperar lecturas.
+
+        Los barridos se disparan cada `scanInterval` segundos y las lecturas se acumulan en la memoria
+        del equipo (hasta 50000), de donde se leen con `fetch_readings`.
+
+        Args:
+            n_scans (int, optional): Cantidad de barridos. None para barrer hasta `stop_scans`. Default: None.
+
+        Returns:
+            None
+        """
+        with self._mux.batch():
+            self._mux.write('TRIG:SOURCE TIMER')
+            self._mux.write('TRIG:TIMER ' + str(self.scanInterval))
+            self._mux.write('TRIG:COUNT ' + ('INF' if n_scans is None else str(n_scans)))
+            self._mux.write('INIT')
+
+    def stop_scans(self):
+        """
+        Detiene los barridos en curso y vuelve a un barrido por medición (como espera `one_scan`).
+
+        Returns:
+            None
+        """
+        with self._mux.batch():
+            self._mux.write('ABORT')
+            self._mux.write('TRIG:COUNT ' + str(1))
+
+    def readings_available(self):
+        """
+        Consulta cuántas lecturas hay en la memoria del equipo.
+
+        Returns:
+            int: Cantidad de lecturas disponibles.
+        """
+        return int(self._mux.query_ascii_values('DATA:POINTS?')[0])
+
+    def fetch_readings(self, n_readings, out=None, offset=0):
+        """
+        Retira de la memoria del equipo las `n_readings` lecturas más viejas.
+
+        Args:
+            n_readings (int): Cantidad de lecturas. No debe superar `readings_available()`.
+            out (numpy.ndarray, optional): Array con `reading_dtype` donde acumular las lecturas. Default: None.
+            offset (int, optional): Posición de `out` donde escribir la primera lectura. Default: 0.
+
+        Returns:
+            numpy.ndarray: Lecturas con campos 'chan', 'value' y 'time' (una vista de `out` si se lo pasó).
+        """
+        return parse_readings(self._mux.query('DATA:REMOVE? ' + str(n_readings)), self.timeType, out, offset)
+
+    def scan_blocks(self, n_scans=None, max_scans_per_block=None, poll=None, stop=None):
+        """
+        Barre en forma continua y entrega bloques con los barridos completos que se van acumulando.
+
+        El equipo sigue barriendo con su timer mientras se leen los datos, por lo que no se pierde
+        el intervalo entre barridos. Al terminar (o si se interrumpe la iteración) se detienen los barridos.
+
+        Args:
+            n_scans (int, optional): Cantidad total de barridos. None para barrer indefinidamente. Default: None.
+            max_scans_per_block (int, optional): Máximo de barridos por bloque. Default: None (todos los disponibles).
+            poll (float, optional): Espera entre consultas cuando no hay barridos nuevos, en segundos.
+                Default: None (la mitad de `scanInterval`).
+            stop (threading.Event, optional): Evento que termina la iteración cuando se activa, aunque
+                no lleguen barridos nuevos. Default: None.
+
+        Yields:
+            numpy.ndarray: Lecturas del bloque con campos 'chan', 'value' y 'time' (ver `reading_dtype`).
+        """
+        esperar = time.sleep if stop is None else stop.wait
+        pasos = self._scan_blocks_pasos(n_scans, max_scans_per_block, poll, stop)
+        try:
+            for espera, registros in pasos:
+                if registros is None:
+                    esperar(espera)
+                else:
+                    yield registros
+        finally:
+            pasos.close()
+
+    def _scan_blocks_pasos(self, n_scans, max_scans_per_block, poll, stop):
+        """Pasos de `scan_blocks`: entrega (poll, None) para cada espera y (None, registros) para cada bloque."""
+        if poll is None:
+            poll = self.scanInterval / 2
+        self.start_scans(n_scans)
+        try:
+            leidos = 0
+            while n_scans is None or leidos < n_scans:
+                if stop is not None and stop.is_set():
+                    return
+                completos = self.readings_available() // self.nChannels
+                if n_scans is not None:
+                    completos = min(completos, n_scans - leidos)
+                if max_scans_per_block is not None:
+                    completos = min(completos, max_scans_per_block)
+                if completos == 0:
+                    yield poll, None
+                    continue
+                registros = self.fetch_readings(completos * self.nChannels)
+                leidos += completos
+                yield None, registros
+        finally:
+            self.stop_scans()
+
+
+class AGILENT34970AService:
+    """Adquisición del multiplexor en un hilo propio, con buffer circular y suscriptores."""
+
+    def __init__(self, mux, capacity=1024, poll=None):
+        """
+        Prepara el servicio. Mientras está corriendo, es el único que usa la sesión VISA del equipo.
+
+        Los barridos se hacen con el timer interno (ver `AGILENT34970A.scan_blocks`) y cada uno se guarda
+        en un buffer circular. Un segundo hilo reparte los barridos a los suscriptores, de modo que un
+        suscriptor lento nunca frena al equipo: si se atrasa, se pierden barridos y se cuentan como overruns.
+
+        Args:
+            mux (AGILENT34970A): Multiplexor ya configurado.
+            capacity (int, optional): Cantidad de barridos que entran en el buffer. Default: 1024.
+            poll (float, optional): Espera entre consultas de memoria. Default: None (ver `scan_blocks`).
+        """
+        self.mux = mux
+        self.poll = poll
+        self.capacity = capacity
+        self.buffer = self._nuevo_buffer()
+        self._callbacks = []
+        self._colas = []
+        self.dropped = {}  # barridos descartados por cola llena, por cola
+        self.callback_errors = 0
+        # Protege las listas de suscriptores y `dropped` frente al hilo de reparto
+        self._lock = threading.Lock()
+        self._detener = threading.Event()
+        self._hilos = []
+        self.error = None
+
+    def subscribe(self, callback=None, maxsize=0):
+        """
+        Registra un suscriptor que recibe cada barrido nuevo (una copia con `reading_dtype`).
+
+        Args:
+            callback (callable, optional): Función llamada como callback(barrido) desde el hilo de
+                reparto. Si es None, se crea y devuelve una cola. Default: None.
+            maxsize (int, optional): Tamaño máximo de la cola; si se llena se descartan barridos. Default: 0 (sin límite).
+
+        Returns:
+            callable or queue.Queue: El callback registrado o la cola creada.
+        """
+        if callback is not None:
+            with self._lock:
+                self._callbacks.append(callback)
+            return callback
+        cola = queue.Queue(maxsize)
+        with self._lock:
+            self._colas.append(cola)
+            self.dropped[id(cola)] = 0
+        return cola
+
+    def unsubscribe(self, suscriptor):
+        """Quita un callback o una cola registrados con `subscribe`."""
+        with self._lock:
+            if suscriptor in self._callbacks:
+                self._callbacks.remove(suscriptor)
+            elif suscriptor in self._colas:
+                self._colas.remove(suscriptor)
+                self.dropped.pop(id(suscriptor), None)
+
+    def _nuevo_buffer(self):
+        return RingBuffer(self.capacity, shape=(self.mux.nChannels,), dtype=reading_dtype, policy='overwrite')
+
+    def start(self):
+        """Arranca la adquisición y el reparto a suscriptores. Se puede volver a llamar después de `stop`."""
+        if not self._hilos:
+            self._detener.clear()
+            self.error = None
+            # El buffer anterior quedó cerrado por `stop`: cada corrida usa uno nuevo
+            if self.buffer.closed:
+                self.buffer = self._nuevo_buffer()
+            self._hilos = [threading.Thread(target=self._adquirir, daemon=True),
+                           threading.Thread(target=self._repartir, daemon=True)]
+            for hilo in self._hilos:
+                hilo.start()
+        return self
+
+    def stop(self):
+        """
+        Detiene los barridos del equipo y espera a que terminen los hilos.
+
+        Raises:
+            Exception: El error que haya detenido la adquisición, si lo hubo (queda también en `error`).
+        """
+        self._detener.set()
+        for hilo in self._hilos:
+            hilo.join()
+        self._hilos = []
+        if self.error is not None:
+            raise self.error
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        try:
+            self.stop()
+        except Exception:
+            # Si el bloque with ya está propagando una excepción no se la tapa: el error del hilo queda en `error`
+            if exc[0] is None:
+                raise
+
+    def _adquirir(self):
+        bloques = self.mux.scan_blocks(poll=self.poll, stop=self._detener)
+        try:
+            for registros in bloques:
+                for barrido in registros.reshape(-1, self.mux.nChannels):
+                    self.buffer.push(barrido, time.time())
+        except Exception as error:
+            self.error = error
+        finally:
+            bloques.close()
+            self.buffer.close()
+
+    def _repartir(self):
+        while True:
+            registro = self.buffer.pop()
+            if registro is None:
+                break
+            barrido = registro[2].copy()
+            with self._lock:
+                callbacks = list(self._callbacks)
+            # Los callbacks corren sin el lock: pueden suscribir o quitar suscriptores
+            for callback in callbacks:
+                try:
+                    callback(barrido)
+                except Exception:
+                    self.callback_errors += 1
+            # put_nowait no bloquea: un `unsubscribe` concurrente espera a que termine la vuelta
+            with self._lock:
+                for cola in self._colas:
+                    try:
+                        cola.put_nowait(barrido)
+                    except queue.Full:
+                        self.dropped[id(cola)] += 1
+
+    def latest(self):
+        """
+        Devuelve el último barrido adquirido sin esperar.
+
+        Returns:
+            numpy.ndarray or None: Copia del barrido con `reading_dtype`, o None si todavía no hay ninguno.
+        """
+        registro = self.buffer.latest()
+        return None if registro is None else registro[2].copy()
+
+    def stats(self):
+        """
+        Devuelve contadores del servicio.
+
+        Returns:
+            dict: 'scans' (barridos adquiridos), 'overruns' (barridos pisados antes de repartirse),
+                'dropped' (descartados por colas llenas) y 'callback_errors'.
+        """
+        return {'scans': self.buffer.written, 'overruns': self.buffer.overruns,
+                'dropped': sum(self.dropped.values()), 'callback_errors': self.callback_errors}
 
@@ -0,0 +1,223 @@
+"""
+Versiones asíncronas (asyncio) de los controladores.
+
+Cada equipo tiene su propio hilo de ejecución, donde corren las llamadas bloqueantes a VISA, y un
+`asyncio.Lock` que garantiza que las operaciones sobre un mismo equipo se ejecuten completas y en
+el orden en que se pidieron. Equipos distintos se atienden en paralelo desde un mismo event loop.
+Las esperas de `SR830.auto_scale`, `SR830.buffer_acquire`, `SR830.buffer_stream` y
+`AGILENT34970A.scan_blocks` se hacen con `asyncio.sleep`.
+
+Ejemplo:
+    async def main():
+        async with await AsyncTDS1002B.open('USB0::0x0699::0x0363::C102223::INSTR') as osci, \\
+                   await AsyncSR830.open('GPIB0::8::INSTR') as lockin:
+            (t, v), (x, y) = await asyncio.gather(osci.read_data(1), lockin.get_medicion())
+
+    asyncio.run(main())
+"""
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from .agilent_34970a import AGILENT34970A
+from .sr830 import SR830
+from .tektronix_afg3021b import AFG3021B
+from .tektronix_tds1002b import TDS1002B
+
+
+def _paso(iterador):
+    """Avanza un iterador en el hilo del equipo. StopIteration no puede atravesar un Future."""
+    try:
+        return False, next(iterador)
+    except StopIteration as fin:
+        return True, fin.value
+
+
+class AsyncDriver:
+    """
+    Envoltorio asíncrono de un controlador.
+
+    Todo método público del controlador está disponible como corrutina con el mismo nombre y
+    argumentos (`await osci.read_data(1)`); los atributos que no son métodos se leen directamente.
+    """
+
+    driver_class = None
+
+    def __init__(self, driver=None):
+        """
+        Envuelve un controlador ya creado. Para crearlo sin bloquear el event loop usar `open`.
+
+        Args:
+            driver (optional): Instancia de `driver_class`. Default: None.
+        """
+        self.driver = driver
+        nombre = self.driver_class.__name__ if self.driver_class is not None else 'driver'
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=nombre)
+        self._loop = None
+        self._lock_del_loop = None
+
+    @classmethod
+    async def open(cls, *args, **kwargs):
+        """
+        Crea el controlador (abre la sesión y configura el equipo) en el hilo del equipo.
+
+        Args:
+            *args, **kwargs: Argumentos del constructor de `driver_class`.
+
+        Returns:
+            AsyncDriver: Envoltorio listo para usar.
+        """
+        asincrono = cls()
+        asincrono.driver = await asincrono._run(cls.driver_class, *args, **kwargs)
+        return asincrono
+
+    @property
+    def _lock(self):
+        # Se crea en el event loop que lo usa: asyncio.Lock queda atado a un loop (en Python < 3.10
+        # al de get_event_loop() al construirse), y el envoltorio puede crearse antes de asyncio.run
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop, self._lock_del_loop = loop, asyncio.Lock()
+        return self._lock_del_loop
+
+    async def _run(self, funcion, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(funcion, *args, **kwargs))
+
+    async def call(self, nombre, *args, **kwargs):
+        """
+        Ejecuta un método del controlador en el hilo del equipo, en turno con las demás operaciones.
+
+        Args:
+            nombre (str): Nombre del método.
+            *args, **kwargs: Argumentos del método.
+
+        Returns:
+            Lo que devuelve el método.
+        """
+        async with self._lock:
+            return await self._run(getattr(self.driver, nombre), *args, **kwargs)
+
+    async def _run_steps(self, pasos):
+        """
+        Ejecuta una operación escrita como generador de esperas (ver `SR830._auto_scale_pasos`):
+        la E/S de cada paso corre en el hilo del equipo y las esperas con `asyncio.sleep`.
+        """
+        async with self._lock:
+            while True:
+                terminado, valor = await self._run(_paso, pasos)
+                if terminado:
+                    return valor
+                await asyncio.sleep(valor)
+
+    async def _iterate_steps(self, pasos):
+        """
+        Recorre un generador de pasos (espera, elemento) (ver `SR830._buffer_stream_pasos`) como
+        iterador asíncrono: la E/S corre en el hilo del equipo y las esperas con `asyncio.sleep`, así
+        cancelar la tarea corta la consulta periódica en la espera en curso.
+        """
+        async with self._lock:
+            try:
+                while True:
+                    terminado, paso = await self._run(_paso, pasos)
+                    if terminado:
+                        return
+                    espera, elemento = paso
+                    if elemento is None:
+                        await asyncio.sleep(espera)
+                    else:
+                        yield elemento
+            finally:
+                await self._run(pasos.close)
+
+    async def iterate(self, nombre, *args, **kwargs):
+        """
+        Recorre un método generador del controlador (por ejemplo `TDS1002B.stream`) como
+        iterador asíncrono. El equipo queda reservado hasta que termina o se corta la iteración.
+
+        Args:
+            nombre (str): Nombre del método generador.
+            *args, **kwargs: Argumentos del método.
+
+        Yields:
+            Los elementos que entrega el método.
+        """
+        async with self._lock:
+            iterador = await self._run(lambda: iter(getattr(self.driver, nombre)(*args, **kwargs)))
+            try:
+                while True:
+                    terminado, valor = await self._run(_paso, iterador)
+                    if terminado:
+                        return
+                    yield valor
+            finally:
+                if hasattr(iterador, 'close'):
+                    await self._run(iterador.close)
+
+    def __getattr__(self, nombre):
+        if nombre.startswith('_') or self.__dict__.get('driver') is None:
+            raise AttributeError(nombre)
+        atributo = getattr(self.driver, nombre)
+        if not callable(atributo):
+            return atributo
+
+        @functools.wraps(atributo)
+        async def metodo(*args, **kwargs):
+            return await self.call(nombre, *args, **kwargs)
+        return metodo
+
+    async def close(self):
+        """Espera las operaciones en curso, libera el controlador (y su sesión) y termina el hilo."""
+        async with self._lock:
+            referencia = [self.driver]
+            self.driver = None
+            # La última referencia se suelta en el hilo del equipo: el __del__ del controlador hace E/S
+            await self._run(referencia.clear)
+        self._executor.shutdown(wait=True)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+
+class AsyncTDS1002B(AsyncDriver):
+    """Osciloscopio Tektronix TDS1002B asíncrono (ver `TDS1002B`)."""
+
+    driver_class = TDS1002B
+
+
+class AsyncSR830(AsyncDriver):
+    """Lock-in SR830 asíncrono (ver `SR830`). Las esperas de establecimiento no ocupan el hilo."""
+
+    driver_class = SR830
+
+    async def auto_scale(self, debug=False, sup_threshold=1, inf_threshold=0.1):
+        """Ver `SR830.auto_scale`."""
+        return await self._run_steps(self.driver._auto_scale_pasos(debug, sup_threshold, inf_threshold))
+
+    async def buffer_acquire(self, n_points, sample_rate=512, isXY=True, formato='TRCB'):
+        """Ver `SR830.buffer_acquire`."""
+        return await self._run_steps(self.driver._buffer_acquire_pasos(n_points, sample_rate, isXY, formato))
+
+    def buffer_stream(self, sample_rate=512, chunk=512, n_points=None, isXY=True, formato='TRCB'):
+        """Ver `SR830.buffer_stream`. Se usa con `async for`."""
+        return self._iterate_steps(self.driver._buffer_stream_pasos(sample_rate, chunk, n_points, isXY, formato))
+
+
+class AsyncAGILENT34970A(AsyncDriver):
+    """Multiplexor Agilent 34970A asíncrono (ver `AGILENT34970A`)."""
+
+    driver_class = AGILENT34970A
+
+    def scan_blocks(self, n_scans=None, max_scans_per_block=None, poll=None, stop=None):
+        """Ver `AGILENT34970A.scan_blocks`. Se usa con `async for`."""
+        return self._iterate_steps(self.driver._scan_blocks_pasos(n_scans, max_scans_per_block, poll, stop))
+
+
+class AsyncAFG3021B(AsyncDriver):
+    """Generador de funciones Tektronix AFG 3021B asíncrono (ver `AFG3021B`)."""
+
+    driver_class = AFG3021B
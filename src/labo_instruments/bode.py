@@ -0,0 +1,229 @@
+"""
+Función de transferencia (diagrama de Bode) con generador de funciones Tektronix AFG 3021B y
+osciloscopio Tektronix TDS1002B.
+
+El generador excita el sistema; el osciloscopio adquiere la excitación y la respuesta en la misma
+adquisición. Las curvas de todas las frecuencias se ajustan juntas al final con `fit_sine`.
+"""
+
+import time
+
+import numpy as np
+
+from .demodulation import fit_sine
+
+
+def _escalera(mantisas, desde, hasta):
+    """Valores mantisa × 10^k entre `desde` y `hasta`, ordenados."""
+    exponentes = range(int(np.floor(np.log10(desde))), int(np.ceil(np.log10(hasta))) + 1)
+    valores = sorted(m * 10.0 ** k for k in exponentes for m in mantisas)
+    return [v for v in valores if desde * (1 - 1e-9) <= v <= hasta * (1 + 1e-9)]
+
+
+class BodeSweep:
+    """Ganancia y fase punto a punto con escalas del osciloscopio anticipadas y ajuste en lote."""
+
+    # Escalas del TDS1002B (con punta x1)
+    time_scale_values = _escalera((1, 2.5, 5), 5e-9, 50)
+    volt_scale_values = _escalera((1, 2, 5), 2e-3, 5)
+    # Divisiones verticales desde el centro hasta el borde de la pantalla
+    half_divisions = 4
+
+    def __init__(self, generador, osci, input_channel=1, output_channel=2, periods=4, settle_periods=10,
+                 fill=0.8, inf_threshold=0.2, max_retries=2):
+        """
+        Prepara el barrido.
+
+        Args:
+            generador (AFG3021B): Generador que fija la frecuencia de excitación.
+            osci (TDS1002B): Osciloscopio que adquiere la excitación y la respuesta.
+            input_channel (int, optional): Canal con la excitación. Default: 1.
+            output_channel (int, optional): Canal con la respuesta. Default: 2.
+            periods (float, optional): Períodos mínimos de la señal en pantalla. Default: 4.
+            settle_periods (float, optional): Períodos que se esperan tras cambiar la frecuencia para
+                que el sistema llegue al régimen estacionario. Default: 10.
+            fill (float, optional): Fracción de media pantalla que ocupa la amplitud prevista al elegir
+                la escala vertical. Default: 0.8.
+            inf_threshold (float, optional): Fracción de media pantalla por debajo de la cual se
+                reduce la escala y se vuelve a adquirir. Default: 0.2.
+            max_retries (int, optional): Adquisiciones extra permitidas por punto al reescalar. Default: 2.
+        """
+        self.generador = generador
+        self.osci = osci
+        self.channels = (input_channel, output_channel)
+        self.periods = periods
+        self.settle_periods = settle_periods
+        self.fill = fill
+        self.inf_threshold = inf_threshold
+        self.max_retries = max_retries
+        self.report = {}
+        self._escala_tiempo = None
+        self._escalas = {}  # canal -> índice en volt_scale_values
+
+    def _indice_tiempo(self, frecuencia):
+        """Escala horizontal más rápida que muestra al menos `periods` períodos en las 10 divisiones."""
+        necesaria = self.periods / (10 * frecuencia)
+        valores = self.time_scale_values
+        return next((i for i, valor in enumerate(valores) if valor >= necesaria), len(valores) - 1)
+
+    def _indice_tension(self, amplitud):
+        """Escala vertical más sensible en la que `amplitud` (pico) ocupa a lo sumo `fill` de media pantalla."""
+        valores = self.volt_scale_values
+        return next((i for i, valor in enumerate(valores)
+                     if amplitud <= valor * self.half_divisions * self.fill), len(valores) - 1)
+
+    def _configurar(self, frecuencia, amplitudes):
+        """Ajusta las escalas que cambian y la frecuencia. Devuelve la escala horizontal usada."""
+        escala_tiempo = self.time_scale_values[self._indice_tiempo(frecuencia)]
+        if escala_tiempo != self._escala_tiempo:
+            self.osci.set_time(escala_tiempo)
+            self._escala_tiempo = escala_tiempo
+        for canal, amplitud in zip(self.channels, amplitudes):
+            self._escalar(canal, self._indice_tension(amplitud))
+        self.generador.setFrequency(frecuencia)
+        return escala_tiempo
+
+    def _escalar(self, canal, indice):
+        indice = int(np.clip(indice, 0, len(self.volt_scale_values) - 1))
+        if self._escalas.get(canal) != indice:
+            self.osci.set_channel(canal, self.volt_scale_values[indice])
+            self._escalas[canal] = indice
+
+    def _revisar(self, data):
+        """
+        Busca canales saturados o con poca señal y propone su nueva escala.
+
+        Returns:
+            tuple: dict canal -> índice de escala nuevo, solo para los canales a reescalar, y
+                array de bool con los canales saturados (en el orden de `channels`).
+        """
+        cambios = {}
+        saturados = np.zeros(len(self.channels), dtype=bool)
+        for fila, canal in enumerate(self.channels):
+            indice = self._escalas[canal]
+            escala = self.volt_scale_values[indice]
+            inferior, superior = self.osci.get_range(canal)
+            if data[fila].max() >= superior or data[fila].min() <= inferior:
+                saturados[fila] = True
+                # Saturado: la amplitud medida no es confiable, se sube dos escalas (un factor ~5)
+                if indice < len(self.volt_scale_values) - 1:
+                    cambios[canal] = indice + 2
+            elif indice > 0:
+                amplitud = np.std(data[fila]) * np.sqrt(2)
+                if amplitud < escala * self.half_divisions * self.inf_threshold:
+                    cambios[canal] = min(self._indice_tension(amplitud), indice - 1)
+        return cambios, saturados
+
+    def _medir(self, frecuencias, callback=None):
+        """Adquiere las curvas de cada frecuencia, en orden, y el tiempo de cada etapa por punto."""
+        n = len(frecuencias)
+        tiempos, curvas = [], []
+        recortados = np.zeros(n, dtype=bool)
+        presupuesto = {clave: np.zeros(n) for clave in ('config', 'espera', 'adquisicion')}
+        reescalados = 0
+        # Amplitud pico de partida: la del generador en ambos canales (ganancia 1)
+        entrada = salida = self.generador.getAmplitude()[0] / 2
+        salida_anterior = None
+
+        for i, frecuencia in enumerate(frecuencias):
+            inicio = time.perf_counter()
+            # Extrapola la tendencia de la respuesta, así la escala cambia junto con la frecuencia
+            prediccion = salida if salida_anterior is None else salida * (salida / salida_anterior)
+            escala_tiempo = self._configurar(frecuencia, (entrada, prediccion))
+            presupuesto['config'][i] = time.perf_counter() - inicio
+
+            # Régimen estacionario y, después, un registro completo adquirido con la frecuencia nueva
+            espera = self.settle_periods / frecuencia + 10 * escala_tiempo
+            time.sleep(espera)
+            presupuesto['espera'][i] = espera
+
+            inicio = time.perf_counter()
+            for intento in range(self.max_retries + 1):
+                tiempo, data = self.osci.read_channels(self.channels)
+                cambios, saturados = self._revisar(data)
+                if not cambios or intento == self.max_retries:
+                    break
+                reescalados += 1
+                for canal, indice in cambios.items():
+                    self._escalar(canal, indice)
+                # El cambio de escala se ve recién en la próxima adquisición
+                time.sleep(10 * escala_tiempo)
+            presupuesto['adquisicion'][i] = time.perf_counter() - inicio
+
+            tiempos.append(tiempo)
+            curvas.append(data)
+            recortados[i] = saturados.any()
+            amplitudes = np.std(data, axis=1) * np.sqrt(2)
+            # Una curva recortada subestima la amplitud: al menos llega al borde de la pantalla
+            for fila, canal in enumerate(self.channels):
+                if saturados[fila]:
+                    borde = self.volt_scale_values[self._escalas[canal]] * self.half_divisions
+                    amplitudes[fila] = max(amplitudes[fila], borde)
+            entrada = amplitudes[0]
+            salida_anterior, salida = salida, max(amplitudes[1], np.finfo(float).tiny)
+            if callback is not None:
+                callback(i, frecuencia, tiempo, data)
+
+        return np.array(tiempos), np.array(curvas), recortados, presupuesto, reescalados
+
+    @staticmethod
+    def _fasor(ajuste):
+        """Amplitud, fase (rad) y sus incertezas de v = A·sin(ωt + θ) a partir de los coeficientes del ajuste."""
+        a, b, cov = ajuste['sin'], ajuste['cos'], ajuste['cov']
+        amplitud = np.hypot(a, b)
+        caa, cbb, cab = cov[:, 0, 0], cov[:, 1, 1], cov[:, 0, 1]
+        d_amplitud = np.sqrt(a ** 2 * caa + 2 * a * b * cab + b ** 2 * cbb) / amplitud
+        d_fase = np.sqrt(b ** 2 * caa - 2 * a * b * cab + a ** 2 * cbb) / amplitud ** 2
+        return amplitud, np.arctan2(b, a), d_amplitud, d_fase
+
+    def run(self, frecuencias, callback=None, chunk_size=None, processes=None):
+        """
+        Mide la ganancia y la fase en cada frecuencia.
+
+        Las frecuencias se miden en orden creciente. En cada punto la escala horizontal se elige a
+        partir del período y la vertical a partir de la última amplitud medida, y las dos curvas se
+        leen de una misma adquisición. Al final se ajustan todas las curvas juntas.
+
+        Args:
+            frecuencias (array_like): Frecuencias a medir en Hz.
+            callback (callable, optional): Función llamada tras cada punto como
+                callback(indice, frecuencia, tiempo, data), por ejemplo para graficar en vivo. Default: None.
+            chunk_size (int, optional): Ver `fit_sine`. Default: None.
+            processes (int, optional): Ver `fit_sine`. Default: None.
+
+        Returns:
+            dict: Arrays ordenados por frecuencia: 'frequency', 'gain' (salida/entrada), 'gain_err',
+                'phase' (en grados, desenrollada a lo largo del barrido), 'phase_err', 'input' y
+                'output' (amplitudes pico en V), y 'clipped', True en los puntos en los que alguna
+                curva siguió saturada después de `max_retries` reescalados: su ganancia y su fase no
+                son confiables.
+
+        Side Effects:
+            Guarda en `self.report` el tiempo total ('tiempo'), el tiempo de espera ('espera'), el
+            tiempo del ajuste ('ajuste'), la cantidad de puntos ('puntos') y de reescalados
+            ('reescalados'), y en 'por_punto' los arrays 'config', 'espera' y 'adquisicion' con el
+            tiempo de cada etapa en cada punto.
+        """
+        inicio = time.time()
+        frecuencias = np.sort(np.asarray(frecuencias, dtype=float))
+        tiempos, curvas, recortados, presupuesto, reescalados = self._medir(frecuencias, callback)
+
+        # Las dos curvas de cada punto comparten el eje de tiempos y la frecuencia
+        inicio_ajuste = time.perf_counter()
+        n, canales, puntos = curvas.shape
+        ajuste = fit_sine(curvas.reshape(n * canales, puntos), np.repeat(tiempos, canales, axis=0),
+                          np.repeat(frecuencias, canales), chunk_size=chunk_size, processes=processes)
+        amplitud, fase, d_amplitud, d_fase = (valor.reshape(n, canales) for valor in self._fasor(ajuste))
+        ajuste_tiempo = time.perf_counter() - inicio_ajuste
+
+        ganancia = amplitud[:, 1] / amplitud[:, 0]
+        d_ganancia = ganancia * np.hypot(d_amplitud[:, 1] / amplitud[:, 1], d_amplitud[:, 0] / amplitud[:, 0])
+        desfasaje = np.unwrap(fase[:, 1] - fase[:, 0])
+        d_desfasaje = np.hypot(d_fase[:, 1], d_fase[:, 0])
+
+        self.report = {'tiempo': time.time() - inicio, 'espera': presupuesto['espera'].sum(),
+                       'ajuste': ajuste_tiempo, 'puntos': n, 'reescalados': reescalados,
+                       'por_punto': presupuesto}
+        return {'frequency': frecuencias, 'gain': ganancia, 'gain_err': d_ganancia,
+                'phase': np.degrees(desfasaje), 'phase_err': np.degrees(d_desfasaje),
+                'input': amplitud[:, 0], 'output': amplitud[:, 1], 'clipped': recortados}
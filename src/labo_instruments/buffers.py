@@ -0,0 +1,152 @@
+"""
+Buffer circular de registros de tamaño fijo sobre NumPy.
+
+Se usa para adquisiciones continuas: un hilo productor escribe registros (curvas, barridos)
+y un consumidor los lee como vistas sin copiar, con memoria constante.
+"""
+
+import threading
+import time
+
+import numpy as np
+
+
+class RingBuffer:
+    """Buffer circular de capacidad fija para un productor y un consumidor."""
+
+    policies = ('overwrite', 'drop', 'block')
+
+    def __init__(self, capacity, shape=None, dtype=None, policy='overwrite'):
+        """
+        Crea el buffer. Si no se indican `shape` y `dtype`, la memoria se reserva con el primer registro.
+
+        Args:
+            capacity (int): Cantidad de registros que entran en el buffer.
+            shape (tuple of int, optional): Forma de cada registro. Default: None.
+            dtype (numpy.dtype, optional): Tipo de dato de los registros. Default: None.
+            policy (str, optional): Qué hacer cuando el buffer está lleno (contrapresión):
+                'overwrite' → pisa el registro más viejo sin leer (cuenta un overrun)
+                'drop' → descarta el registro nuevo (cuenta un dropped)
+                'block' → el productor espera a que el consumidor libere lugar
+                Default: 'overwrite'.
+
+        Raises:
+            ValueError: Si la política no es válida.
+        """
+        if policy not in self.policies:
+            raise ValueError('Política inválida: {0}. Opciones: {1}'.format(policy, self.policies))
+        self.capacity = int(capacity)
+        self.policy = policy
+        self.data = None
+        self.timestamps = np.zeros(self.capacity)
+        if shape is not None:
+            self._reservar(shape, dtype)
+
+        self.overruns = 0  # registros pisados antes de ser leídos
+        self.dropped = 0  # registros descartados por buffer lleno
+        self._escritos = 0  # índice absoluto del próximo registro a escribir
+        self._leidos = 0  # índice absoluto del próximo registro a leer
+        self._liberados = 0  # registros que el consumidor ya no usa
+        self._cerrado = False
+        self._cond = threading.Condition()
+
+    def _reservar(self, shape, dtype):
+        self.data = np.empty((self.capacity,) + tuple(shape), dtype=dtype)
+
+    def __len__(self):
+        """Cantidad de registros escritos y todavía no leídos."""
+        return self._escritos - self._leidos
+
+    @property
+    def written(self):
+        """Cantidad total de registros aceptados desde la creación del buffer."""
+        return self._escritos
+
+    def push(self, record, timestamp=None, timeout=None):
+        """
+        Copia un registro en el próximo lugar libre (lo llama el productor).
+
+        Args:
+            record (array_like): Registro a guardar. Debe tener la forma y tipo del buffer.
+            timestamp (float, optional): Tiempo asociado. Default: time.time().
+            timeout (float, optional): Espera máxima con política 'block'. Default: None (sin límite).
+
+        Returns:
+            bool: True si el registro se guardó, False si se descartó.
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        with self._cond:
+            if self.data is None:
+                record = np.asarray(record)
+                self._reservar(record.shape, record.dtype)
+            while self._escritos - self._liberados >= self.capacity:
+                if self.policy == 'overwrite':
+                    if self._leidos == self._liberados:
+                        self.overruns += 1
+                        self._leidos += 1
+                    self._liberados += 1
+                elif self.policy == 'drop' or self._cerrado:
+                    self.dropped += 1
+                    return False
+                elif not self._cond.wait(timeout):
+                    self.dropped += 1
+                    return False
+            slot = self._escritos % self.capacity
+        # La copia se hace fuera del lock: el consumidor no ve el registro hasta que se confirma
+        self.data[slot] = record
+        self.timestamps[slot] = timestamp
+        with self._cond:
+            self._escritos += 1
+            self._cond.notify_all()
+        return True
+
+    def pop(self, timeout=None):
+        """
+        Devuelve el registro más viejo sin leer como una vista (lo llama el consumidor).
+
+        La vista apunta a la memoria del buffer: es válida hasta el próximo `pop`. Con política
+        'overwrite' puede ser pisada si el productor da una vuelta completa; usar `.copy()` para conservarla.
+
+        Args:
+            timeout (float, optional): Espera máxima por un registro nuevo. Default: None (sin límite).
+
+        Returns:
+            tuple or None: (índice, timestamp, vista) o None si se agotó el tiempo o el buffer se cerró vacío.
+        """
+        with self._cond:
+            # Libera el registro entregado en la llamada anterior
+            self._liberados = max(self._liberados, self._leidos)
+            self._cond.notify_all()
+            if not self._cond.wait_for(lambda: self._escritos > self._leidos or self._cerrado, timeout):
+                return None
+            if self._escritos == self._leidos:
+                return None
+            indice = self._leidos
+            self._leidos += 1
+            slot = indice % self.capacity
+            return indice, self.timestamps[slot], self.data[slot]
+
+    def latest(self):
+        """
+        Devuelve el último registro escrito sin consumirlo.
+
+        Returns:
+            tuple or None: (índice, timestamp, vista) o None si todavía no se escribió nada.
+        """
+        with self._cond:
+            if self._escritos == 0:
+                return None
+            indice = self._escritos - 1
+            slot = indice % self.capacity
+            return indice, self.timestamps[slot], self.data[slot]
+
+    def close(self):
+        """Marca el fin de la producción y despierta a quien esté esperando."""
+        with self._cond:
+            self._cerrado = True
+            self._cond.notify_all()
+
+    @property
+    def closed(self):
+        return self._cerrado
@@ -0,0 +1,227 @@
+"""
+Registro de lecturas escalares en bloques columnares de tamaño fijo.
+
+Las lecturas (instrumento, canal, valor, tiempo) se acumulan en un bloque preasignado; cuando se
+llena se escribe como un archivo propio (Parquet o Feather si hay un motor instalado, NPZ
+comprimido si no) y se anota en un índice con su rango de tiempos. La memoria no crece con la
+duración de la medición y leer un intervalo de tiempo solo abre los bloques que lo contienen.
+
+Ejemplo:
+    with ChunkedLogger('corrida') as registro:
+        for bloque in mux.scan_blocks():
+            registro.append_records('34970A', bloque)
+            registro.append('SR830', (1, 2), lockin.get_medicion(), time.time())
+
+    df = read_log('corrida', start=t0, stop=t0 + 3600)
+"""
+
+import csv
+import importlib.util
+import os
+
+import numpy as np
+import pandas as pd
+
+# Columnas del registro y su tipo
+columns = {'instrument': np.int16, 'channel': np.int32, 'value': np.float64, 'time': np.float64}
+
+_extensiones = {'parquet': '.parquet', 'feather': '.feather', 'npz': '.npz'}
+_indice = 'index.csv'
+_campos_indice = ('file', 'rows', 't_min', 't_max')
+
+
+def available_format():
+    """
+    Elige el formato de los bloques según los motores instalados.
+
+    Returns:
+        str: 'parquet' si está instalado pyarrow o fastparquet, 'npz' si no.
+    """
+    if importlib.util.find_spec('pyarrow') is not None:
+        return 'parquet'
+    if importlib.util.find_spec('fastparquet') is not None:
+        return 'parquet'
+    return 'npz'
+
+
+class ChunkedLogger:
+    """Acumula lecturas en bloques de tamaño fijo y los escribe a disco a medida que se llenan."""
+
+    def __init__(self, path, chunk_size=100000, format='auto'):
+        """
+        Abre (o crea) el directorio del registro. Si ya tiene bloques, los nuevos se agregan a continuación.
+
+        Args:
+            path (str): Directorio del registro.
+            chunk_size (int, optional): Lecturas por bloque. Default: 100000.
+            format (str, optional): 'parquet', 'feather', 'npz' o 'auto' (ver `available_format`).
+                Default: 'auto'.
+
+        Raises:
+            ValueError: Si el formato no es válido o no hay un motor instalado para escribirlo.
+        """
+        if format == 'auto':
+            format = available_format()
+        if format not in _extensiones:
+            raise ValueError("format debe ser 'parquet', 'feather', 'npz' o 'auto'")
+        # Se verifica al abrir y no al escribir el primer bloque, que puede llegar horas después
+        if format == 'parquet' and available_format() != 'parquet':
+            raise ValueError('Parquet necesita pyarrow o fastparquet')
+        if format == 'feather' and importlib.util.find_spec('pyarrow') is None:
+            raise ValueError('Feather necesita pyarrow')
+        self.path = path
+        self.chunk_size = int(chunk_size)
+        self.format = format
+        self.instruments = []  # nombre de cada código de instrumento del bloque actual
+        self._buffer = {nombre: np.empty(self.chunk_size, dtype=tipo) for nombre, tipo in columns.items()}
+        self._filas = 0
+        os.makedirs(path, exist_ok=True)
+        self._n_bloques = len(_leer_indice(path))
+        self.rows_written = 0
+
+    def _codigo(self, instrument):
+        if instrument not in self.instruments:
+            self.instruments.append(instrument)
+        return self.instruments.index(instrument)
+
+    def append(self, instrument, channel, value, time):
+        """
+        Agrega lecturas. Los argumentos se combinan como arrays de NumPy (broadcasting), así que
+        se puede pasar un bloque completo o una sola lectura.
+
+        Args:
+            instrument (str): Nombre del equipo.
+            channel (int or array_like): Canal de cada lectura.
+            value (float or array_like): Valor de cada lectura.
+            time (float or array_like): Tiempo de cada lectura (epoch en segundos).
+
+        Returns:
+            None
+        """
+        channel, value, time = np.broadcast_arrays(np.asarray(channel), np.asarray(value, dtype=float),
+                                                   np.asarray(time, dtype=float))
+        channel, value, time = channel.ravel(), value.ravel(), time.ravel()
+        inicio = 0
+        while inicio < len(value):
+            n = min(len(value) - inicio, self.chunk_size - self._filas)
+            destino = slice(self._filas, self._filas + n)
+            origen = slice(inicio, inicio + n)
+            self._buffer['instrument'][destino] = self._codigo(instrument)
+            self._buffer['channel'][destino] = channel[origen]
+            self._buffer['value'][destino] = value[origen]
+            self._buffer['time'][destino] = time[origen]
+            self._filas += n
+            inicio += n
+            if self._filas == self.chunk_size:
+                self.flush()
+
+    def append_records(self, instrument, records):
+        """
+        Agrega un array estructurado con campos 'chan', 'value' y 'time' (por ejemplo el de
+        `AGILENT34970A.scan_records` o `scan_blocks`).
+
+        Args:
+            instrument (str): Nombre del equipo.
+            records (numpy.ndarray): Lecturas.
+
+        Returns:
+            None
+        """
+        self.append(instrument, records['chan'], records['value'], records['time'])
+
+    def flush(self):
+        """Escribe el bloque en curso (aunque no esté lleno) y lo anota en el índice."""
+        if self._filas == 0:
+            return
+        datos = {nombre: columna[:self._filas] for nombre, columna in self._buffer.items()}
+        archivo = 'chunk-{0:06d}{1}'.format(self._n_bloques, _extensiones[self.format])
+        ruta = os.path.join(self.path, archivo)
+        if self.format == 'npz':
+            np.savez_compressed(ruta, instruments=np.array(self.instruments, dtype=str), **datos)
+        else:
+            tabla = pd.DataFrame(datos)
+            tabla['instrument'] = pd.Categorical.from_codes(datos['instrument'], self.instruments)
+            if self.format == 'parquet':
+                tabla.to_parquet(ruta, index=False)
+            else:
+                tabla.to_feather(ruta)
+        # El índice se escribe después del bloque: un corte a mitad de camino no deja entradas rotas
+        nuevo = not os.path.exists(os.path.join(self.path, _indice))
+        with open(os.path.join(self.path, _indice), 'a', newline='') as indice:
+            escritor = csv.writer(indice)
+            if nuevo:
+                escritor.writerow(_campos_indice)
+            escritor.writerow((archivo, self._filas, repr(float(datos['time'].min())),
+                               repr(float(datos['time'].max()))))
+        self._n_bloques += 1
+        self.rows_written += self._filas
+        self._filas = 0
+        self.instruments = []
+
+    def close(self):
+        """Escribe lo que quede en memoria."""
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _leer_indice(path):
+    ruta = os.path.join(path, _indice)
+    if not os.path.exists(ruta):
+        return []
+    with open(ruta, newline='') as indice:
+        return [{'file': fila['file'], 'rows': int(fila['rows']), 't_min': float(fila['t_min']),
+                 't_max': float(fila['t_max'])} for fila in csv.DictReader(indice)]
+
+
+def _leer_bloque(ruta):
+    if ruta.endswith('.npz'):
+        with np.load(ruta) as datos:
+            tabla = pd.DataFrame({nombre: datos[nombre] for nombre in columns})
+            nombres = list(datos['instruments'])
+        tabla['instrument'] = pd.Categorical.from_codes(tabla['instrument'], nombres)
+        return tabla
+    if ruta.endswith('.parquet'):
+        return pd.read_parquet(ruta)
+    return pd.read_feather(ruta)
+
+
+def read_log(path, start=None, stop=None, instrument=None, channels=None):
+    """
+    Lee un intervalo de tiempo del registro. Solo se abren los bloques que se superponen con el intervalo.
+
+    Args:
+        path (str): Directorio del registro.
+        start (float, optional): Tiempo inicial (epoch en segundos, inclusive). Default: None (desde el principio).
+        stop (float, optional): Tiempo final (exclusive). Default: None (hasta el final).
+        instrument (str, optional): Quedarse solo con este equipo. Default: None.
+        channels (list of int, optional): Quedarse solo con estos canales. Default: None.
+
+    Returns:
+        pandas.DataFrame: Columnas 'instrument' (categórica), 'channel', 'value' y 'time', en orden de escritura.
+    """
+    bloques = []
+    for entrada in _leer_indice(path):
+        if (start is not None and entrada['t_max'] < start) or (stop is not None and entrada['t_min'] >= stop):
+            continue
+        tabla = _leer_bloque(os.path.join(path, entrada['file']))
+        mascara = np.ones(len(tabla), dtype=bool)
+        if start is not None:
+            mascara &= tabla['time'].to_numpy() >= start
+        if stop is not None:
+            mascara &= tabla['time'].to_numpy() < stop
+        if instrument is not None:
+            mascara &= (tabla['instrument'] == instrument).to_numpy()
+        if channels is not None:
+            mascara &= tabla['channel'].isin(channels).to_numpy()
+        bloques.append(tabla[mascara])
+    if not bloques:
+        return pd.DataFrame({nombre: pd.Series(dtype=tipo) for nombre, tipo in columns.items()})
+    tabla = pd.concat(bloques, ignore_index=True)
+    # Cada bloque tiene sus propias categorías: se unifican para que la columna siga siendo categórica
+    tabla['instrument'] = tabla['instrument'].astype(str).astype('category')
+    return tabla
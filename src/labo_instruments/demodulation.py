@@ -0,0 +1,183 @@
+"""
+Lock-in digital sobre lotes de curvas del osciloscopio.
+
+Las curvas se proyectan, todas a la vez, sobre las bases seno y coseno de la referencia (más una
+constante, para que el offset no contamine la medición) mediante cuadrados mínimos lineales. Con
+una frecuencia y un eje de tiempos comunes la proyección es un único producto de matrices; con
+frecuencias distintas por curva se resuelven las ecuaciones normales en lote. El resultado tiene
+las mismas salidas que el SR830: X, Y, R (valores eficaces) y θ en grados.
+
+Ejemplo:
+    tiempo, data = osci.read_channels((1, 2))
+    salida = demodulate(data[1], tiempo, frequency=generador.getFrequency()[0])
+    # o bien, con la referencia en el canal 1
+    salida = demodulate(curvas, tiempo, reference=referencias)
+    print(salida['R'], salida['theta'])
+"""
+
+import numpy as np
+
+
+def dominant_frequency(data, dt):
+    """
+    Estima la frecuencia dominante de cada curva por FFT, con interpolación parabólica del pico.
+
+    Args:
+        data (numpy.ndarray): Curvas, de forma (N,) o (n_curvas, N).
+        dt (float): Intervalo entre puntos en segundos.
+
+    Returns:
+        numpy.ndarray: Frecuencia de cada curva en Hz (de forma () para una sola curva).
+    """
+    data = np.asarray(data, dtype=float)
+    filas = np.atleast_2d(data)
+    espectro = np.fft.rfft(filas - filas.mean(axis=1, keepdims=True), axis=1)
+    potencia = np.abs(espectro)
+    k = np.clip(np.argmax(potencia[:, 1:], axis=1) + 1, 1, potencia.shape[1] - 2)
+    indices = np.arange(len(filas))
+    a, b, c = potencia[indices, k - 1], potencia[indices, k], potencia[indices, k + 1]
+    denominador = a - 2 * b + c
+    delta = np.where(denominador != 0, 0.5 * (a - c) / np.where(denominador != 0, denominador, 1), 0)
+    frecuencia = (k + delta) / (filas.shape[1] * dt)
+    return frecuencia[0] if data.ndim == 1 else frecuencia
+
+
+def _normales(s, c, puntos):
+    """Matrices de las ecuaciones normales de la base (sin, cos, 1), de forma (n, 3, 3)."""
+    normal = np.empty((len(s), 3, 3))
+    normal[:, 0, 0] = np.einsum('ij,ij->i', s, s)
+    normal[:, 1, 1] = np.einsum('ij,ij->i', c, c)
+    normal[:, 0, 1] = normal[:, 1, 0] = np.einsum('ij,ij->i', s, c)
+    normal[:, 0, 2] = normal[:, 2, 0] = s.sum(axis=1)
+    normal[:, 1, 2] = normal[:, 2, 1] = c.sum(axis=1)
+    normal[:, 2, 2] = puntos
+    return normal
+
+
+def _ajustar_bloque(v, t, f):
+    """
+    Ajusta v ≈ a·sin(2πft) + b·cos(2πft) + c para cada fila de `v`.
+
+    Returns:
+        tuple: coeficientes (n, 3), suma de residuos al cuadrado (n,) e inversa de las ecuaciones
+            normales ((3, 3) si la base es común, (n, 3, 3) si no).
+    """
+    if f.ndim == 0 and t.ndim == 1:
+        # Base común: una sola inversa y un producto de matrices para todo el bloque
+        fase = 2 * np.pi * f * t
+        s, c = np.sin(fase)[None, :], np.cos(fase)[None, :]
+        inversa = np.linalg.inv(_normales(s, c, v.shape[1])[0])
+        proyeccion = np.column_stack((v @ s[0], v @ c[0], v.sum(axis=1)))
+        coeficientes = proyeccion @ inversa
+    else:
+        # Una base por curva: ecuaciones normales (n, 3, 3) resueltas en lote
+        fase = 2 * np.pi * np.reshape(f, (-1, 1)) * t
+        s, c = np.broadcast_to(np.sin(fase), v.shape), np.broadcast_to(np.cos(fase), v.shape)
+        inversa = np.linalg.inv(_normales(s, c, v.shape[1]))
+        proyeccion = np.stack((np.einsum('ij,ij->i', v, s), np.einsum('ij,ij->i', v, c), v.sum(axis=1)), axis=1)
+        coeficientes = np.einsum('ijk,ik->ij', inversa, proyeccion)
+    residuos = np.einsum('ij,ij->i', v, v) - np.einsum('ij,ij->i', coeficientes, proyeccion)
+    return coeficientes, np.maximum(residuos, 0), np.broadcast_to(inversa, (len(v), 3, 3))
+
+
+def fit_sine(traces, tiempo, frequency, chunk_size=None, processes=None):
+    """
+    Ajusta una sinusoide de frecuencia conocida a cada curva por cuadrados mínimos lineales.
+
+    El modelo es v(t) = a·sin(2πft) + b·cos(2πft) + c. No hace falta que las curvas contengan un
+    número entero de períodos.
+
+    Args:
+        traces (array_like): Curvas, de forma (N,) o (n_curvas, N).
+        tiempo (array_like): Tiempos, de forma (N,) (común a todas las curvas) o (n_curvas, N).
+        frequency (float or array_like): Frecuencia en Hz, común o una por curva.
+        chunk_size (int, optional): Curvas por bloque, para acotar la memoria con lotes grandes.
+            Default: None (todas juntas).
+        processes (int, optional): Procesos en los que repartir los bloques (en Windows, llamar desde
+            un bloque `if __name__ == '__main__':`). Default: None (en este proceso).
+
+    Returns:
+        dict: Arrays de largo n_curvas (escalares para una sola curva):
+            - 'sin', 'cos', 'offset': coeficientes a, b y c.
+            - 'sigma': desvío estándar de los residuos.
+            - 'cov': matriz de covarianza (3, 3) de (a, b, c) estimada a partir de los residuos.
+    """
+    v = np.asarray(traces, dtype=float)
+    una = v.ndim == 1
+    v = np.atleast_2d(v)
+    t = np.asarray(tiempo, dtype=float)
+    f = np.asarray(frequency, dtype=float)
+    n, puntos = v.shape
+    if f.ndim:
+        f = np.broadcast_to(f, (n,))
+    paso = n if not chunk_size else int(chunk_size)
+    bloques = []
+    for inicio in range(0, n, paso):
+        filas = slice(inicio, inicio + paso)
+        bloques.append((v[filas], t[filas] if t.ndim == 2 else t, f[filas] if f.ndim else f))
+
+    if processes and len(bloques) > 1:
+        # Se importa recién acá: multiprocessing no se carga al importar el osciloscopio
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            resultados = list(executor.map(_ajustar_bloque, *zip(*bloques)))
+    else:
+        resultados = [_ajustar_bloque(*bloque) for bloque in bloques]
+    coeficientes = np.concatenate([r[0] for r in resultados])
+    varianza = np.concatenate([r[1] for r in resultados]) / max(puntos - 3, 1)
+    cov = np.concatenate([r[2] for r in resultados]) * varianza[:, None, None]
+
+    resultado = {'sin': coeficientes[:, 0], 'cos': coeficientes[:, 1], 'offset': coeficientes[:, 2],
+                 'sigma': np.sqrt(varianza), 'cov': cov}
+    if una:
+        resultado = {clave: valor[0] for clave, valor in resultado.items()}
+    return resultado
+
+
+def demodulate(traces, tiempo, frequency=None, reference=None, harmonic=1, rms=True,
+               chunk_size=None, processes=None):
+    """
+    Demodula un lote de curvas como lo haría el SR830, todas a la vez.
+
+    La referencia es un seno de la frecuencia dada (por ejemplo `AFG3021B.getFrequency()[0]`) con
+    fase cero en t = 0, o bien la señal de referencia adquirida en otro canal: en ese caso la
+    frecuencia de cada curva se estima de la referencia y θ se mide respecto de ella.
+
+    Args:
+        traces (array_like): Curvas, de forma (N,) o (n_curvas, N).
+        tiempo (array_like): Tiempos, de forma (N,) o (n_curvas, N).
+        frequency (float or array_like, optional): Frecuencia de referencia en Hz, común o una por
+            curva. Default: None (se estima de `reference`).
+        reference (array_like, optional): Curvas de referencia, de la misma forma que `traces`. Default: None.
+        harmonic (int, optional): Armónico de la referencia a detectar. Default: 1.
+        rms (bool, optional): Si es True X, Y y R son valores eficaces, como en el SR830; si no, amplitudes.
+            Default: True.
+        chunk_size (int, optional): Curvas por bloque (ver `fit_sine`). Default: None.
+        processes (int, optional): Procesos en los que repartir los bloques (ver `fit_sine`). Default: None.
+
+    Returns:
+        dict: 'X', 'Y', 'R', 'theta' (grados) y 'f' (frecuencia de referencia), uno por curva.
+
+    Raises:
+        ValueError: Si no se da ni la frecuencia ni la referencia.
+    """
+    opciones = {'chunk_size': chunk_size, 'processes': processes}
+    fase_referencia = 0
+    if frequency is None:
+        if reference is None:
+            raise ValueError('Se requiere frequency o reference')
+        t = np.asarray(tiempo, dtype=float)
+        dt = (t[..., 1] - t[..., 0]).ravel()[0]
+        frequency = dominant_frequency(reference, dt)
+    if reference is not None:
+        ajuste = fit_sine(reference, tiempo, frequency, **opciones)
+        fase_referencia = np.arctan2(ajuste['cos'], ajuste['sin']) * harmonic
+    f = np.asarray(frequency, dtype=float) * harmonic
+    ajuste = fit_sine(traces, tiempo, f, **opciones)
+
+    # v = A·sin(ωt + θ) = A·cos θ·sin(ωt) + A·sin θ·cos(ωt)
+    escala = 1 / np.sqrt(2) if rms else 1
+    fase = np.arctan2(ajuste['cos'], ajuste['sin']) - fase_referencia
+    r = np.hypot(ajuste['sin'], ajuste['cos']) * escala
+    x, y = r * np.cos(fase), r * np.sin(fase)
+    return {'X': x, 'Y': y, 'R': r, 'theta': np.degrees(np.arctan2(y, x)), 'f': f}
@@ -0,0 +1,167 @@
+"""
+Barrido en frecuencia con generador de funciones Tektronix AFG 3021B y Lock-in SR830.
+
+El generador excita el sistema y su salida de sincronismo se usa como referencia externa del Lock-in.
+"""
+
+import time
+
+import numpy as np
+
+
+class FrequencySweep:
+    """Respuesta en frecuencia punto a punto con esperas mínimas y cambios de escala anticipados."""
+
+    def __init__(self, generador, lockin, pll_periods=10, sup_threshold=0.95, inf_threshold=0.1):
+        """
+        Prepara el barrido.
+
+        Args:
+            generador (AFG3021B): Generador que fija la frecuencia de excitación.
+            lockin (SR830): Lock-in que mide la respuesta.
+            pll_periods (float, optional): Períodos de la referencia que se esperan, como mínimo,
+                para que el PLL del Lock-in enganche la nueva frecuencia. Default: 10.
+            sup_threshold (float, optional): Fracción de la escala a partir de la cual la lectura se
+                considera saturada y se reajusta la escala. Default: 0.95.
+            inf_threshold (float, optional): Fracción de la escala por debajo de la cual se reajusta
+                la escala. Default: 0.1.
+        """
+        self.generador = generador
+        self.lockin = lockin
+        self.pll_periods = pll_periods
+        self.sup_threshold = sup_threshold
+        self.inf_threshold = inf_threshold
+        self.report = {}
+
+    def settling_time(self, frecuencia):
+        """
+        Calcula la espera mínima tras cambiar la frecuencia.
+
+        Es el mayor entre el tiempo de establecimiento del filtro del Lock-in (constante de tiempo
+        y pendiente, ver `SR830.settling_time`) y `pll_periods` períodos de la referencia.
+
+        Args:
+            frecuencia (float): Frecuencia en Hz.
+
+        Returns:
+            float: Tiempo de espera en segundos.
+        """
+        return max(self.lockin.settling_time(), self.pll_periods / frecuencia)
+
+    def _escala_para(self, r):
+        """Índice de la escala más sensible que contiene a `r` con el margen de `sup_threshold`."""
+        valores = self.lockin.scale_values
+        return next((i for i, valor in enumerate(valores) if r <= valor * self.sup_threshold),
+                    len(valores) - 1)
+
+    def _medir(self, frecuencias, callback=None):
+        """Mide las frecuencias en el orden dado y devuelve los arrays X, Y y la escala usada."""
+        n = len(frecuencias)
+        x = np.empty(n)
+        y = np.empty(n)
+        escalas = np.empty(n, dtype=int)
+        espera_total = 0.0
+        reescalados = 0
+        r_anterior = None
+        r_ultimo = None
+
+        for i, frecuencia in enumerate(frecuencias):
+            # Anticipa el cambio de escala extrapolando la tendencia de R, así el cambio
+            # ocurre durante la misma espera que el cambio de frecuencia
+            if r_ultimo is not None:
+                prediccion = r_ultimo if r_anterior is None else r_ultimo * (r_ultimo / r_anterior)
+                indice = self._escala_para(prediccion)
+                if indice > self.lockin.scale:
+                    self.lockin.set_scale(indice)
+
+            self.generador.setFrequency(frecuencia)
+            espera = self.settling_time(frecuencia)
+            time.sleep(espera)
+            espera_total += espera
+            x[i], y[i] = self.lockin.get_medicion(isXY=True)
+            r = np.hypot(x[i], y[i])
+
+            escala = self.lockin.scale_values[self.lockin.scale]
+            fuera_de_rango = r > escala * self.sup_threshold or (
+                r < escala * self.inf_threshold and self.lockin.scale > 0)
+            if fuera_de_rango:
+                # auto_scale termina con una lectura en la escala final: se usa esa en lugar de releer
+                r, tita = self.lockin.auto_scale(sup_threshold=self.sup_threshold,
+                                                 inf_threshold=self.inf_threshold)
+                espera_total += self.lockin.auto_scale_report['tiempo']
+                reescalados += 1
+                x[i], y[i] = r * np.cos(np.radians(tita)), r * np.sin(np.radians(tita))
+
+            escalas[i] = self.lockin.scale
+            r_anterior, r_ultimo = r_ultimo, max(r, np.finfo(float).tiny)
+            if callback is not None:
+                callback(i, frecuencia, x[i], y[i])
+
+        return x, y, escalas, espera_total, reescalados
+
+    @staticmethod
+    def _refinar(frecuencias, r, puntos):
+        """Propone `puntos` frecuencias nuevas a cada lado de cada máximo local de R."""
+        picos = np.flatnonzero((r[1:-1] > r[:-2]) & (r[1:-1] >= r[2:])) + 1
+        nuevas = []
+        for pico in picos:
+            for vecino in (pico - 1, pico + 1):
+                # Puntos equiespaciados en escala logarítmica entre el pico y su vecino
+                extremos = np.log(frecuencias[[pico, vecino]])
+                nuevas.append(np.exp(np.linspace(extremos[0], extremos[1], puntos + 2)[1:-1]))
+        if not nuevas:
+            return np.empty(0)
+        return np.setdiff1d(np.concatenate(nuevas), frecuencias)
+
+    def run(self, frecuencias, refine=0, refine_points=3, callback=None):
+        """
+        Mide la respuesta en cada frecuencia.
+
+        Las frecuencias se miden en orden creciente para que la amplitud varíe en forma suave y
+        los cambios de escala del Lock-in sean pocos y se puedan anticipar. Opcionalmente, luego
+        se agregan puntos alrededor de cada resonancia (máximo local de R).
+
+        Args:
+            frecuencias (array_like): Frecuencias a medir en Hz.
+            refine (int, optional): Cantidad de pasadas de refinamiento alrededor de las resonancias. Default: 0.
+            refine_points (int, optional): Puntos agregados a cada lado de cada resonancia por pasada. Default: 3.
+            callback (callable, optional): Función llamada tras cada punto como
+                callback(indice, frecuencia, x, y), por ejemplo para graficar en vivo. Default: None.
+
+        Returns:
+            dict: Arrays ordenados por frecuencia: 'frequency', 'X', 'Y', 'R', 'theta' (en grados)
+                y 'scale' (índice de sensibilidad usado en cada punto).
+
+        Side Effects:
+            Guarda en `self.report` el tiempo total ('tiempo'), el tiempo de espera ('espera'),
+            la cantidad de puntos ('puntos') y de reescalados ('reescalados').
+        """
+        inicio = time.time()
+        frecuencias = np.sort(np.asarray(frecuencias, dtype=float))
+        x, y, escalas, espera, reescalados = self._medir(frecuencias, callback)
+        bloques = [(frecuencias, x, y, escalas)]
+        r = np.hypot(x, y)
+
+        for pasada in range(refine):
+            nuevas = self._refinar(frecuencias, r, refine_points)
+            if len(nuevas) == 0:
+                break
+            x_nuevo, y_nuevo, escalas_nuevas, espera_nueva, reescalados_nuevos = self._medir(nuevas, callback)
+            espera += espera_nueva
+            reescalados += reescalados_nuevos
+            bloques.append((nuevas, x_nuevo, y_nuevo, escalas_nuevas))
+            # Para buscar picos alcanza con frecuencia y R: se intercalan las nuevas (ambas ordenadas)
+            posiciones = np.searchsorted(frecuencias, nuevas)
+            frecuencias = np.insert(frecuencias, posiciones, nuevas)
+            r = np.insert(r, posiciones, np.hypot(x_nuevo, y_nuevo))
+
+        if len(bloques) > 1:
+            # Los arrays medidos se unen y ordenan una sola vez, al final
+            frecuencias, x, y, escalas = (np.concatenate(columna) for columna in zip(*bloques))
+            orden = np.argsort(frecuencias, kind='stable')
+            frecuencias, x, y, escalas = frecuencias[orden], x[orden], y[orden], escalas[orden]
+
+        self.report = {'tiempo': time.time() - inicio, 'espera': espera,
+                       'puntos': len(frecuencias), 'reescalados': reescalados}
+        return {'frequency': frecuencias, 'X': x, 'Y': y, 'R': np.hypot(x, y),
+                'theta': np.degrees(np.arctan2(y, x)), 'scale': escalas}
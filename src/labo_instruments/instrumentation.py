@@ -0,0 +1,372 @@
+"""
+Registro de cada transacción con los equipos: comando, bytes, latencia y método que la originó.
+
+Un `IOMonitor` recibe las transacciones de las sesiones `SCPITransport` y las reparte entre sus
+destinos (`StatsSink`, `CSVSink`, `LoggingSink` o cualquier objeto con `handle(registro)`).
+Con `sample_rate` < 1 se registra solo una fracción de las transacciones, para dejarlo activo
+durante las mediciones; sin monitor la sesión no mide nada.
+
+Ejemplo:
+    from labo_instruments import instrumentation
+
+    with instrumentation.IOMonitor() as monitor:
+        lockin.auto_scale()
+    print(monitor.stats.report())
+"""
+
+import bisect
+import contextlib
+import csv
+import logging
+import os
+import random
+import struct
+import sys
+import threading
+import time
+
+# Monitor que usan las sesiones que no tienen uno propio (ver `enable`)
+default_monitor = None
+
+# Archivos que no cuentan como origen de una transacción: se busca el primer llamador fuera de ellos
+_internos = {os.path.join(os.path.dirname(os.path.abspath(__file__)), 'transport.py'),
+             os.path.abspath(__file__), contextlib.__file__}
+
+fields = ('time', 'instrument', 'operation', 'command', 'bytes_out', 'bytes_in', 'latency', 'caller', 'error')
+
+
+def enable(monitor=None, **kwargs):
+    """
+    Activa un monitor para todas las sesiones que no tienen uno propio.
+
+    Args:
+        monitor (IOMonitor, optional): Monitor a usar. Default: None (crea uno con `kwargs`).
+        **kwargs: Argumentos de `IOMonitor`.
+
+    Returns:
+        IOMonitor: El monitor activo.
+    """
+    global default_monitor
+    default_monitor = monitor if monitor is not None else IOMonitor(**kwargs)
+    return default_monitor
+
+
+def disable():
+    """Desactiva el monitor global. Las sesiones con monitor propio lo conservan."""
+    global default_monitor
+    default_monitor = None
+
+
+def _llamador():
+    """
+    'Clase.metodo' del primer método público fuera del transporte y de este módulo.
+
+    Los métodos con '_' inicial (`_escribir`, `_consultar`, ...) son auxiliares compartidos: se
+    sigue subiendo hasta el método que los usó. Los métodos especiales (`__init__`, `__del__`) cuentan
+    como públicos. Si no hay ninguno público, se usa el primero.
+    """
+    marco = sys._getframe(1)
+    while marco is not None and marco.f_code.co_filename in _internos:
+        marco = marco.f_back
+    primero = marco
+    while marco is not None and marco.f_code.co_name.startswith('_') and not marco.f_code.co_name.endswith('__'):
+        marco = marco.f_back
+    marco = marco if marco is not None else primero
+    if marco is None:
+        return ''
+    return getattr(marco.f_code, 'co_qualname', marco.f_code.co_name)
+
+
+def _tamanio(operation, resultado, kwargs):
+    """Bytes recibidos. Para valores ASCII ya convertidos es una estimación (se vuelven a formatear)."""
+    if operation.startswith('write') or resultado is None:
+        return 0
+    if isinstance(resultado, (bytes, bytearray)):
+        return len(resultado)
+    if isinstance(resultado, str):
+        return len(resultado) + 1
+    if operation == 'query_binary_values':
+        return getattr(resultado, 'nbytes', None) or struct.calcsize(kwargs.get('datatype', 'f')) * len(resultado)
+    return len(kwargs.get('separator', ',').join(str(valor) for valor in resultado)) + 1
+
+
+def command_key(command):
+    """
+    Agrupa comandos que solo difieren en sus argumentos: 'DAT:SOU CH1;:CURV?' -> 'DAT:SOU;:CURV?'.
+
+    Args:
+        command (str): Mensaje enviado.
+
+    Returns:
+        str: Encabezados del mensaje, separados por ';'.
+    """
+    return ';'.join(parte.strip().split(' ')[0] for parte in command.split(';') if parte.strip())
+
+
+class IOMonitor:
+    """Recibe las transacciones de las sesiones y las envía a los destinos configurados."""
+
+    def __init__(self, sinks=None, sample_rate=1.0, capture_caller=True, seed=None):
+        """
+        Args:
+            sinks (list, optional): Destinos de los registros, objetos con `handle(registro)`.
+                Default: None (un `StatsSink`).
+            sample_rate (float, optional): Fracción de las transacciones que se registran. Default: 1.
+            capture_caller (bool, optional): Buscar el método del controlador que originó cada
+                transacción (recorre la pila; desactivarlo lo hace más barato). Default: True.
+            seed (int, optional): Semilla del muestreo. Default: None.
+        """
+        self.sinks = list(sinks) if sinks is not None else [StatsSink()]
+        self.sample_rate = sample_rate
+        self.capture_caller = capture_caller
+        self.seen = 0  # transacciones ofrecidas al monitor
+        self.recorded = 0  # transacciones registradas
+        self._random = random.Random(seed).random
+        self._lock = threading.Lock()
+        self._sesiones = []
+
+    @property
+    def stats(self):
+        """Primer `StatsSink` de los destinos, o None."""
+        return next((sink for sink in self.sinks if isinstance(sink, StatsSink)), None)
+
+    def sample(self):
+        """Decide si se registra la próxima transacción."""
+        with self._lock:
+            self.seen += 1
+        return self.sample_rate >= 1 or self._random() < self.sample_rate
+
+    def caller(self):
+        """Origen de la transacción en curso (vacío si `capture_caller` es False)."""
+        return _llamador() if self.capture_caller else ''
+
+    def record(self, instrument, operation, command, inicio, latency, bytes_out, bytes_in, caller='', error=''):
+        """
+        Arma el registro de una transacción y lo envía a los destinos. Lo llama la sesión.
+
+        Args:
+            instrument (str): Dirección del equipo.
+            operation (str): 'write', 'query', 'query_ascii_values', 'query_binary_values',
+                'write_binary_values' o 'read_bytes'.
+            command (str): Mensaje enviado.
+            inicio (float): Momento del envío (time.time()).
+            latency (float): Duración de la transacción en segundos.
+            bytes_out (int): Bytes enviados.
+            bytes_in (int): Bytes recibidos.
+            caller (str, optional): Método que originó la transacción. Default: ''.
+            error (str, optional): Nombre de la excepción si la transacción falló (por ejemplo
+                'VisaIOError' en un timeout), o '' si terminó bien. Default: ''.
+        """
+        registro = {'time': inicio, 'instrument': instrument, 'operation': operation,
+                    'command': command, 'bytes_out': bytes_out, 'bytes_in': bytes_in,
+                    'latency': latency, 'caller': caller, 'error': error}
+        with self._lock:
+            self.recorded += 1
+            for sink in self.sinks:
+                sink.handle(registro)
+
+    def attach(self, *drivers):
+        """
+        Asigna este monitor a las sesiones de los controladores (o a sesiones `SCPITransport`).
+
+        Args:
+            *drivers: Controladores (TDS1002B, SR830, ...) o sesiones.
+
+        Returns:
+            IOMonitor: El mismo monitor, para encadenar.
+        """
+        for driver in drivers:
+            candidatos = [driver] if hasattr(driver, 'monitor') else list(vars(driver).values())
+            for sesion in candidatos:
+                if hasattr(sesion, 'monitor') and hasattr(sesion, 'resource'):
+                    sesion.monitor = self
+                    self._sesiones.append(sesion)
+        return self
+
+    def detach(self):
+        """Quita el monitor de las sesiones asignadas con `attach`."""
+        for sesion in self._sesiones:
+            if sesion.monitor is self:
+                sesion.monitor = None
+        self._sesiones = []
+
+    def close(self):
+        """Quita el monitor de las sesiones y cierra los destinos que lo necesitan (archivos)."""
+        self.detach()
+        if default_monitor is self:
+            disable()
+        for sink in self.sinks:
+            if hasattr(sink, 'close'):
+                sink.close()
+
+    def __enter__(self):
+        """Activa el monitor para todas las sesiones mientras dura el bloque."""
+        return enable(self)
+
+    def __exit__(self, *exc):
+        if default_monitor is self:
+            disable()
+
+
+class StatsSink:
+    """Totales en memoria por método y por comando, e histograma de latencias."""
+
+    def __init__(self, bins=None):
+        """
+        Args:
+            bins (list of float, optional): Bordes de los intervalos del histograma de latencia en s.
+                Default: None (escala logarítmica de 10 µs a 10 s, 4 intervalos por década).
+        """
+        self.bins = list(bins) if bins is not None else [10 ** (k / 4) for k in range(-20, 5)]
+        self.reset()
+
+    def reset(self):
+        """Borra todo lo acumulado."""
+        self.by_caller = {}
+        self.by_command = {}
+        self.by_instrument = {}
+        # histogram[i] cuenta latencias entre bins[i-1] y bins[i]; los extremos son abiertos
+        self.histogram = [0] * (len(self.bins) + 1)
+
+    @staticmethod
+    def _acumular(tabla, clave, registro):
+        totales = tabla.get(clave)
+        if totales is None:
+            totales = tabla[clave] = {'count': 0, 'latency': 0.0, 'max_latency': 0.0,
+                                      'bytes_out': 0, 'bytes_in': 0, 'errors': 0}
+        totales['count'] += 1
+        totales['latency'] += registro['latency']
+        totales['max_latency'] = max(totales['max_latency'], registro['latency'])
+        totales['bytes_out'] += registro['bytes_out']
+        totales['bytes_in'] += registro['bytes_in']
+        totales['errors'] += bool(registro['error'])
+
+    def handle(self, registro):
+        self._acumular(self.by_caller, registro['caller'], registro)
+        self._acumular(self.by_command, command_key(registro['command']), registro)
+        self._acumular(self.by_instrument, registro['instrument'], registro)
+        self.histogram[bisect.bisect_right(self.bins, registro['latency'])] += 1
+
+    def summary(self, by='caller'):
+        """
+        Devuelve los totales ordenados por tiempo total, de mayor a menor.
+
+        Args:
+            by (str, optional): 'caller', 'command' o 'instrument'. Default: 'caller'.
+
+        Returns:
+            list of dict: Totales con la clave agrupada en 'key' y la latencia media en 'mean_latency'.
+        """
+        tabla = {'caller': self.by_caller, 'command': self.by_command, 'instrument': self.by_instrument}[by]
+        filas = [dict(totales, key=clave, mean_latency=totales['latency'] / totales['count'])
+                 for clave, totales in tabla.items()]
+        return sorted(filas, key=lambda fila: fila['latency'], reverse=True)
+
+    def percentile(self, q):
+        """
+        Estima un percentil de la latencia a partir del histograma (borde superior del intervalo).
+
+        Args:
+            q (float): Percentil entre 0 y 100.
+
+        Returns:
+            float: Latencia en segundos (inf si cae en el último intervalo abierto).
+        """
+        total = sum(self.histogram)
+        if total == 0:
+            return float('nan')
+        acumulado = 0
+        for i, cuenta in enumerate(self.histogram):
+            acumulado += cuenta
+            if acumulado >= q / 100 * total:
+                return self.bins[i] if i < len(self.bins) else float('inf')
+        return float('inf')
+
+    def report(self, by='caller', top=20):
+        """
+        Arma una tabla de texto con los `top` grupos que más tiempo ocupan el bus.
+
+        Returns:
+            str: Tabla lista para imprimir.
+        """
+        lineas = ['{0:<40}{1:>8}{2:>12}{3:>12}{4:>12}{5:>12}{6:>8}'.format(
+            by, 'n', 'total (ms)', 'media (ms)', 'B enviados', 'B recibidos', 'errores')]
+        for fila in self.summary(by)[:top]:
+            lineas.append('{0:<40}{1:>8}{2:>12.2f}{3:>12.3f}{4:>12}{5:>12}{6:>8}'.format(
+                fila['key'][:39], fila['count'], fila['latency'] * 1e3, fila['mean_latency'] * 1e3,
+                fila['bytes_out'], fila['bytes_in'], fila['errors']))
+        lineas.append('latencia p50 ≤ {0:.3g} ms, p95 ≤ {1:.3g} ms'.format(
+            self.percentile(50) * 1e3, self.percentile(95) * 1e3))
+        return '\n'.join(lineas)
+
+
+class CSVSink:
+    """Escribe una fila por transacción en un archivo CSV (columnas de `fields`)."""
+
+    def __init__(self, path, append=False):
+        """
+        Args:
+            path (str): Archivo de salida.
+            append (bool, optional): True para agregar al final de un archivo existente. Default: False.
+        """
+        nuevo = not (append and os.path.exists(path))
+        self._archivo = open(path, 'a' if append else 'w', newline='')
+        self._escritor = csv.DictWriter(self._archivo, fieldnames=fields)
+        if nuevo:
+            self._escritor.writeheader()
+
+    def handle(self, registro):
+        self._escritor.writerow(registro)
+
+    def close(self):
+        self._archivo.close()
+
+
+class LoggingSink:
+    """Envía cada transacción al módulo `logging`."""
+
+    def __init__(self, logger=None, level=logging.DEBUG):
+        """
+        Args:
+            logger (logging.Logger, optional): Logger a usar. Default: None ('labo_instruments.io').
+            level (int, optional): Nivel de los mensajes. Default: logging.DEBUG.
+        """
+        self.logger = logger if logger is not None else logging.getLogger('labo_instruments.io')
+        self.level = level
+
+    def handle(self, registro):
+        self.logger.log(self.level, '%s %s %r %.3f ms (%d B → %d B) desde %s%s',
+                        registro['instrument'], registro['operation'], registro['command'],
+                        registro['latency'] * 1e3, registro['bytes_out'], registro['bytes_in'],
+                        registro['caller'], ' falló: ' + registro['error'] if registro['error'] else '')
+
+
+def timed(monitor, transport, operation, funcion, command, *args, **kwargs):
+    """
+    Ejecuta `funcion(command, *args, **kwargs)` y la registra en `monitor` si toca muestrearla.
+
+    Es el punto de enganche de `SCPITransport`; `command` es None para lecturas sin comando. Las
+    transacciones que fallan (timeouts de VISA, por ejemplo) también se registran, con el nombre de
+    la excepción en 'error', y la excepción se propaga.
+    """
+    if not monitor.sample():
+        return funcion(*args, **kwargs) if command is None else funcion(command, *args, **kwargs)
+    caller = monitor.caller()
+    resultado = None
+    error = ''
+    inicio = time.time()
+    t0 = time.perf_counter()
+    try:
+        resultado = funcion(*args, **kwargs) if command is None else funcion(command, *args, **kwargs)
+        return resultado
+    except BaseException as excepcion:
+        error = type(excepcion).__name__
+        raise
+    finally:
+        latencia = time.perf_counter() - t0
+        bytes_out = 0 if command is None else len(command) + 1
+        if operation == 'write_binary_values':
+            valores = args[0] if args else kwargs.get('values', ())
+            bytes_out += getattr(valores, 'nbytes', len(valores))
+        monitor.record(getattr(transport.resource, 'resource_name', ''), operation, command or '',
+                       inicio, latencia, bytes_out, _tamanio(operation, resultado, kwargs), caller, error)
@@ -0,0 +1,362 @@
+"""
+Adquisición sincronizada de varios equipos con un hilo por interfaz física.
+
+Las tareas (lecturas periódicas o disparadas a mano) se agrupan en disparos: todas las tareas de
+un disparo comparten el mismo tiempo monótono. Cada interfaz (una placa GPIB, o cada equipo USB,
+serie o de red) tiene su propio hilo, de modo que los buses independientes trabajan en paralelo y
+las transacciones de un mismo bus se ejecutan de a una. Los resultados salen como una sola
+secuencia ordenada por tiempo, con un registro por disparo.
+
+Ejemplo:
+    programa = AcquisitionScheduler()
+    programa.add_task('ch1', osci, 'read_data', period=0.5, args=(1,))
+    programa.add_task('lockin', lockin, 'get_medicion', period=0.1)
+    programa.add_task('temperaturas', mux, 'scan_records', period=1)
+    for muestra in programa.run(duration=60):
+        print(muestra['t'], muestra['values'])
+"""
+
+import queue
+import threading
+import time
+
+
+def interface_of(driver):
+    """
+    Identifica la interfaz física de un controlador a partir de la dirección de su sesión.
+
+    Los equipos GPIB de una misma placa comparten el bus ('GPIB0'); los USB, serie y de red tienen
+    cada uno su propio enlace y se identifican por la dirección completa.
+
+    Args:
+        driver: Controlador con una sesión `SCPITransport` (TDS1002B, SR830, ...).
+
+    Returns:
+        str: Identificador de la interfaz (o de la instancia si no tiene sesión VISA).
+    """
+    for valor in vars(driver).values():
+        nombre = getattr(getattr(valor, 'resource', None), 'resource_name', None)
+        if nombre:
+            placa = nombre.split('::')[0].upper()
+            return placa if placa.startswith('GPIB') else nombre
+    return 'driver-{0}'.format(id(driver))
+
+
+class AcquisitionScheduler:
+    """Ejecuta lecturas de varios equipos en disparos comunes y las entrega alineadas en el tiempo."""
+
+    def __init__(self, clock=time.monotonic, maxsize=0):
+        """
+        Args:
+            clock (callable, optional): Reloj monótono de los disparos. Default: time.monotonic.
+            maxsize (int, optional): Máximo de registros sin leer en `samples` (0 sin límite; si se
+                llena se descarta el más viejo). Default: 0.
+        """
+        self.clock = clock
+        self.tasks = {}
+        self.missed = {}  # disparos salteados por tarea (la lectura anterior seguía en curso)
+        self.epoch = time.time() - clock()  # suma que convierte los tiempos del reloj en time.time()
+        self._salida = queue.Queue(maxsize)
+        self._callbacks = []
+        self._colas = {}  # interfaz -> cola de trabajo de su hilo
+        self._hilos = []
+        self._en_curso = set()  # tareas con una lectura pendiente
+        self._disparos = {}  # número de disparo -> registro en armado
+        self._proximo_a_entregar = 0
+        self._contador = 0
+        self._lock = threading.Lock()
+        self._detener = threading.Event()
+        self._despertar = threading.Event()
+
+    def add_task(self, name, driver, method, period=None, args=(), kwargs=None, interface=None):
+        """
+        Agrega una lectura.
+
+        Args:
+            name (str): Nombre de la tarea (clave en los registros).
+            driver: Controlador sobre el que se ejecuta.
+            method (str or callable): Nombre del método del controlador, o función que recibe el controlador.
+            period (float, optional): Período en segundos. None para tareas que solo se ejecutan con
+                `trigger`. Default: None.
+            args (tuple, optional): Argumentos posicionales del método. Default: ().
+            kwargs (dict, optional): Argumentos con nombre del método. Default: None.
+            interface (str, optional): Interfaz física; por defecto se deduce con `interface_of`.
+
+        Returns:
+            None
+
+        Raises:
+            ValueError: Si ya existe una tarea con ese nombre o el período no es positivo.
+        """
+        if name in self.tasks:
+            raise ValueError('Ya existe la tarea {0}'.format(name))
+        if period is not None and period <= 0:
+            raise ValueError('El período debe ser positivo')
+        funcion = getattr(driver, method) if isinstance(method, str) else (lambda *a, **k: method(driver, *a, **k))
+        self.tasks[name] = {'call': funcion, 'period': period, 'args': tuple(args), 'kwargs': kwargs or {},
+                            'interface': interface if interface is not None else interface_of(driver),
+                            'next': None}
+        self.missed[name] = 0
+
+    def subscribe(self, callback):
+        """
+        Registra una función que recibe cada registro completo (en el hilo que lo completa).
+
+        Args:
+            callback (callable): Función callback(registro).
+        """
+        self._callbacks.append(callback)
+
+    @property
+    def interfaces(self):
+        """Interfaces en uso y las tareas que atiende cada una."""
+        interfaces = {}
+        for nombre, tarea in self.tasks.items():
+            interfaces.setdefault(tarea['interface'], []).append(nombre)
+        return interfaces
+
+    def start(self):
+        """
+        Arranca el hilo de cada interfaz y el reloj de las tareas periódicas.
+
+        Se puede volver a llamar después de `stop`: cada arranque tiene sus propias colas, y los
+        registros que no se leyeron de la ejecución anterior se descartan. Si `stop` volvió por
+        `timeout` con una lectura todavía en curso, hay que esperar a que termine: un segundo hilo
+        en la misma interfaz la usaría a la vez que el anterior.
+
+        Raises:
+            RuntimeError: Si el programa ya está en marcha o un hilo de la ejecución anterior sigue
+                en una lectura.
+        """
+        if self._hilos and not self._detener.is_set():
+            raise RuntimeError('El programa ya está en marcha')
+        self._hilos = [hilo for hilo in self._hilos if hilo.is_alive()]
+        if self._hilos:
+            raise RuntimeError('Siguen en una lectura de la ejecución anterior: {0}'.format(
+                ', '.join(hilo.name for hilo in self._hilos)))
+        self._detener.clear()
+        self._despertar.clear()
+        with self._lock:
+            # Lo que quede de la ejecución anterior (el None de fin de `samples`, disparos de
+            # lecturas que no terminaron a tiempo) no debe pasar a esta
+            self._salida = queue.Queue(self._salida.maxsize)
+            self._disparos = {}
+            self._en_curso = set()
+            self._proximo_a_entregar = self._contador
+        for interfaz in self.interfaces:
+            cola = queue.Queue()
+            self._colas[interfaz] = cola
+            hilo = threading.Thread(target=self._trabajar, args=(cola,), daemon=True, name=str(interfaz))
+            hilo.start()
+            self._hilos.append(hilo)
+        inicio = self.clock()
+        for tarea in self.tasks.values():
+            tarea['next'] = inicio if tarea['period'] is not None else None
+        reloj = threading.Thread(target=self._reloj, daemon=True, name='AcquisitionScheduler')
+        reloj.start()
+        self._hilos.append(reloj)
+
+    def stop(self, timeout=None):
+        """
+        Detiene el reloj y los hilos. Las lecturas en curso terminan y se entregan.
+
+        Si una lectura no termina dentro de `timeout`, los disparos que la esperaban se entregan
+        igual, en orden, con un `TimeoutError` en 'errors' para esa tarea; su resultado se descarta
+        si llega después. Su hilo se conserva y `start` no arranca hasta que termine.
+
+        Args:
+            timeout (float, optional): Espera máxima por cada hilo. Default: None.
+        """
+        with self._lock:
+            # Con el lock tomado: un disparo del reloj ya armado tiene sus lecturas encoladas antes del None
+            self._detener.set()
+        self._despertar.set()
+        for cola in self._colas.values():
+            cola.put(None)
+        for hilo in self._hilos:
+            hilo.join(timeout)
+        # Los que siguen en una lectura todavía ocupan su interfaz
+        self._hilos = [hilo for hilo in self._hilos if hilo.is_alive()]
+        self._colas = {}
+        listos = []
+        with self._lock:
+            for numero in sorted(self._disparos):
+                registro = self._disparos.pop(numero)
+                for nombre in registro.pop('pendientes'):
+                    registro['errors'][nombre] = TimeoutError(
+                        'La lectura {0} no terminó antes de stop'.format(nombre))
+                if registro['values'] or registro['errors']:
+                    listos.append(registro)
+                    self._entregar(registro)
+            self._en_curso.clear()
+            self._proximo_a_entregar = self._contador
+            self._entregar(None)
+        for registro in listos:
+            for callback in self._callbacks:
+                callback(registro)
+
+    def trigger(self, *names):
+        """
+        Dispara ahora las tareas indicadas con un tiempo común.
+
+        Args:
+            *names (str): Tareas a disparar. Sin argumentos se disparan las tareas sin período.
+
+        Returns:
+            float: Tiempo del disparo según `clock`.
+
+        Raises:
+            RuntimeError: Si el programa no está en marcha.
+        """
+        if not self._colas:
+            raise RuntimeError('El programa no está en marcha: llamar a start()')
+        if not names:
+            names = [nombre for nombre, tarea in self.tasks.items() if tarea['period'] is None]
+        return self._disparar(names, self.clock())
+
+    def _disparar(self, nombres, t):
+        """Arma un disparo con las tareas que no tienen una lectura pendiente y las encola en su interfaz."""
+        with self._lock:
+            if self._detener.is_set():
+                # `stop` ya mandó el fin a los hilos: un disparo nuevo no se ejecutaría nunca
+                return t
+            numero = self._contador
+            self._contador += 1
+            listas = []
+            for nombre in nombres:
+                if nombre in self._en_curso:
+                    self.missed[nombre] += 1
+                else:
+                    listas.append(nombre)
+            self._en_curso.update(listas)
+            self._disparos[numero] = {'t': t, 'pendientes': set(listas), 'values': {}, 'errors': {},
+                                      'latency': {}}
+            for nombre in listas:
+                self._colas[self.tasks[nombre]['interface']].put((numero, nombre, t))
+        if not listas:
+            self._completar(numero, None)
+        return t
+
+    def _reloj(self):
+        while not self._detener.is_set():
+            periodicas = {nombre: tarea for nombre, tarea in self.tasks.items() if tarea['period'] is not None}
+            if not periodicas:
+                self._despertar.wait()
+                continue
+            proximo = min(tarea['next'] for tarea in periodicas.values())
+            espera = proximo - self.clock()
+            if espera > 0:
+                self._despertar.wait(espera)
+                continue
+            # Todas las tareas que vencen en este instante van en el mismo disparo
+            t = self.clock()
+            vencidas = []
+            for nombre, tarea in periodicas.items():
+                if tarea['next'] <= proximo + 1e-9:
+                    vencidas.append(nombre)
+                    tarea['next'] += tarea['period']
+                    if tarea['next'] <= t:
+                        # El reloj se atrasó más de un período: se saltean los disparos perdidos
+                        perdidos = int((t - tarea['next']) // tarea['period']) + 1
+                        self.missed[nombre] += perdidos
+                        tarea['next'] += perdidos * tarea['period']
+            self._disparar(vencidas, t)
+
+    def _trabajar(self, cola):
+        while True:
+            trabajo = cola.get()
+            if trabajo is None:
+                return
+            numero, nombre, t = trabajo
+            tarea = self.tasks[nombre]
+            try:
+                valor, error = tarea['call'](*tarea['args'], **tarea['kwargs']), None
+            except Exception as excepcion:
+                valor, error = None, excepcion
+            self._completar(numero, nombre, valor, error, self.clock() - t)
+
+    def _completar(self, numero, nombre, valor=None, error=None, latencia=None):
+        """Guarda el resultado de una tarea y entrega, en orden, los disparos que quedaron completos."""
+        listos = []
+        with self._lock:
+            disparo = self._disparos.get(numero)
+            if disparo is None:
+                # Lectura de una ejecución anterior que terminó después del `stop`
+                return
+            if nombre is not None:
+                self._en_curso.discard(nombre)
+                disparo['pendientes'].discard(nombre)
+                disparo['values'][nombre] = valor
+                disparo['latency'][nombre] = latencia
+                if error is not None:
+                    disparo['errors'][nombre] = error
+            # Se entregan en orden de disparo: uno completo espera a los anteriores
+            while (self._proximo_a_entregar in self._disparos
+                   and not self._disparos[self._proximo_a_entregar]['pendientes']):
+                registro = self._disparos.pop(self._proximo_a_entregar)
+                del registro['pendientes']
+                if registro['values'] or registro['errors']:
+                    listos.append(registro)
+                    # Se encola con el lock tomado, así `stop` no puede adelantar su fin de secuencia
+                    self._entregar(registro)
+                self._proximo_a_entregar += 1
+        for registro in listos:
+            for callback in self._callbacks:
+                callback(registro)
+
+    def _entregar(self, registro):
+        """Pone un registro en la salida; si está llena descarta el más viejo."""
+        while True:
+            try:
+                self._salida.put_nowait(registro)
+                return
+            except queue.Full:
+                try:
+                    self._salida.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def samples(self, timeout=None):
+        """
+        Itera los registros a medida que se completan, ordenados por tiempo de disparo.
+
+        Cada registro es un diccionario con 't' (tiempo común del disparo según `clock`; sumarle
+        `epoch` para obtener time.time()), 'values' (resultado de cada tarea), 'errors' (excepción
+        de las tareas que fallaron) y 'latency' (segundos desde el disparo hasta el fin de cada tarea).
+
+        Args:
+            timeout (float, optional): Espera máxima por un registro. Default: None (hasta `stop`).
+
+        Yields:
+            dict: Registro de un disparo.
+        """
+        while True:
+            try:
+                registro = self._salida.get(timeout=timeout)
+            except queue.Empty:
+                return
+            if registro is None:
+                return
+            yield registro
+
+    def run(self, duration):
+        """
+        Ejecuta las tareas periódicas durante `duration` segundos y devuelve todos los registros.
+
+        Args:
+            duration (float): Duración en segundos.
+
+        Returns:
+            list of dict: Registros ordenados por tiempo (ver `samples`).
+        """
+        self.start()
+        time.sleep(duration)
+        self.stop()
+        return list(self.samples())
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
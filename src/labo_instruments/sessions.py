@@ -0,0 +1,222 @@
+"""
+ResourceManager compartido y pool de sesiones VISA.
+
+Todos los controladores piden sus sesiones al pool en lugar de abrir un ResourceManager propio.
+Al destruir un controlador la sesión vuelve al pool y queda abierta, de modo que volver a crear
+el controlador para el mismo equipo no paga de nuevo la apertura ni el *IDN?.
+
+Los controladores de un mismo equipo comparten el `SCPITransport` (y con él el lock que ordena las
+transacciones) y el estado que guardan del equipo (`state`), así lo que uno cambia lo ven los demás.
+"""
+
+import threading
+import time
+
+import pyvisa
+
+from .transport import SCPITransport
+
+_resource_manager = None
+_pool = None
+_lock = threading.Lock()
+
+
+def get_resource_manager():
+    """
+    Devuelve el ResourceManager de PyVISA del proceso, creándolo la primera vez.
+
+    Returns:
+        pyvisa.ResourceManager: ResourceManager compartido.
+    """
+    global _resource_manager
+    with _lock:
+        if _resource_manager is None:
+            _resource_manager = pyvisa.ResourceManager()
+        return _resource_manager
+
+
+def set_resource_manager(resource_manager):
+    """
+    Reemplaza el ResourceManager del proceso (por ejemplo, por uno simulado) y vacía el pool.
+
+    Args:
+        resource_manager: Objeto con el método `open_resource(address)`.
+
+    Returns:
+        None
+    """
+    global _resource_manager
+    if _pool is not None:
+        _pool.close()
+    with _lock:
+        _resource_manager = resource_manager
+
+
+def get_pool():
+    """
+    Devuelve el pool de sesiones del proceso, creándolo la primera vez.
+
+    Returns:
+        SessionPool: Pool compartido por todos los controladores.
+    """
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = SessionPool()
+        return _pool
+
+
+class SessionPool:
+    """Sesiones VISA abiertas, indexadas por dirección y compartidas por los controladores."""
+
+    def __init__(self, resource_manager=None, idle_timeout=None):
+        """
+        Crea un pool vacío.
+
+        Args:
+            resource_manager (optional): ResourceManager a usar. Default: None (el del proceso).
+            idle_timeout (float, optional): Segundos que una sesión sin usar se mantiene abierta.
+                None para mantenerlas abiertas hasta `close()`. Default: None.
+        """
+        self._resource_manager = resource_manager
+        self.idle_timeout = idle_timeout
+        self._sesiones = {}  # dirección -> SCPITransport sobre la sesión abierta
+        self._estados = {}  # dirección -> estado del equipo compartido por sus controladores
+        self._prestamos = {}  # dirección -> cantidad de controladores que la usan
+        self._liberada = {}  # dirección -> momento en que quedó sin usar
+        self._idn = {}
+        self._lock = threading.RLock()
+
+    @property
+    def resource_manager(self):
+        return self._resource_manager if self._resource_manager is not None else get_resource_manager()
+
+    def is_open(self, address):
+        """
+        Indica si ya hay una sesión abierta con el equipo.
+
+        Args:
+            address (str): Dirección VISA.
+
+        Returns:
+            bool: True si la sesión está abierta (prestada o sin usar).
+        """
+        return address in self._sesiones
+
+    def acquire(self, address, separator=';:', max_length=256, **kwargs):
+        """
+        Presta la sesión del equipo, abriéndola solo si no estaba abierta.
+
+        Todos los que piden la misma dirección reciben el mismo `SCPITransport`, de modo que sus
+        transacciones no se intercalan aunque se hagan desde hilos distintos.
+
+        Args:
+            address (str): Dirección VISA (por ejemplo "GPIB0::8::INSTR").
+            separator (str, optional): Ver `SCPITransport`. Solo se usa al abrir la sesión. Default: ';:'.
+            max_length (int, optional): Ver `SCPITransport`. Solo se usa al abrir la sesión. Default: 256.
+            **kwargs: Argumentos para `open_resource` si hay que abrirla.
+
+        Returns:
+            SCPITransport: Transporte sobre la sesión abierta.
+        """
+        with self._lock:
+            self._cerrar_vencidas()
+            if address not in self._sesiones:
+                recurso = self.resource_manager.open_resource(address, **kwargs)
+                self._sesiones[address] = SCPITransport(recurso, separator=separator, max_length=max_length)
+            self._prestamos[address] = self._prestamos.get(address, 0) + 1
+            self._liberada.pop(address, None)
+            return self._sesiones[address]
+
+    def release(self, address, on_last=None):
+        """
+        Devuelve una sesión al pool. Queda abierta para el próximo `acquire`.
+
+        Args:
+            address (str): Dirección VISA.
+            on_last (callable, optional): Función que recibe el transporte y se llama, antes de
+                devolverlo, solo si no queda ningún otro controlador usando la sesión (por ejemplo
+                para desbloquear el panel frontal). Default: None.
+
+        Returns:
+            int: Cantidad de controladores que siguen usando la sesión.
+        """
+        with self._lock:
+            if address not in self._prestamos:
+                return 0
+            if self._prestamos[address] == 1 and on_last is not None:
+                on_last(self._sesiones[address])
+            self._prestamos[address] -= 1
+            restantes = self._prestamos[address]
+            if restantes <= 0:
+                del self._prestamos[address]
+                self._liberada[address] = time.monotonic()
+            self._cerrar_vencidas()
+            return max(restantes, 0)
+
+    def state(self, address):
+        """
+        Devuelve el estado del equipo que guardan sus controladores (parámetros conocidos, fuente
+        seleccionada, ...), compartido por todos los que usan la sesión. Se vacía al cerrarla.
+
+        Args:
+            address (str): Dirección VISA.
+
+        Returns:
+            dict: Estado compartido, que cada controlador completa con sus propias claves.
+        """
+        with self._lock:
+            return self._estados.setdefault(address, {})
+
+    def idn(self, address, refresh=False):
+        """
+        Devuelve la respuesta a *IDN? del equipo, consultándola solo la primera vez.
+
+        Args:
+            address (str): Dirección VISA. La sesión debe estar abierta.
+            refresh (bool, optional): True para volver a consultar al equipo. Default: False.
+
+        Returns:
+            str: Identificación del equipo.
+        """
+        with self._lock:
+            if refresh or address not in self._idn:
+                self._idn[address] = self._sesiones[address].query('*IDN?')
+            return self._idn[address]
+
+    def _cerrar_vencidas(self):
+        if self.idle_timeout is None:
+            return
+        ahora = time.monotonic()
+        for address, momento in list(self._liberada.items()):
+            if ahora - momento >= self.idle_timeout:
+                self._cerrar(address)
+
+    def _cerrar(self, address):
+        self._liberada.pop(address, None)
+        self._prestamos.pop(address, None)
+        self._idn.pop(address, None)
+        self._estados.pop(address, None)
+        sesion = self._sesiones.pop(address, None)
+        if sesion is not None:
+            sesion.close()
+
+    def close(self, address=None):
+        """
+        Cierra las sesiones del pool.
+
+        Args:
+            address (str, optional): Sesión a cerrar. Default: None (todas).
+
+        Returns:
+            None
+        """
+        with self._lock:
+            for direccion in ([address] if address is not None else list(self._sesiones)):
+                self._cerrar(direccion)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
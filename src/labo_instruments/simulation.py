@@ -0,0 +1,921 @@
+"""
+Equipos simulados para usar y medir los controladores sin hardware.
+
+Cada simulador interpreta el subconjunto de SCPI que usan los controladores y responde con el mismo
+formato que el equipo real (curvas en bloques IEEE 488.2, pares de SNAP?, lecturas con fecha y canal
+del 34970A, ...). Las sesiones simuladas imitan a las de PyVISA y cuentan transacciones y bytes; el
+bus se modela con una latencia por mensaje y un ancho de banda (`LinkModel`). Solo se modela el bus:
+los equipos responden en forma instantánea.
+
+Ejemplo:
+    from labo_instruments import TDS1002B, set_resource_manager
+    from labo_instruments.simulation import simulated_lab, addresses
+
+    set_resource_manager(simulated_lab(link='gpib'))
+    osci = TDS1002B(addresses['TDS1002B'])
+"""
+
+import re
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+from .sr830 import SR830
+
+
+class LinkModel:
+    """Costo en tiempo de cada mensaje en el bus: latencia fija más bytes / ancho de banda."""
+
+    def __init__(self, latency=0.0, bandwidth=None, jitter=0.0, seed=None):
+        """
+        Args:
+            latency (float, optional): Tiempo fijo por mensaje (en cada sentido) en segundos. Default: 0.
+            bandwidth (float, optional): Bytes por segundo. None para ancho de banda infinito. Default: None.
+            jitter (float, optional): Variación relativa aleatoria de la latencia (0.1 = ±10 %). Default: 0.
+            seed (int, optional): Semilla del generador aleatorio del jitter. Default: None.
+        """
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.jitter = jitter
+        self._rng = np.random.default_rng(seed)
+
+    def cost(self, n_bytes):
+        """
+        Devuelve el tiempo que tarda un mensaje de `n_bytes` bytes.
+
+        Args:
+            n_bytes (int): Largo del mensaje.
+
+        Returns:
+            float: Tiempo en segundos.
+        """
+        latencia = self.latency
+        if self.jitter:
+            latencia *= 1 + self.jitter * self._rng.uniform(-1, 1)
+        return latencia + (n_bytes / self.bandwidth if self.bandwidth else 0.0)
+
+
+# Valores típicos de cada interfaz
+links = {
+    'ideal': LinkModel(),
+    'usbtmc': LinkModel(latency=0.5e-3, bandwidth=1e6),
+    'gpib': LinkModel(latency=1e-3, bandwidth=250e3),
+    'rs232': LinkModel(latency=2e-3, bandwidth=960),
+}
+
+
+def _ieee_block(datos):
+    """Antepone el encabezado de bloque IEEE 488.2 (#<n><largo>) a los datos binarios."""
+    largo = str(len(datos))
+    return '#{0}{1}'.format(len(largo), largo).encode('ascii') + datos
+
+
+def _channel_list(texto):
+    """'(@101,102:104)' -> [101, 102, 103, 104]."""
+    canales = []
+    for parte in texto.strip().strip('(@)').split(','):
+        if ':' in parte:
+            desde, hasta = parte.split(':')
+            canales.extend(range(int(desde), int(hasta) + 1))
+        elif parte.strip():
+            canales.append(int(parte))
+    return canales
+
+
+class SimulatedInstrument:
+    """
+    Base de los equipos simulados: separa los mensajes en comandos SCPI y los despacha.
+
+    Las subclases declaran en `commands` cada comando en forma larga con mayúsculas y minúsculas
+    (la parte en mayúsculas es la forma corta, como en los manuales). Un valor None indica un
+    parámetro que se guarda al escribirlo y se devuelve al consultarlo (con valor inicial en
+    `defaults`); un nombre de método indica un comando con lógica propia, que se llama como
+    metodo(sufijos, argumentos, consulta). Los sufijos numéricos (CH1, MEAS2, OUTP1) se pasan aparte
+    y el comando declarado que se está ejecutando queda en `self.command`.
+    """
+
+    commands = {}
+    defaults = {}
+    idn = 'SIMULATED,INSTRUMENT,0,0'
+    binary_termination = b'\n'
+
+    def __init__(self, seed=None):
+        """
+        Args:
+            seed (int, optional): Semilla del ruido simulado. Default: None.
+        """
+        self.rng = np.random.default_rng(seed)
+        self.errors = []  # comandos no reconocidos, como la cola de SYST:ERR?
+        self._parametros = {}
+        self._especificaciones = []
+        for especificacion, accion in self.commands.items():
+            consulta = especificacion.endswith('?')
+            nodos = []
+            for nodo in especificacion.rstrip('?').split(':'):
+                corto = ''.join(letra for letra in nodo if not letra.islower())
+                nodos.append((corto, nodo.upper()))
+            self._especificaciones.append((tuple(nodos), consulta, especificacion.rstrip('?'), accion))
+        self._resueltos = {}
+        self.command = None
+
+    def _resolver(self, nodos, consulta):
+        """Busca el comando declarado que corresponde a los nodos recibidos (ya sin sufijos)."""
+        clave = (nodos, consulta)
+        if clave not in self._resueltos:
+            encontrado = None
+            for especificacion, solo_consulta, nombre, accion in self._especificaciones:
+                if len(especificacion) != len(nodos) or (solo_consulta and not consulta):
+                    continue
+                if all(nodo == corto or (nodo.startswith(corto) and largo.startswith(nodo))
+                       for nodo, (corto, largo) in zip(nodos, especificacion)):
+                    encontrado = (nombre, accion)
+                    break
+            self._resueltos[clave] = encontrado
+        return self._resueltos[clave]
+
+    def handle(self, message, payload=None):
+        """
+        Ejecuta un mensaje (uno o más comandos separados por ';') y devuelve la respuesta.
+
+        Args:
+            message (str): Mensaje recibido, sin terminación.
+            payload (bytes, optional): Bloque binario que acompaña al último comando. Default: None.
+
+        Returns:
+            bytes: Respuesta con terminación, o b'' si el mensaje no tenía consultas.
+        """
+        respuestas = []
+        camino = ()
+        partes = [parte.strip() for parte in message.strip().split(';') if parte.strip()]
+        for i, parte in enumerate(partes):
+            encabezado, _, argumentos = parte.partition(' ')
+            argumentos = argumentos.strip()
+            if argumentos.startswith('?'):  # estilo SR830: 'SENS ?', 'DDEF ? 1'
+                encabezado += '?'
+                argumentos = argumentos[1:].strip()
+            consulta = encabezado.endswith('?')
+            encabezado = encabezado.rstrip('?')
+
+            if encabezado.startswith('*'):
+                respuesta = self._comun(encabezado.upper(), consulta)
+            else:
+                if encabezado.startswith(':'):
+                    crudos = tuple(encabezado[1:].split(':'))
+                else:
+                    crudos = camino + tuple(encabezado.split(':'))
+                camino = crudos[:-1]
+                nodos, sufijos = [], []
+                for crudo in crudos:
+                    letras, numero = re.fullmatch(r'([A-Za-z]*?)(\d*)', crudo).groups()
+                    nodos.append(letras.upper())
+                    if numero:
+                        sufijos.append(int(numero))
+                resuelto = self._resolver(tuple(nodos), consulta)
+                if resuelto is None:
+                    self.errors.append(parte)
+                    if consulta:
+                        raise ValueError('Consulta no simulada: {0}'.format(parte))
+                    continue
+                nombre, accion = resuelto
+                self.command = nombre
+                if accion is None:
+                    respuesta = self._parametro(nombre, tuple(sufijos), argumentos, consulta)
+                else:
+                    if payload is not None and i == len(partes) - 1:
+                        argumentos = (argumentos, payload)
+                    respuesta = getattr(self, accion)(tuple(sufijos), argumentos, consulta)
+            if consulta:
+                respuestas.append(respuesta)
+
+        if not respuestas:
+            return b''
+        # Los métodos devuelven str para respuestas de texto y bytes para datos binarios
+        binaria = any(isinstance(respuesta, bytes) for respuesta in respuestas)
+        mensaje = b';'.join(respuesta if isinstance(respuesta, bytes) else respuesta.encode('ascii')
+                            for respuesta in respuestas)
+        return mensaje + (self.binary_termination if binaria else b'\n')
+
+    def _comun(self, encabezado, consulta):
+        if encabezado == '*IDN':
+            return self.idn
+        if encabezado == '*OPC':
+            return '1'
+        if encabezado in ('*CLS', '*RST'):
+            self.errors.clear()
+            if encabezado == '*RST':
+                self._parametros.clear()
+        return '0'
+
+    def _parametro(self, nombre, sufijos, argumentos, consulta):
+        if consulta:
+            return self.get(nombre, *sufijos)
+        self._parametros[(nombre,) + sufijos] = argumentos
+
+    def get(self, nombre, *sufijos, kind=str):
+        """
+        Devuelve el valor de un parámetro, el último escrito o el inicial.
+
+        Args:
+            nombre (str): Comando en la forma declarada en `commands` (por ejemplo 'CH:SCAle').
+            *sufijos (int): Sufijos numéricos del comando.
+            kind (type, optional): Conversión del valor. Default: str.
+
+        Returns:
+            El valor convertido con `kind`.
+        """
+        valor = self._parametros.get((nombre,) + sufijos, self.defaults.get(nombre, '0'))
+        if kind is float and valor.upper().startswith('INF'):
+            return np.inf
+        return kind(float(valor)) if kind is int else kind(valor)
+
+
+class SimulatedAFG3021B(SimulatedInstrument):
+    """Generador de funciones: frecuencia, amplitud, forma de onda, barrido, modulación y memoria EMEM."""
+
+    idn = 'TEKTRONIX,AFG3021B,SIM0001,SCPI:99.0 FV:3.0.0'
+    commands = {
+        'OUTPut:STATe': None, 'FREQuency': None, 'VOLTage': None, 'FUNCtion': None,
+        'FREQuency:MODE': None, 'FREQuency:STARt': None, 'FREQuency:STOP': None,
+        'SWEep:SPACing': None, 'SWEep:TIME': None, 'SWEep:HTIMe': None, 'SWEep:RTIMe': None,
+        'SWEep:MODE': None, 'TRIGger:SOURce': None, 'TRIGger:TIMer': None, 'TRIGger': '_disparar',
+        'AM:SOURce': None, 'AM:INTernal:FUNCtion': None, 'AM:INTernal:FREQuency': None,
+        'AM:DEPTh': None, 'AM:STATe': None,
+        'FM:SOURce': None, 'FM:INTernal:FUNCtion': None, 'FM:INTernal:FREQuency': None,
+        'FM:DEViation': None, 'FM:STATe': None,
+        'DATA:DEFine': '_definir', 'DATA:DATA': '_datos', 'DATA:COPY': '_copiar',
+    }
+    defaults = {'OUTPut:STATe': '0', 'FREQuency': '1000', 'VOLTage': '1', 'FUNCtion': 'SIN',
+                'FREQuency:MODE': 'CW'}
+
+    def __init__(self, seed=None):
+        super().__init__(seed)
+        self.memory = {'EMEM': np.full(1000, 8191, dtype=np.uint16)}
+        self.triggers = 0
+
+    def _disparar(self, sufijos, argumentos, consulta):
+        self.triggers += 1
+
+    def _definir(self, sufijos, argumentos, consulta):
+        memoria, _, puntos = argumentos.partition(',')
+        self.memory[memoria.strip().upper()] = np.full(int(puntos), 8191, dtype=np.uint16)
+
+    def _datos(self, sufijos, argumentos, consulta):
+        memoria, datos = argumentos
+        self.memory[memoria.strip(' ,').upper()] = np.frombuffer(datos, dtype='>u2').astype(np.uint16)
+
+    def _copiar(self, sufijos, argumentos, consulta):
+        destino, origen = (parte.strip().upper() for parte in argumentos.split(','))
+        self.memory[destino] = self.memory[origen].copy()
+
+    def frequency(self):
+        """Frecuencia de salida en Hz."""
+        return self.get('FREQuency', kind=float)
+
+    def amplitude(self):
+        """Amplitud de salida pico a pico en V (0 si la salida está apagada)."""
+        if self.get('OUTPut:STATe', 1).upper() not in ('1', 'ON'):
+            return 0.0
+        return self.get('VOLTage', kind=float)
+
+    def output(self, t, response=None):
+        """
+        Señal de salida en los tiempos `t`, opcionalmente a través de un sistema lineal.
+
+        Args:
+            t (numpy.ndarray): Tiempos en segundos.
+            response (callable, optional): Transferencia compleja H(f). Se aplica la ganancia y el
+                retardo de fase a la frecuencia fundamental. Default: None.
+
+        Returns:
+            numpy.ndarray: Tensión en V.
+        """
+        frecuencia = self.frequency()
+        amplitud = self.amplitude() / 2
+        if response is not None:
+            h = response(frecuencia)
+            amplitud *= abs(h)
+            t = t + np.angle(h) / (2 * np.pi * frecuencia)
+        fase = (frecuencia * t) % 1.0
+        forma = self.get('FUNCtion').upper()
+        if forma.startswith('SQU'):
+            return amplitud * np.where(fase < 0.5, 1.0, -1.0)
+        if forma.startswith('RAMP'):
+            return amplitud * (2 * fase - 1)
+        if forma.startswith('USER'):
+            onda = self.memory.get(forma, self.memory['EMEM']).astype(float)
+            return amplitud * (2 * onda[(fase * len(onda)).astype(int)] / 16382 - 1)
+        return amplitud * np.sin(2 * np.pi * fase)
+
+
+class SimulatedTDS1002B(SimulatedInstrument):
+    """Osciloscopio de dos canales con registro de 2500 puntos, disparo en el centro de la pantalla."""
+
+    idn = 'TEKTRONIX,TDS 1002B,SIM0002,CF:91.1CT FV:v22.11'
+    record_length = 2500
+    commands = {
+        'CH:SCAle': None, 'CH:POSition': None, 'CH?': '_canal',
+        'HORizontal:SCAle': None, 'HORizontal:POSition': None, 'HORizontal?': '_horizontal',
+        'DATa:SOUrce': None, 'DATa:ENCdg': None, 'DATa:WIDth': None, 'DATa:STARt': None, 'DATa:STOP': None,
+        'WFMPre:XZEro?': '_preambulo', 'WFMPre:XINcr?': '_preambulo', 'WFMPre:YZEro?': '_preambulo',
+        'WFMPre:YMUlt?': '_preambulo', 'WFMPre:YOFf?': '_preambulo',
+        'CURVe?': '_curva',
+        'ACQuire:MODe': None, 'ACQuire:NUMAVg': None, 'ACQuire:STATE': '_estado',
+        'SELect:CH': None, 'LOCk': None, 'UNLock': None,
+        'MEASUrement:MEAS:SOUrce': None, 'MEASUrement:MEAS:TYPe': None, 'MEASUrement:MEAS:VALue?': '_medicion',
+        'MEASUrement:IMMed:SOUrce': None, 'MEASUrement:IMMed:TYPe': None, 'MEASUrement:IMMed:VALue?': '_medicion',
+    }
+    defaults = {'CH:SCAle': '1', 'CH:POSition': '0', 'HORizontal:SCAle': '0.0005', 'HORizontal:POSition': '0',
+                'DATa:SOUrce': 'CH1', 'DATa:ENCdg': 'RPB', 'DATa:WIDth': '1', 'DATa:STARt': '1',
+                'DATa:STOP': '2500', 'ACQuire:MODe': 'SAMP', 'ACQuire:NUMAVg': '16',
+                'MEASUrement:MEAS:SOUrce': 'CH1', 'MEASUrement:MEAS:TYPe': 'NONE',
+                'MEASUrement:IMMed:SOUrce': 'CH1', 'MEASUrement:IMMed:TYPe': 'PK2'}
+
+    def __init__(self, signals=None, noise=5e-3, seed=None):
+        """
+        Args:
+            signals (dict, optional): Señal de cada canal como función del tiempo (en s, con el disparo
+                en t=0) que devuelve V. Default: seno de 1 kHz y 1 V en CH1, 0.5 V atrasado 30° en CH2.
+            noise (float, optional): Ruido gaussiano de cada muestra en V rms. Default: 5e-3.
+            seed (int, optional): Semilla del ruido. Default: None.
+        """
+        super().__init__(seed)
+        self.signals = signals if signals is not None else {
+            1: lambda t: np.sin(2 * np.pi * 1e3 * t),
+            2: lambda t: 0.5 * np.sin(2 * np.pi * 1e3 * t - np.pi / 6),
+        }
+        self.noise = noise
+        self._corriendo = True
+        self._adquisicion = 0  # cambia con cada disparo mientras la adquisición está en marcha
+
+    def _canal_fuente(self, texto):
+        return int(texto.strip().upper().lstrip('CH'))
+
+    def _canal(self, sufijos, argumentos, consulta):
+        canal = sufijos[0]
+        return '{0:.3E};{1:.3E}'.format(self.get('CH:SCAle', canal, kind=float),
+                                        self.get('CH:POSition', canal, kind=float))
+
+    def _horizontal(self, sufijos, argumentos, consulta):
+        return '{0:.3E};{1:.3E}'.format(self.get('HORizontal:SCAle', kind=float),
+                                        self.get('HORizontal:POSition', kind=float))
+
+    def _estado(self, sufijos, argumentos, consulta):
+        if consulta:
+            return '1' if self._corriendo else '0'
+        self._corriendo = argumentos.upper() in ('RUN', 'ON', '1')
+
+    def _tiempos(self):
+        escala = self.get('HORizontal:SCAle', kind=float)
+        xin = escala * 10 / self.record_length
+        xze = self.get('HORizontal:POSition', kind=float) - 5 * escala
+        return xze, xin
+
+    def _vertical(self, canal):
+        """(yze, ymu, yoff) del canal según su escala, posición y el ancho de transferencia."""
+        factor = 256 ** (self.get('DATa:WIDth', kind=int) - 1)
+        escala = self.get('CH:SCAle', canal, kind=float)
+        posicion = self.get('CH:POSition', canal, kind=float)
+        return 0.0, escala / 25 / factor, (128 + posicion * 25) * factor
+
+    def _preambulo(self, sufijos, argumentos, consulta):
+        xze, xin = self._tiempos()
+        yze, ymu, yoff = self._vertical(self._canal_fuente(self.get('DATa:SOUrce')))
+        valores = {'XZEro': xze, 'XINcr': xin, 'YZEro': yze, 'YMUlt': ymu, 'YOFf': yoff}
+        return '{0:.6E}'.format(valores[self.command.split(':')[-1]])
+
+    def waveform(self, channel):
+        """
+        Registro completo del canal en V, con ruido, tal como lo adquirió el equipo.
+
+        Mientras la adquisición está en marcha cada llamada corresponde a un disparo nuevo;
+        detenida (ACQ:STATE STOP) devuelve siempre la misma adquisición.
+
+        Args:
+            channel (int): Canal (1 o 2).
+
+        Returns:
+            tuple: (tiempo, tension) como arrays de `record_length` puntos.
+        """
+        if self._corriendo:
+            self._adquisicion += 1
+        xze, xin = self._tiempos()
+        t = xze + xin * np.arange(self.record_length)
+        senal = self.signals.get(channel, lambda t: np.zeros_like(t))(t)
+        ruido = self.noise
+        if self.get('ACQuire:MODe').upper().startswith('AVE'):
+            ruido /= np.sqrt(self.get('ACQuire:NUMAVg', kind=int))
+        rng = np.random.default_rng((self._adquisicion, channel))
+        return t, senal + rng.normal(0, ruido, self.record_length)
+
+    def _curva(self, sufijos, argumentos, consulta):
+        canal = self._canal_fuente(self.get('DATa:SOUrce'))
+        ancho = self.get('DATa:WIDth', kind=int)
+        yze, ymu, yoff = self._vertical(canal)
+        codigos = np.clip(np.round((self.waveform(canal)[1] - yze) / ymu + yoff), 0, 256 ** ancho - 1)
+        inicio = self.get('DATa:STARt', kind=int) - 1
+        fin = self.get('DATa:STOP', kind=int)
+        codigos = codigos[inicio:fin].astype('>u2' if ancho == 2 else 'u1')
+        return _ieee_block(codigos.tobytes())
+
+    def _medicion(self, sufijos, argumentos, consulta):
+        if sufijos:
+            canal = self._canal_fuente(self.get('MEASUrement:MEAS:SOUrce', *sufijos))
+            tipo = self.get('MEASUrement:MEAS:TYPe', *sufijos).upper()
+        else:
+            canal = self._canal_fuente(self.get('MEASUrement:IMMed:SOUrce'))
+            tipo = self.get('MEASUrement:IMMed:TYPe').upper()
+        t, v = self.waveform(canal)
+        valor = 9.9e37
+        if tipo.startswith('PK2'):
+            valor = v.max() - v.min()
+        elif tipo.startswith('MEAN'):
+            valor = v.mean()
+        elif tipo.startswith(('CRM', 'RMS')):
+            valor = np.sqrt(np.mean(v ** 2))
+        elif tipo.startswith('MINI'):
+            valor = v.min()
+        elif tipo.startswith('MAXI'):
+            valor = v.max()
+        elif tipo.startswith(('FREQ', 'PERI')):
+            # Flancos de subida con histéresis del 10 % para no contar cruces debidos al ruido
+            centrado = v - v.mean()
+            indices = np.flatnonzero(np.abs(centrado) > 0.1 * np.abs(centrado).max())
+            positivos = centrado[indices] > 0
+            subidas = indices[1:][positivos[1:] & ~positivos[:-1]]
+            if len(subidas) >= 2:
+                periodo = (subidas[-1] - subidas[0]) * (t[1] - t[0]) / (len(subidas) - 1)
+                valor = periodo if tipo.startswith('PERI') else 1 / periodo
+        return '{0:.6E}'.format(valor)
+
+
+class SimulatedSR830(SimulatedInstrument):
+    """
+    Lock-in que mide un sistema lineal excitado por su salida de seno o por un generador externo.
+
+    Los comandos del SR830 no tienen jerarquía y las consultas pueden escribirse 'SENS ?'.
+    """
+
+    idn = 'Stanford_Research_Systems,SR830,s/n00000,ver1.07'
+    binary_termination = b''  # TRCB? y TRCL? devuelven los bytes sin encabezado ni terminación
+    commands = {
+        'LOCL': None, 'SENS': None, 'OFLT': None, 'OFSL': None, 'ISRC': None, 'FMOD': None,
+        'FREQ': '_frecuencia', 'SLVL': None, 'DDEF': '_display', 'AUXV': '_aux', 'SRAT': None,
+        'SEND': None, 'TSTR': None, 'SNAP?': '_snap', 'OUTP?': '_snap', 'LIAS?': '_lias',
+        'STRT': '_buffer', 'PAUS': '_buffer', 'REST': '_buffer', 'SPTS?': '_puntos',
+        'TRCB?': '_trace', 'TRCL?': '_trace',
+    }
+    defaults = {'SENS': '22', 'OFLT': '8', 'OFSL': '1', 'ISRC': '0', 'FMOD': '1', 'FREQ': '1000',
+                'SLVL': '1', 'SRAT': '13', 'SEND': '1', 'TSTR': '0', 'LOCL': '0'}
+
+    def __init__(self, response=None, source=None, noise=1e-6, seed=None):
+        """
+        Args:
+            response (callable, optional): Transferencia compleja H(f) del sistema medido.
+                Default: None (la señal de entrada es la referencia, H = 1).
+            source (SimulatedAFG3021B, optional): Generador que excita el sistema y da la referencia
+                externa (FMOD 0). Default: None.
+            noise (float, optional): Ruido gaussiano en X e Y en V rms. Default: 1e-6.
+            seed (int, optional): Semilla del ruido. Default: None.
+        """
+        super().__init__(seed)
+        self.response = response
+        self.source = source
+        self.noise = noise
+        self._ddef = {1: 0, 2: 0}
+        self._auxv = {1: 0.0, 2: 0.0, 3: 0.0, 4: 0.0}
+        self._estado_lia = 0
+        self._inicio = None  # comienzo del guardado en el buffer (None si está detenido)
+        self._acumulado = 0.0  # tiempo de guardado antes de la última pausa
+
+    def reference(self):
+        """(frecuencia, amplitud rms de excitación) según la referencia interna o externa."""
+        if self.get('FMOD', kind=int) == 0 and self.source is not None:
+            return self.source.frequency(), self.source.amplitude() / 2 / np.sqrt(2)
+        return self.get('FREQ', kind=float), self.get('SLVL', kind=float)
+
+    def measurement(self, n=None):
+        """
+        Salida X + iY del Lock-in, con ruido y saturada según la sensibilidad.
+
+        Args:
+            n (int, optional): Cantidad de muestras independientes. Default: None (una sola, escalar).
+
+        Returns:
+            complex or numpy.ndarray: Valor medido en V.
+        """
+        frecuencia, amplitud = self.reference()
+        z = amplitud * (self.response(frecuencia) if self.response is not None else 1.0)
+        z = z + self.rng.normal(0, self.noise, n) + 1j * self.rng.normal(0, self.noise, n)
+        escala = SR830.scale_values[self.get('SENS', kind=int)]
+        if np.any(np.abs(z) > escala):
+            self._estado_lia |= 1
+        limite = 1.09 * escala
+        return np.clip(np.real(z), -limite, limite) + 1j * np.clip(np.imag(z), -limite, limite)
+
+    def _frecuencia(self, sufijos, argumentos, consulta):
+        if consulta:
+            return '{0:.4f}'.format(self.reference()[0])
+        self._parametros[('FREQ',)] = argumentos
+
+    def _display(self, sufijos, argumentos, consulta):
+        valores = [int(float(valor)) for valor in argumentos.split(',')]
+        if consulta:
+            return '{0},0'.format(self._ddef[valores[0]])
+        self._ddef[valores[0]] = valores[1]
+
+    def _aux(self, sufijos, argumentos, consulta):
+        valores = [float(valor) for valor in argumentos.split(',')]
+        if consulta:
+            return '{0:.3f}'.format(self._auxv[int(valores[0])])
+        self._auxv[int(valores[0])] = valores[1]
+
+    def _valores(self, z, codigos):
+        r = np.abs(z)
+        theta = np.degrees(np.angle(z))
+        tabla = {1: np.real(z), 2: np.imag(z), 3: r, 4: theta, 9: self.reference()[0],
+                 10: np.real(z) if self._ddef[1] == 0 else r,
+                 11: np.imag(z) if self._ddef[2] == 0 else theta}
+        return [tabla.get(codigo, 0.0) for codigo in codigos]
+
+    def _snap(self, sufijos, argumentos, consulta):
+        codigos = [int(valor) for valor in argumentos.split(',')]
+        return ','.join('{0:.6e}'.format(valor) for valor in self._valores(self.measurement(), codigos))
+
+    def _lias(self, sufijos, argumentos, consulta):
+        estado, self._estado_lia = self._estado_lia, 0
+        return str(estado)
+
+    def _buffer(self, sufijos, argumentos, consulta):
+        if self.command == 'STRT':
+            if self._inicio is None:
+                self._inicio = time.monotonic()
+            return
+        if self._inicio is not None:
+            self._acumulado += time.monotonic() - self._inicio
+            self._inicio = None
+        if self.command == 'REST':
+            self._acumulado = 0.0
+
+    def points(self):
+        """Cantidad de puntos guardados en el buffer según el tiempo transcurrido y la frecuencia de muestreo."""
+        indice = self.get('SRAT', kind=int)
+        if indice >= len(SR830.sample_rate_values):  # disparo externo: no se simula
+            return 0
+        transcurrido = self._acumulado + (time.monotonic() - self._inicio if self._inicio is not None else 0)
+        return min(int(transcurrido * SR830.sample_rate_values[indice]), SR830.buffer_size)
+
+    def _puntos(self, sufijos, argumentos, consulta):
+        return str(self.points())
+
+    def _trace(self, sufijos, argumentos, consulta):
+        canal, inicio, cantidad = (int(valor) for valor in argumentos.split(','))
+        cantidad = max(0, min(cantidad, self.points() - inicio))
+        valores = np.asarray(self._valores(self.measurement(cantidad), (canal + 9,))[0], dtype=float)
+        if self.command == 'TRCL':
+            mantisa, exponente = np.frexp(valores)
+            crudo = np.empty((cantidad, 2), dtype='<i2')
+            crudo[:, 0] = np.round(mantisa * 2 ** 14)
+            crudo[:, 1] = np.where(valores == 0, 124, exponente - 14 + 124)
+            return crudo.tobytes()
+        return valores.astype('<f4').tobytes()
+
+
+class SimulatedAGILENT34970A(SimulatedInstrument):
+    """Multiplexor con barridos disparados por timer y memoria de lecturas con fecha y canal."""
+
+    idn = 'HEWLETT-PACKARD,34970A,0,13-2-2'
+    commands = {
+        'ROUTe:SCAN': None, 'ROUTe:CHANnel:DELay': '_retardo',
+        'FORMat:READing:CHANnel': None, 'FORMat:READing:TIME': None,
+        'FORMat:READing:TIME:TYPE': None, 'FORMat:READing:UNIT': None,
+        'TRIGger:SOURce': None, 'TRIGger:TIMer': None, 'TRIGger:COUNt': None,
+        'CONFigure:TEMPerature': None, 'CONFigure:VOLTage:DC': None, 'CONFigure:VOLTage:AC': None,
+        'CONFigure:CURRent:DC': None, 'CONFigure:CURRent:AC': None, 'CONFigure:RESistance': None,
+        'CONFigure:FRESistance': None, 'CONFigure:FREQuency': None,
+        'SENSe:TEMPerature:NPLC': None, 'SENSe:VOLTage:DC:NPLC': None, 'SENSe:CURRent:DC:NPLC': None,
+        'SENSe:RESistance:NPLC': None, 'SENSe:FRESistance:NPLC': None, 'SENSe:ZERO:AUTO': None,
+        'READ?': '_leer', 'INITiate': '_iniciar', 'ABORt': '_abortar',
+        'DATA:POINts?': '_puntos', 'DATA:REMove?': '_remover',
+        'SYSTem:TIME?': '_hora', 'SYSTem:ERRor?': '_error', 'SYSTem:LFRequency': None,
+    }
+    defaults = {'ROUTe:SCAN': '(@101,102,103,104,105,106,107,108)', 'ROUTe:CHANnel:DELay': '0',
+                'SYSTem:LFRequency': '50',
+                'FORMat:READing:TIME:TYPE': 'ABS', 'TRIGger:TIMer': '1', 'TRIGger:COUNt': '1'}
+
+    def __init__(self, signals=None, noise=0.01, seed=None):
+        """
+        Args:
+            signals (callable, optional): Valor de un canal como función (canal, tiempo en s).
+                Default: temperaturas cercanas a 20 °C que varían lentamente.
+            noise (float, optional): Ruido gaussiano de cada lectura. Default: 0.01.
+            seed (int, optional): Semilla del ruido. Default: None.
+        """
+        super().__init__(seed)
+        self.signals = signals if signals is not None else (
+            lambda canal, t: 20 + 0.5 * (canal % 100) + 0.2 * np.sin(2 * np.pi * t / 60))
+        self.noise = noise
+        self._inicio = None  # comienzo de los barridos con timer
+        self._fin = None
+        self._removidas = 0
+        self._origen = time.time()  # cero de los tiempos relativos
+
+    def _canales(self):
+        return _channel_list(self.get('ROUTe:SCAN'))
+
+    def _retardo(self, sufijos, argumentos, consulta):
+        # Se simula un único retardo para todos los canales: el último configurado
+        if consulta:
+            return self.get('ROUTe:CHANnel:DELay')
+        self._parametros[('ROUTe:CHANnel:DELay',)] = argumentos.split(',')[0]
+
+    def _formatear(self, canales, tiempos):
+        """Lecturas en el formato de READ? (valor, fecha y hora o tiempo relativo, canal)."""
+        canales = np.asarray(canales)
+        tiempos = np.asarray(tiempos, dtype=float)
+        valores = self.signals(canales, tiempos) + self.rng.normal(0, self.noise, len(canales))
+        absoluto = self.get('FORMat:READing:TIME:TYPE').upper().startswith('ABS')
+        lecturas = []
+        for valor, tiempo, canal in zip(valores, tiempos, canales):
+            if absoluto:
+                momento = datetime.fromtimestamp(tiempo)
+                marca = '{0:%Y,%m,%d,%H,%M},{1:06.3f}'.format(momento, momento.second + momento.microsecond * 1e-6)
+            else:
+                marca = '{0:013.3f}'.format(tiempo - self._origen)
+            lecturas.append('{0:+.8E},{1},{2}'.format(valor, marca, canal))
+        return ','.join(lecturas)
+
+    def _barrido(self, inicio):
+        """Canales y tiempos de un barrido que empieza en `inicio`."""
+        canales = self._canales()
+        retardo = self.get('ROUTe:CHANnel:DELay', kind=float)
+        return canales, inicio + retardo * np.arange(len(canales))
+
+    def _leer(self, sufijos, argumentos, consulta):
+        return self._formatear(*self._barrido(time.time()))
+
+    def _iniciar(self, sufijos, argumentos, consulta):
+        self._inicio = time.time()
+        self._origen = self._inicio
+        self._fin = None
+        self._removidas = 0
+
+    def _abortar(self, sufijos, argumentos, consulta):
+        if self._inicio is not None and self._fin is None:
+            self._fin = time.time()
+
+    def _disponibles(self):
+        """Cantidad total de lecturas generadas desde INIT."""
+        if self._inicio is None:
+            return 0
+        fin = self._fin if self._fin is not None else time.time()
+        intervalo = self.get('TRIGger:TIMer', kind=float)
+        barridos = int((fin - self._inicio) / intervalo) + 1 if intervalo > 0 else 1
+        return int(min(barridos, self.get('TRIGger:COUNt', kind=float))) * len(self._canales())
+
+    def _puntos(self, sufijos, argumentos, consulta):
+        return str(self._disponibles() - self._removidas)
+
+    def _remover(self, sufijos, argumentos, consulta):
+        cantidad = min(int(argumentos), self._disponibles() - self._removidas)
+        indices = self._removidas + np.arange(cantidad)
+        self._removidas += cantidad
+        canales = np.asarray(self._canales())
+        retardo = self.get('ROUTe:CHANnel:DELay', kind=float)
+        intervalo = self.get('TRIGger:TIMer', kind=float)
+        posicion = indices % len(canales)
+        tiempos = self._inicio + (indices // len(canales)) * intervalo + posicion * retardo
+        return self._formatear(canales[posicion], tiempos)
+
+    def _hora(self, sufijos, argumentos, consulta):
+        ahora = datetime.now()
+        return '{0:%H,%M},{1:06.3f}'.format(ahora, ahora.second + ahora.microsecond * 1e-6)
+
+    def _error(self, sufijos, argumentos, consulta):
+        if self.errors:
+            return '-113,"Undefined header: {0}"'.format(self.errors.pop(0))
+        return '+0,"No error"'
+
+
+class SimulatedResource:
+    """Sesión simulada con la interfaz de un recurso de PyVISA, que cuenta transacciones y bytes."""
+
+    def __init__(self, instrument, link=None, realtime=True, resource_name=''):
+        """
+        Args:
+            instrument (SimulatedInstrument): Equipo que responde.
+            link (LinkModel, optional): Modelo del bus. Default: None (ideal).
+            realtime (bool, optional): True para esperar el tiempo del bus con `time.sleep`;
+                False para solo acumularlo en `stats['tiempo_bus']`. Default: True.
+            resource_name (str, optional): Dirección VISA. Default: ''.
+        """
+        self.instrument = instrument
+        self.link = link if link is not None else links['ideal']
+        self.realtime = realtime
+        self.resource_name = resource_name
+        self.timeout = 2000
+        self.write_termination = '\n'
+        self.closed = False
+        self._salida = b''
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Pone en cero los contadores de `stats`."""
+        self.stats = {'transacciones': 0, 'escrituras': 0, 'lecturas': 0,
+                      'bytes_escritos': 0, 'bytes_leidos': 0, 'tiempo_bus': 0.0}
+
+    def _bus(self, n_bytes):
+        costo = self.link.cost(n_bytes)
+        self.stats['tiempo_bus'] += costo
+        if self.realtime and costo > 0:
+            time.sleep(costo)
+
+    def _enviar(self, mensaje, payload=None):
+        if self.closed:
+            raise ValueError('La sesión {0} está cerrada'.format(self.resource_name))
+        n_bytes = len(mensaje) + len(self.write_termination) + (len(payload) if payload is not None else 0)
+        self.stats['transacciones'] += 1
+        self.stats['escrituras'] += 1
+        self.stats['bytes_escritos'] += n_bytes
+        self._bus(n_bytes)
+        self._salida += self.instrument.handle(mensaje, payload)
+
+    def _recibir(self, n_bytes=None):
+        if n_bytes is None:
+            datos, self._salida = self._salida, b''
+        else:
+            datos, self._salida = self._salida[:n_bytes], self._salida[n_bytes:]
+        self.stats['lecturas'] += 1
+        self.stats['bytes_leidos'] += len(datos)
+        self._bus(len(datos))
+        return datos
+
+    def write(self, message):
+        with self._lock:
+            self._enviar(message)
+        return len(message) + len(self.write_termination)
+
+    def read(self):
+        with self._lock:
+            return self._recibir().decode('ascii').rstrip('\r\n')
+
+    def read_bytes(self, count, *args, **kwargs):
+        with self._lock:
+            return self._recibir(count)
+
+    def query(self, message, delay=None):
+        with self._lock:
+            self._enviar(message)
+            return self._recibir().decode('ascii').rstrip('\r\n')
+
+    def query_ascii_values(self, message, converter='f', separator=',', container=list, delay=None):
+        texto = self.query(message)
+        convertir = converter if callable(converter) else (int if converter == 'd' else float)
+        valores = [convertir(valor) for valor in texto.strip().strip(separator).split(separator) if valor.strip()]
+        return container(valores)
+
+    def query_binary_values(self, message, datatype='f', is_big_endian=False, container=list, delay=None,
+                            header_fmt='ieee', expect_termination=True, data_points=None, chunk_size=None):
+        tipo = np.dtype(datatype).newbyteorder('>' if is_big_endian else '<')
+        with self._lock:
+            self._enviar(message)
+            if header_fmt == 'empty':
+                datos = self._recibir(data_points * tipo.itemsize if data_points is not None else None)
+            else:
+                crudo = self._recibir()
+                digitos = int(crudo[1:2])
+                largo = int(crudo[2:2 + digitos])
+                datos = crudo[2 + digitos:2 + digitos + largo]
+        valores = np.frombuffer(datos, dtype=tipo)
+        if container in (np.array, np.ndarray, np.asarray):
+            return valores.copy()
+        return container(valores.tolist())
+
+    def write_binary_values(self, message, values, datatype='f', is_big_endian=False, termination=None,
+                            encoding=None, header_fmt='ieee'):
+        tipo = np.dtype(datatype).newbyteorder('>' if is_big_endian else '<')
+        datos = np.asarray(values).astype(tipo).tobytes()
+        with self._lock:
+            self._enviar(message, datos)
+        return len(message) + len(datos)
+
+    def close(self):
+        self.closed = True
+
+
+class SimulatedResourceManager:
+    """ResourceManager que abre sesiones simuladas. Se instala con `set_resource_manager`."""
+
+    def __init__(self, link='ideal', realtime=True):
+        """
+        Args:
+            link (str or LinkModel, optional): Modelo del bus por defecto, una clave de `links` o un
+                `LinkModel`. Default: 'ideal'.
+            realtime (bool, optional): Ver `SimulatedResource`. Default: True.
+        """
+        self.link = links[link] if isinstance(link, str) else link
+        self.realtime = realtime
+        self.instruments = {}
+        self._links = {}
+        self.sessions = {}  # última sesión abierta con cada dirección
+
+    def add(self, address, instrument, link=None):
+        """
+        Conecta un equipo simulado en una dirección.
+
+        Args:
+            address (str): Dirección VISA.
+            instrument (SimulatedInstrument): Equipo.
+            link (str or LinkModel, optional): Modelo del bus de este equipo. Default: None (el del manager).
+
+        Returns:
+            SimulatedInstrument: El mismo equipo, para encadenar.
+        """
+        self.instruments[address] = instrument
+        if link is not None:
+            self._links[address] = links[link] if isinstance(link, str) else link
+        return instrument
+
+    def list_resources(self, query='?*::INSTR'):
+        return tuple(self.instruments)
+
+    def open_resource(self, address, **kwargs):
+        """
+        Abre una sesión con el equipo de `address`.
+
+        Raises:
+            ValueError: Si no hay ningún equipo en esa dirección.
+        """
+        if address not in self.instruments:
+            raise ValueError('No hay ningún equipo simulado en {0}'.format(address))
+        sesion = SimulatedResource(self.instruments[address], self._links.get(address, self.link),
+                                   self.realtime, address)
+        for nombre, valor in kwargs.items():
+            setattr(sesion, nombre, valor)
+        self.sessions[address] = sesion
+        return sesion
+
+    def stats(self):
+        """
+        Suma los contadores de todas las sesiones abiertas.
+
+        Returns:
+            dict: Mismas claves que `SimulatedResource.stats`.
+        """
+        total = {'transacciones': 0, 'escrituras': 0, 'lecturas': 0,
+                 'bytes_escritos': 0, 'bytes_leidos': 0, 'tiempo_bus': 0.0}
+        for sesion in self.sessions.values():
+            for clave, valor in sesion.stats.items():
+                total[clave] += valor
+        return total
+
+    def reset_stats(self):
+        """Pone en cero los contadores de todas las sesiones."""
+        for sesion in self.sessions.values():
+            sesion.reset_stats()
+
+    def close(self):
+        for sesion in self.sessions.values():
+            sesion.close()
+
+
+# Direcciones de los equipos de `simulated_lab`
+addresses = {
+    'TDS1002B': 'USB0::0x0699::0x0363::C102223::INSTR',
+    'SR830': 'GPIB0::8::INSTR',
+    'AGILENT34970A': 'GPIB0::9::INSTR',
+    'AFG3021B': 'USB0::0x0699::0x0346::C034165::INSTR',
+}
+
+
+def simulated_lab(link=None, realtime=True, response=None, seed=None):
+    """
+    Arma un laboratorio simulado con los cuatro equipos en las direcciones de `addresses`.
+
+    El generador excita un sistema lineal `response`; el osciloscopio ve la excitación en CH1 y la
+    respuesta en CH2, y el Lock-in mide la respuesta con la referencia externa del generador.
+
+    Args:
+        link (str or LinkModel, optional): Modelo del bus. Los equipos USB usan 'usbtmc' y los GPIB
+            'gpib' salvo que se indique uno. Default: None.
+        realtime (bool, optional): Ver `SimulatedResource`. Default: True.
+        response (callable, optional): Transferencia compleja H(f). Default: pasabajos RC de 1 kHz.
+        seed (int, optional): Semilla del ruido. Default: None.
+
+    Returns:
+        SimulatedResourceManager: Manager con los equipos conectados.
+    """
+    if response is None:
+        response = lambda f: 1 / (1 + 1j * f / 1e3)
+    manager = SimulatedResourceManager(link if link is not None else 'ideal', realtime)
+    generador = SimulatedAFG3021B(seed)
+    generador._parametros[('OUTPut:STATe', 1)] = '1'
+    usb, gpib = (None, None) if link is not None else ('usbtmc', 'gpib')
+    manager.add(addresses['AFG3021B'], generador, usb)
+    manager.add(addresses['TDS1002B'], SimulatedTDS1002B(
+        {1: generador.output, 2: lambda t: generador.output(t, response)}, seed=seed), usb)
+    manager.add(addresses['SR830'], SimulatedSR830(response, generador, seed=seed), gpib)
+    manager.add(addresses['AGILENT34970A'], SimulatedAGILENT34970A(seed=seed), gpib)
+    return manager
@@ -5,9 +5,32 @@ Manual: https://github.com/diegoshalom/labosdf/blob/master/manuales/SR830m.pdf
 """
 
 
-import pyvisa
+import numpy as np
 import time
 
+from .sessions import get_pool
+
+
+def _ejecutar_pasos(pasos):
+    """Ejecuta una operación escrita como generador de esperas, durmiendo lo que pide cada paso."""
+    try:
+        while True:
+            time.sleep(next(pasos))
+    except StopIteration as fin:
+        return fin.value
+
+
+def _iterar_pasos(pasos):
+    """Recorre un generador de pasos (espera, elemento): duerme cada espera y entrega los elementos."""
+    try:
+        for espera, elemento in pasos:
+            if elemento is None:
+                time.sleep(espera)
+            else:
+                yield elemento
+    finally:
+        pasos.close()
+
 class SR830:
     '''Clase para el manejo amplificador Lockin SR830 usando PyVISA de interfaz'''
 
@@ -18,23 +41,42 @@ class SR830:
     time_constant_values = (10e-6, 30e-6, 100e-6, 300e-6, 1e-3, 3e-3, 10e-3, 30e-3, 100e-3, 300e-3,
                     1e0, 3e0, 10e0, 30e0, 100e0, 300e0, 1e3, 3e3, 10e3, 30e3) # in s
 
-    def __init__(self, resource):
+    sample_rate_values = (62.5e-3, 125e-3, 250e-3, 500e-3, 1, 2, 4, 8, 16, 32, 64, 128, 256, 512) # in Hz
+
+    buffer_size = 16383 # puntos por canal en el buffer interno
+
+    # Constantes de tiempo a esperar para que la salida llegue al 99% del valor final,
+    # según la pendiente del filtro (OFSL 0..3 = 6, 12, 18, 24 dB/oct)
+    settling_factors = (5, 7, 9, 10)
+
+    def __init__(self, resource, pool=None):
         """
         Inicializa la conexión con el Lock-in Amplifier SR830 mediante PyVISA.
 
         Args:
             resource (str): Dirección del recurso VISA del instrumento (por ejemplo, "GPIB0::8::INSTR").
+            pool (SessionPool, optional): Pool de sesiones a usar. Default: None (el del proceso).
 
         Side Effects:
             - Bloquea el panel frontal del equipo para evitar interacción manual.
             - Obtiene la escala y constante de tiempo actuales del equipo.
         """
 
-        self._lockin = pyvisa.ResourceManager().open_resource(resource)
+        # El SR830 no tiene árbol de comandos y su buffer de entrada es de 256 caracteres
+        self._pool = pool if pool is not None else get_pool()
+        self._direccion = resource
+        reutilizada = self._pool.is_open(resource)
+        self._lockin = self._pool.acquire(resource, separator=';', max_length=256)
+        # Lo que se sabe del equipo se comparte con los demás SR830 que usan la misma sesión
+        self._compartido = self._pool.state(resource)
+        # Último valor conocido de cada parámetro del equipo (write-through)
+        self._estado = self._compartido.setdefault('estado', {})
+        self.transacciones = {'enviadas': 0, 'ahorradas': 0}
         #print(self._lockin.query('*IDN?')) # habria que ver si es mejor no pedir IDN. Puede que trabe la comunicacion al ppio
         self._lockin.write("LOCL 2") #Bloquea el uso de teclas del Lockin
-        time.sleep(1) # tal vez ayuda a evitar errores de comunicacion del pyvisa
-        print(self._lockin.query("*IDN?"))
+        if not reutilizada:
+            time.sleep(1) # tal vez ayuda a evitar errores de comunicacion del pyvisa
+        print(self._pool.idn(resource))
         self.scale = self.get_scale()
         self.time_constant = self.get_time_constant()
 
@@ -43,11 +85,117 @@ class SR830:
         Finaliza la conexión con el Lock-in SR830 y desbloquea el panel frontal.
 
         Side Effects:
-            - Envía el comando "LOCL 0" para habilitar el control manual del equipo.
-            - Cierra la conexión VISA.
+            - Si es el último SR830 que usa la sesión, envía el comando "LOCL 0" para habilitar el
+              control manual del equipo.
+            - Devuelve la sesión VISA al pool, donde queda abierta para reutilizarla.
+        """
+        self._pool.release(self._direccion, on_last=lambda lockin: lockin.write("LOCL 0")) #Desbloquea el Lockin
+
+    @property
+    def scale(self):
+        """Índice de la escala configurada (ver `set_scale`), común a los SR830 de la misma sesión."""
+        return self._compartido['scale']
+
+    @scale.setter
+    def scale(self, scale_number):
+        self._compartido['scale'] = scale_number
+
+    @property
+    def time_constant(self):
+        """Índice de la constante de tiempo configurada (ver `set_time_constant`)."""
+        return self._compartido['time_constant']
+
+    @time_constant.setter
+    def time_constant(self, time_constant_number):
+        self._compartido['time_constant'] = time_constant_number
+
+    @property
+    def _buffer_rate(self):
+        return self._compartido['buffer_rate']
+
+    @_buffer_rate.setter
+    def _buffer_rate(self, sample_rate):
+        self._compartido['buffer_rate'] = sample_rate
+
+    @property
+    def _buffer_isXY(self):
+        return self._compartido['buffer_isXY']
+
+    @_buffer_isXY.setter
+    def _buffer_isXY(self, isXY):
+        self._compartido['buffer_isXY'] = isXY
+
+    def _escribir(self, clave, valor, orden):
         """
-        self._lockin.write("LOCL 0") #Desbloquea el Lockin
-        self._lockin.close()
+        Envía `orden` solo si `valor` difiere del último valor conocido de `clave`.
+
+        Dentro de un `batch` el comando sale recién al enviar el lote: hasta entonces (o si el envío
+        falla) el valor de `clave` queda como desconocido.
+        """
+        if clave in self._estado and self._estado[clave] == valor:
+            self.transacciones['ahorradas'] += 1
+            return
+        self._estado.pop(clave, None)
+        self._lockin.write(orden, on_sent=lambda: self._estado.__setitem__(clave, valor))
+        self.transacciones['enviadas'] += 1
+
+    def _consultar(self, clave, orden, conversor=int):
+        """Devuelve el último valor conocido de `clave`, consultando al equipo solo si no se conoce."""
+        if clave in self._estado:
+            self.transacciones['ahorradas'] += 1
+            return self._estado[clave]
+        valor = conversor(self._lockin.query_ascii_values(orden)[0])
+        self.transacciones['enviadas'] += 1
+        self._estado[clave] = valor
+        return valor
+
+    def invalidate(self, *claves):
+        """
+        Olvida el valor conocido de los parámetros indicados, para que el próximo acceso vaya al equipo.
+
+        Usar si el estado del equipo se modificó por fuera de esta clase (panel frontal, *RST, otro programa).
+
+        Args:
+            *claves (str): Parámetros a olvidar ('SENS', 'OFLT', 'OFSL', 'ISRC', 'FMOD', 'FREQ', 'SLVL',
+                'DDEF1', 'DDEF2', 'AUXV1'..'AUXV4', 'SRAT', 'SEND', 'TSTR'). Sin argumentos se olvidan todos.
+
+        Returns:
+            None
+        """
+        if not claves:
+            self._estado.clear()
+        for clave in claves:
+            self._estado.pop(clave, None)
+
+    def resync(self):
+        """
+        Vuelve a leer del equipo todos los parámetros que se guardan localmente.
+
+        Returns:
+            dict: Estado leído, indexado por parámetro.
+        """
+        self.invalidate()
+        for clave in ('SENS', 'OFLT', 'OFSL', 'ISRC', 'FMOD', 'SRAT', 'SEND', 'TSTR'):
+            self._consultar(clave, clave + ' ?')
+        self._consultar('SLVL', 'SLVL ?', float)
+        if self._estado['FMOD'] == 1:
+            self._consultar('FREQ', 'FREQ ?', float)
+        for canal in (1, 2):
+            self._consultar(f'DDEF{canal}', f'DDEF ? {canal}')
+        for aux in (1, 2, 3, 4):
+            self._consultar(f'AUXV{aux}', f'AUXV ? {aux}', float)
+        self.scale = self._estado['SENS']
+        self.time_constant = self._estado['OFLT']
+        return dict(self._estado)
+
+    def get_transaction_stats(self):
+        """
+        Devuelve cuántas transacciones se enviaron al equipo y cuántas se evitaron por el estado guardado.
+
+        Returns:
+            dict: Claves 'enviadas' y 'ahorradas'.
+        """
+        return dict(self.transacciones)
 
     def set_modo(self, modo):
         """
@@ -63,7 +211,7 @@ class SR830:
         Returns:
             None
         """
-        self._lockin.write("ISRC {0}".format(modo))
+        self._escribir('ISRC', modo, "ISRC {0}".format(modo))
 
     def set_filtro(self, sen, tbase, slope):
         """
@@ -77,9 +225,10 @@ class SR830:
         Returns:
             None
         """
-        self._lockin.write("OFLS {0}".format(slope))
-        self._lockin.write("OFLT {0}".format(tbase))
-        self._lockin.write("SENS {0}".format(sen))
+        with self._lockin.batch():
+            self._escribir('OFSL', slope, "OFSL {0}".format(slope))
+            self.set_time_constant(tbase)
+            self.set_scale(sen)
        
     def set_aux_out(self, auxOut = 1, auxV = 0):
         """
@@ -95,7 +244,7 @@ class SR830:
         Raises:
             ValueError: Si auxV está fuera del rango permitido.
         """
-        self._lockin.write(f'AUXV {auxOut}, {auxV}')
+        self._escribir(f'AUXV{auxOut}', auxV, f'AUXV {auxOut}, {auxV}')
 
            
     def set_referencia(self,isIntern, freq, voltaje = 1):
@@ -113,12 +262,15 @@ class SR830:
         if isIntern:
             #Referencia interna
             #Configura la referencia si es así
-            self._lockin.write("FMOD 1")
-            self._lockin.write("SLVL {0:f}".format(voltaje))
-            self._lockin.write("FREQ {0:f}".format(freq))
+            with self._lockin.batch():
+                self._escribir('FMOD', 1, "FMOD 1")
+                self._escribir('SLVL', voltaje, "SLVL {0:f}".format(voltaje))
+                self._escribir('FREQ', freq, "FREQ {0:f}".format(freq))
         else:
             #Referencia externa
-            self._lockin.write("FMOD 0")
+            self._escribir('FMOD', 0, "FMOD 0")
+            # Con referencia externa la frecuencia la impone la señal externa
+            self.invalidate('FREQ')
            
     def set_scale(self, scale_number):
         """
@@ -130,8 +282,8 @@ class SR830:
         Returns:
             int: Índice aplicado, limitado al rango válido.
         """
-        self.scale = min(scale_number,len(self.scale_values))
-        self._lockin.write(f'SENS {self.scale}')
+        self.scale = max(0, min(scale_number, len(self.scale_values) - 1))
+        self._escribir('SENS', self.scale, f'SENS {self.scale}')
         return self.scale
    
     def get_scale(self):
@@ -141,7 +293,7 @@ class SR830:
         Returns:
             int: Índice correspondiente a la sensibilidad configurada.
         """
-        self.scale = int(self._lockin.query_ascii_values('SENS ?')[0])
+        self.scale = self._consultar('SENS', 'SENS ?')
         return self.scale
 
     def set_time_constant(self, time_constant_number):
@@ -154,7 +306,7 @@ class SR830:
         Returns:
             int: Valor de índice aplicado como constante de tiempo.
         """
-        self._lockin.write(f'OFLT {time_constant_number}')
+        self._escribir('OFLT', time_constant_number, f'OFLT {time_constant_number}')
         self.time_constant = time_constant_number
         return self.time_constant
    
@@ -165,7 +317,39 @@ class SR830:
         Returns:
             int: Índice en la tabla `time_constant_values`.
         """
-        return int(self._lockin.query_ascii_values('OFLT ?')[0])
+        self.time_constant = self._consultar('OFLT', 'OFLT ?')
+        return self.time_constant
+
+    def get_slope(self):
+        """
+        Consulta la pendiente del filtro paso bajo.
+
+        Returns:
+            int: Índice de pendiente (0 = 6 dB/oct, 1 = 12 dB/oct, 2 = 18 dB/oct, 3 = 24 dB/oct).
+        """
+        return self._consultar('OFSL', 'OFSL ?')
+
+    def settling_time(self):
+        """
+        Calcula el tiempo de espera para que la salida se estabilice tras un cambio.
+
+        Depende de la constante de tiempo y de la pendiente del filtro (ver `settling_factors`).
+
+        Returns:
+            float: Tiempo de espera en segundos.
+        """
+        return self.time_constant_values[self.time_constant] * self.settling_factors[self.get_slope()]
+
+    def get_overload(self):
+        """
+        Lee y limpia el registro de estado LIA (LIAS?).
+
+        Returns:
+            dict: Flags de sobrecarga acumulados desde la lectura anterior:
+                'input' (entrada/amplificador), 'filter' (filtro) y 'output' (salida).
+        """
+        estado = int(self._lockin.query_ascii_values('LIAS?')[0])
+        return {'input': bool(estado & 1), 'filter': bool(estado & 2), 'output': bool(estado & 4)}
 
     def set_display(self, isXY):
         """
@@ -177,12 +361,13 @@ class SR830:
         Returns:
             None
         """
-        if isXY:
-            self._lockin.write("DDEF 1, 0") #Canal 1, x
-            self._lockin.write('DDEF 2, 0') #Canal 2, y
-        else:
-            self._lockin.write("DDEF 1,1") #Canal 1, R
-            self._lockin.write('DDEF 2,1') #Canal 2, T
+        with self._lockin.batch():
+            if isXY:
+                self._escribir('DDEF1', 0, "DDEF 1, 0") #Canal 1, x
+                self._escribir('DDEF2', 0, 'DDEF 2, 0') #Canal 2, y
+            else:
+                self._escribir('DDEF1', 1, "DDEF 1,1") #Canal 1, R
+                self._escribir('DDEF2', 1, 'DDEF 2,1') #Canal 2, T
    
     def get_display(self):
         """
@@ -205,50 +390,283 @@ class SR830:
             list[float]: Lista con dos elementos representando la medición actual.
         """
         orden = "SNAP? "
-        if isXY:
-            self._lockin.write("DDEF 1,0") #Canal 1, XY
-            orden += "1, 2" #SNAP? 1,2
-        else:
-            self._lockin.write("DDEF 1,1") #Canal 1, RTheta
-            orden += "3, 4" #SNAP? 3, 4
-        return self._lockin.query_ascii_values(orden, separator=",")
-
-    def auto_scale(self):
+        # Si cambia el display, el DDEF viaja en el mismo mensaje que el SNAP?
+        with self._lockin.batch():
+            if isXY:
+                self._escribir('DDEF1', 0, "DDEF 1,0") #Canal 1, XY
+                orden += "1, 2" #SNAP? 1,2
+            else:
+                self._escribir('DDEF1', 1, "DDEF 1,1") #Canal 1, RTheta
+                orden += "3, 4" #SNAP? 3, 4
+            return self._lockin.query_ascii_values(orden, separator=",")
+
+    def auto_scale(self, debug=False, sup_threshold=1, inf_threshold=0.1):
         """
         Ajusta automáticamente la escala del Lock-in para optimizar la medición de la magnitud R.
 
-        Espera un número determinado de constantes de tiempo antes de cada lectura para asegurar estabilidad.
+        Con una lectura válida salta directamente a la escala más sensible que contiene a R. Si hay
+        sobrecarga (bits de salida/filtro de LIAS?) la lectura no sirve para predecir y se biseca el
+        rango de escalas todavía posible. Antes de cada lectura espera `settling_time()`, que depende
+        de la constante de tiempo y de la pendiente del filtro.
+
+        Args:
+            debug (bool, optional): Si es True imprime cada paso. Default: False.
+            sup_threshold (float, optional): Fracción de la escala por encima de la cual se considera
+                sobrecarga. Default: 1.
+            inf_threshold (float, optional): Fracción de la escala por debajo de la cual se baja la
+                escala. Default: 0.1.
 
         Returns:
             tuple:
                 - r (float): Valor final de magnitud R medido.
                 - tita (float): Valor de ángulo θ correspondiente.
+
+        Side Effects:
+            Guarda en `self.auto_scale_report` un diccionario con la cantidad de lecturas ('pasos'),
+            el tiempo total en segundos ('tiempo') y el índice de escala final ('escala').
         """
-        debug = True
-        sup_theshold = 1
-        inf_threshold = 0.1        
-        nespera = 5 # se recomienda esperar entre 3 y 5 veces el tiempo de medicion entre escalado y medicion        
-        tespera = self.time_constant_values[self.time_constant] * nespera
-        time.sleep(tespera)
-        r,tita = self.get_medicion(isXY=False)
-
-        while r < self.scale_values[self.scale] * inf_threshold and self.scale > 0:
-            if debug:
-                print('Valor por debajo de threshold, bajo escala (r=%g, oldscale=%g)'%(r,self.scale_values[self.scale]))
-            self.scale -= 1
-            self.set_scale(self.scale)
-            time.sleep(tespera) # esperar N * el tiempo de integracion antes de medir
-            r,tita = self.get_medicion(isXY=False)
-
-        while r > self.scale_values[self.scale] * sup_theshold and self.scale < (len(self.scale_values)-1):
-            if debug:
-                print('Overloaded, subo escala (oldscale=%g)'%(self.scale_values[self.scale]))
-            self.scale += 1
-            self.set_scale(self.scale)
-            time.sleep(tespera)
-            r,tita = self.get_medicion(isXY=False)
-       
+        return _ejecutar_pasos(self._auto_scale_pasos(debug, sup_threshold, inf_threshold))
+
+    def _auto_scale_pasos(self, debug, sup_threshold, inf_threshold):
+        """Pasos de `auto_scale`: entrega cada espera y devuelve (r, tita) al terminar (ver `AsyncSR830`)."""
+        inicio = time.time()
+        tespera = self.settling_time()
+        bajo, alto = 0, len(self.scale_values) - 1
+        valida = None  # última escala en la que la lectura no estaba saturada
+        pasos = 0
+        while True:
+            self.get_overload() # limpia los flags acumulados antes de esperar
+            yield tespera
+            sobrecarga = self.get_overload()
+            r, tita = self.get_medicion(isXY=False)
+            pasos += 1
+            escala = self.scale_values[self.scale]
+
+            if sobrecarga['output'] or sobrecarga['filter'] or r > escala * sup_threshold:
+                # La lectura está saturada: la escala correcta es mayor, se biseca lo que queda
+                bajo = self.scale + 1
+                if bajo > alto:
+                    # No quedan escalas por probar: se vuelve a la última que no saturaba y se relee
+                    if valida is not None:
+                        self.set_scale(valida)
+                        self.get_overload()
+                        yield tespera
+                        r, tita = self.get_medicion(isXY=False)
+                        pasos += 1
+                        if debug:
+                            print('Sin escalas por probar, vuelvo a la última válida (r=%g, scale=%g)'
+                                  % (r, self.scale_values[valida]))
+                    break
+                nueva = (bajo + alto) // 2
+                if debug:
+                    print('Overloaded, subo escala (r=%g, oldscale=%g, newscale=%g)'
+                          % (r, escala, self.scale_values[nueva]))
+            elif r < escala * inf_threshold and self.scale > bajo:
+                # Lectura válida pero chica: se predice la escala más sensible que contiene a r
+                valida = self.scale
+                alto = self.scale - 1
+                nueva = next((i for i in range(bajo, alto + 1)
+                              if r <= self.scale_values[i] * sup_threshold), alto)
+                if debug:
+                    print('Valor por debajo de threshold, bajo escala (r=%g, oldscale=%g, newscale=%g)'
+                          % (r, escala, self.scale_values[nueva]))
+            else:
+                break
+            self.set_scale(nueva)
+
+        self.auto_scale_report = {'pasos': pasos, 'tiempo': time.time() - inicio, 'escala': self.scale}
         if debug:
-            print('Listo (r=%g, scale=%g)'%(r, self.scale_values[self.scale]))
+            print('Listo (r=%g, scale=%g, pasos=%d, tiempo=%.3g s)'
+                  % (r, self.scale_values[self.scale], pasos, self.auto_scale_report['tiempo']))
+
+        return r, tita
+
+    def buffer_config(self, sample_rate=512, loop=False, isXY=True):
+        """
+        Configura el buffer interno de datos del Lock-in y lo vacía.
+
+        El buffer guarda lo que muestran los displays CH1 y CH2, por eso también se configura el display.
+
+        Args:
+            sample_rate (float or str, optional): Frecuencia de muestreo en Hz, uno de `sample_rate_values`,
+                o 'trigger' para guardar un punto por cada flanco en la entrada TRIG IN. Default: 512.
+            loop (bool, optional): True para que al llenarse siga guardando pisando lo más viejo;
+                False para que se detenga al llenarse. Default: False.
+            isXY (bool, optional): True para guardar X/Y, False para guardar R/θ. Default: True.
+
+        Returns:
+            None
+
+        Raises:
+            ValueError: Si la frecuencia de muestreo no es una de las disponibles.
+        """
+        if sample_rate == 'trigger':
+            indice = len(self.sample_rate_values)
+        elif sample_rate in self.sample_rate_values:
+            indice = self.sample_rate_values.index(sample_rate)
+        else:
+            raise ValueError('Frecuencia de muestreo inválida: {0}. Opciones: {1} o "trigger"'.format(
+                sample_rate, self.sample_rate_values))
+        with self._lockin.batch():
+            self.set_display(isXY)
+            self._escribir('SRAT', indice, "SRAT {0}".format(indice))
+            self._escribir('SEND', int(loop), "SEND {0}".format(int(loop)))
+            self._escribir('TSTR', 0, "TSTR 0") # el disparo externo no inicia el guardado
+            self._lockin.write("REST")
+        self._buffer_rate = None if sample_rate == 'trigger' else sample_rate
+        self._buffer_isXY = isXY
+
+    def buffer_start(self):
+        """Inicia (o reanuda) el guardado de datos en el buffer."""
+        self._lockin.write("STRT")
+
+    def buffer_pause(self):
+        """Pausa el guardado de datos. El contenido del buffer se conserva."""
+        self._lockin.write("PAUS")
+
+    def buffer_reset(self):
+        """Vacía el buffer. Si estaba guardando, queda en pausa."""
+        self._lockin.write("REST")
+
+    def buffer_points(self):
+        """
+        Consulta cuántos puntos hay guardados en el buffer.
+
+        Returns:
+            int: Cantidad de puntos por canal.
+        """
+        return int(self._lockin.query_ascii_values("SPTS?")[0])
+
+    def buffer_read(self, start=0, count=None, formato='TRCB'):
+        """
+        Lee un bloque del buffer en binario para ambos canales.
+
+        Args:
+            start (int, optional): Índice del primer punto (0 es el más viejo). Default: 0.
+            count (int, optional): Cantidad de puntos. Default: None (todos los guardados desde `start`).
+            formato (str, optional): 'TRCB' (float IEEE de 4 bytes) o 'TRCL' (formato interno
+                del Lock-in, mantisa y exponente de 16 bits). Default: 'TRCB'.
+
+        Returns:
+            numpy.ndarray: Array de forma (2, count) con los canales CH1 y CH2 del display.
+        """
+        if count is None:
+            count = self.buffer_points() - start
+        data = np.empty((2, count))
+        if count <= 0:
+            return data
+        for canal in (1, 2):
+            orden = "{0}? {1},{2},{3}".format(formato, canal, start, count)
+            if formato == 'TRCB':
+                data[canal - 1] = self._lockin.query_binary_values(orden, datatype='f', is_big_endian=False,
+                                                                   header_fmt='empty', data_points=count,
+                                                                   expect_termination=False, container=np.array)
+            elif formato == 'TRCL':
+                self._lockin.write(orden)
+                crudo = np.frombuffer(self._lockin.read_bytes(4 * count), dtype='<i2').reshape(-1, 2)
+                # valor = mantisa * 2^(exponente - 124)
+                data[canal - 1] = np.ldexp(crudo[:, 0].astype(float), crudo[:, 1].astype(int) - 124)
+            else:
+                raise ValueError("formato debe ser 'TRCB' o 'TRCL'")
+        return data
+
+    def _decodificar_buffer(self, data, start):
+        """Convierte un bloque (CH1, CH2) del buffer en un diccionario con X, Y, R y θ."""
+        if self._buffer_isXY:
+            x, y = data
+            r = np.hypot(x, y)
+            tita = np.degrees(np.arctan2(y, x))
+        else:
+            r, tita = data
+            x = r * np.cos(np.radians(tita))
+            y = r * np.sin(np.radians(tita))
+        indices = np.arange(start, start + data.shape[1])
+        t = indices / self._buffer_rate if self._buffer_rate else indices.astype(float)
+        return {'t': t, 'X': x, 'Y': y, 'R': r, 'theta': tita}
+
+    def buffer_acquire(self, n_points, sample_rate=512, isXY=True, formato='TRCB'):
+        """
+        Adquiere `n_points` puntos con el reloj interno del Lock-in y los lee al final.
+
+        Args:
+            n_points (int): Cantidad de puntos (como máximo `buffer_size`).
+            sample_rate (float, optional): Frecuencia de muestreo en Hz (ver `buffer_config`). Default: 512.
+            isXY (bool, optional): True para guardar X/Y, False para R/θ. Default: True.
+            formato (str, optional): 'TRCB' o 'TRCL' (ver `buffer_read`). Default: 'TRCB'.
+
+        Returns:
+            dict: Arrays 't' (tiempo desde el inicio en s), 'X', 'Y', 'R' y 'theta' (en grados).
+
+        Raises:
+            ValueError: Si se piden más puntos de los que entran en el buffer.
+        """
+        return _ejecutar_pasos(self._buffer_acquire_pasos(n_points, sample_rate, isXY, formato))
+
+    def _buffer_acquire_pasos(self, n_points, sample_rate, isXY, formato):
+        """Pasos de `buffer_acquire`: entrega cada espera y devuelve el bloque adquirido."""
+        if n_points > self.buffer_size:
+            raise ValueError('El buffer guarda hasta {0} puntos; usar buffer_stream'.format(self.buffer_size))
+        self.buffer_config(sample_rate=sample_rate, loop=False, isXY=isXY)
+        self.buffer_start()
+        if self._buffer_rate:
+            yield n_points / self._buffer_rate
+        while self.buffer_points() < n_points:
+            yield 0.05
+        self.buffer_pause()
+        return self._decodificar_buffer(self.buffer_read(0, n_points, formato), 0)
+
+    def buffer_stream(self, sample_rate=512, chunk=512, n_points=None, isXY=True, formato='TRCB'):
+        """
+        Adquiere en forma continua con el reloj interno, leyendo bloques mientras el Lock-in sigue guardando.
+
+        Cuando el buffer se llena se vacía y se reinicia: cada tramo de hasta `buffer_size` puntos es un
+        segmento con temporización exacta, y `t0` indica la hora (time.time()) de inicio del segmento.
+
+        Args:
+            sample_rate (float or str, optional): Frecuencia de muestreo en Hz o 'trigger'. Default: 512.
+            chunk (int, optional): Puntos por bloque leído. Default: 512.
+            n_points (int, optional): Total de puntos a adquirir. None para seguir indefinidamente. Default: None.
+            isXY (bool, optional): True para guardar X/Y, False para R/θ. Default: True.
+            formato (str, optional): 'TRCB' o 'TRCL' (ver `buffer_read`). Default: 'TRCB'.
+
+        Yields:
+            dict: Arrays 't', 'X', 'Y', 'R' y 'theta' del bloque, más 'segment' (número de segmento)
+                y 't0' (inicio del segmento).
+        """
+        return _iterar_pasos(self._buffer_stream_pasos(sample_rate, chunk, n_points, isXY, formato))
+
+    def _buffer_stream_pasos(self, sample_rate, chunk, n_points, isXY, formato):
+        """Pasos de `buffer_stream`: entrega (espera, None) para cada espera y (None, bloque) para cada bloque."""
+        self.buffer_config(sample_rate=sample_rate, loop=False, isXY=isXY)
+        espera = chunk / self._buffer_rate if self._buffer_rate else 0.05
+        total = 0
+        segmento = 0
+        leidos = 0
+        t0 = time.time()
+        self.buffer_start()
+        try:
+            while n_points is None or total < n_points:
+                guardados = self.buffer_points()
+                nuevos = guardados - leidos
+                if n_points is not None:
+                    nuevos = min(nuevos, n_points - total)
+                completo = guardados >= self.buffer_size or (n_points is not None and total + nuevos >= n_points)
+                if nuevos < chunk and not completo:
+                    yield espera * (chunk - nuevos) / chunk, None
+                    continue
+                bloque = self._decodificar_buffer(self.buffer_read(leidos, nuevos, formato), leidos)
+                bloque['segment'] = segmento
+                bloque['t0'] = t0
+                leidos += nuevos
+                total += nuevos
+                if leidos >= self.buffer_size:
+                    # Buffer lleno: se reinicia en un nuevo segmento
+                    self.buffer_reset()
+                    t0 = time.time()
+                    self.buffer_start()
+                    segmento += 1
+                    leidos = 0
+                yield None, bloque
+        finally:
+            self.buffer_pause()
 
-        return r, tita
\ No newline at end of file
@@ -5,40 +5,94 @@ Manual P (web): https://github.com/diegoshalom/labosdf/blob/master/manuales/AFG3
 """
 
 
+import hashlib
 import time
 
 import numpy as np
-import pyvisa
+
+from .sessions import get_pool
+
+
+def quantize_waveform(waveform, normalize=True):
+    """
+    Convierte una forma de onda al rango del DAC de 14 bits del generador (0 a 16382).
+
+    Args:
+        waveform (array_like): Muestras de un período de la forma de onda.
+        normalize (bool, optional): True para estirar el mínimo y el máximo de la señal a todo el rango;
+            False para interpretar las muestras como valores entre -1 y 1. Default: True.
+
+    Returns:
+        numpy.ndarray: Array de uint16 listo para transferir.
+    """
+    waveform = np.asarray(waveform, dtype=float)
+    if normalize:
+        minimo, maximo = waveform.min(), waveform.max()
+        escala = (waveform - minimo) / (maximo - minimo) if maximo > minimo else np.full_like(waveform, 0.5)
+    else:
+        escala = (np.clip(waveform, -1, 1) + 1) / 2
+    return np.rint(escala * AFG3021B.dac_max).astype(np.uint16)
+
 
 class AFG3021B:
+
+    dac_max = 16382 # valor máximo de las formas de onda arbitrarias
+
+    waveform_points = (2, 65536) # largo mínimo y máximo de las formas de onda arbitrarias
+
+    user_slots = ('USER1', 'USER2', 'USER3', 'USER4')
+
+    # Fuente de disparo (TRIG:SOUR) de cada modo de barrido. El equipo solo tiene TIMer y EXTernal:
+    # en 'MAN' se deja EXT sin nada conectado y cada barrido lo dispara el comando TRIG (trigger_sweep)
+    _fuentes_disparo = {'AUTO': None, 'TIM': 'TIM', 'EXT': 'EXT', 'MAN': 'EXT'}
     
-    def __init__(self, name='USB0::0x0699::0x0346::C034165::INSTR'):
+    def __init__(self, name='USB0::0x0699::0x0346::C034165::INSTR', pool=None):
         """
     Inicializa la conexión con el generador de funciones Tektronix AFG3021B y activa la salida.
 
     Args:
         name (str, optional): Dirección del recurso VISA del generador. Default: puerto USB con ID genérico.
+        pool (SessionPool, optional): Pool de sesiones a usar. Default: None (el del proceso).
 
     Side Effects:
         - Establece conexión VISA.
         - Activa la salida del canal 1.
         - Imprime la identificación del dispositivo.
     """
-        self._generador = pyvisa.ResourceManager().open_resource(name)
-        print(self._generador.query('*IDN?'))
+        self._pool = pool if pool is not None else get_pool()
+        self._direccion = name
+        self._generador = self._pool.acquire(name, separator=';:', max_length=256)
+        print(self._pool.idn(name))
         
         #Activa la salida
         self._generador.write('OUTPut1:STATe on')
+
+        # Lo que se sabe del equipo se comparte con los demás AFG3021B que usan la misma sesión
+        self._compartido = self._pool.state(name)
+
+        # Parámetros del último barrido configurado con set_sweep
+        self._compartido.setdefault('sweep', None)
+
+        # Hash de la forma de onda cargada en cada memoria USER, en orden de uso (la última es la más reciente)
+        self._slots = self._compartido.setdefault('slots', {})
         # self.setFrequency(1000)
         
     def __del__(self):
         """
-    Cierra la conexión con el generador de funciones al destruir el objeto.
+    Devuelve la conexión con el generador de funciones al pool al destruir el objeto.
 
     Side Effects:
-        - Libera el recurso VISA asociado.
+        - La sesión VISA queda abierta en el pool para reutilizarla.
     """
-        self._generador.close()
+        self._pool.release(self._direccion)
+
+    @property
+    def _sweep(self):
+        return self._compartido['sweep']
+
+    @_sweep.setter
+    def _sweep(self, sweep):
+        self._compartido['sweep'] = sweep
         
     def setFrequency(self, freq):
         """
@@ -75,15 +129,12 @@ class AFG3021B:
         
     def getAmplitude(self):
         """
-    Configura la amplitud de la señal de salida.
-
-    Args:
-        ampl (float): Valor de amplitud deseado en voltios pico a pico (Vpp).
+    Consulta la amplitud actualmente configurada en el generador.
 
     Returns:
-        None
+        list[float]: Lista con la amplitud actual en voltios pico a pico (Vpp).
     """
-        return self._generador.query_ascii_values('FREQ?')
+        return self._generador.query_ascii_values('VOLT?')
     
     def setFunction(self,func):
         """
@@ -104,6 +155,200 @@ class AFG3021B:
     """
         return self._generador.write(f'FUNC {func}')
 
+    def load_waveform(self, waveform, normalize=True, select=True):
+        """
+        Carga una forma de onda arbitraria en una memoria USER1–USER4 y opcionalmente la selecciona.
+
+        Las muestras se cuantizan al rango del DAC y se transfieren en un único bloque binario
+        IEEE 488.2 a la memoria de edición (EMEMory), que luego se copia a una memoria USER.
+        Se recuerda qué forma de onda hay en cada memoria: si ya estaba cargada no se vuelve a
+        transferir. Cuando las cuatro memorias están ocupadas se reemplaza la usada hace más tiempo.
+
+        Args:
+            waveform (array_like): Muestras de un período (entre 2 y 65536 puntos).
+            normalize (bool, optional): Ver `quantize_waveform`. Default: True.
+            select (bool, optional): True para dejarla como función de salida (FUNC USERn). Default: True.
+
+        Returns:
+            str: Memoria donde quedó la forma de onda ('USER1' a 'USER4').
+
+        Raises:
+            ValueError: Si la forma de onda no es unidimensional o su largo está fuera de rango.
+        """
+        waveform = np.asarray(waveform, dtype=float)
+        minimo, maximo = self.waveform_points
+        if waveform.ndim != 1 or not minimo <= len(waveform) <= maximo:
+            raise ValueError('waveform debe ser un array de entre {0} y {1} puntos'.format(minimo, maximo))
+        datos = quantize_waveform(waveform, normalize)
+        clave = hashlib.sha1(datos.tobytes()).hexdigest()
+
+        slot = next((slot for slot, hash_ in self._slots.items() if hash_ == clave), None)
+        if slot is None:
+            libres = [slot for slot in self.user_slots if slot not in self._slots]
+            slot = libres[0] if libres else next(iter(self._slots))
+            self._generador.write('DATA:DEF EMEM,{0}'.format(len(datos)))
+            self._generador.write_binary_values('DATA:DATA EMEM,', datos, datatype='H', is_big_endian=True)
+            self._generador.write('DATA:COPY {0},EMEM'.format(slot))
+        # Se reinserta para mantener el orden de uso
+        self._slots.pop(slot, None)
+        self._slots[slot] = clave
 
+        if select:
+            self.setFunction(slot)
+        return slot
 
+    def forget_waveforms(self):
+        """
+        Olvida qué formas de onda hay en las memorias USER, para forzar que se vuelvan a cargar.
+
+        Usar si las memorias se modificaron desde el panel frontal o desde otro programa.
+
+        Returns:
+            None
+        """
+        self._slots.clear()
+
+    def set_sweep(self, start, stop, sweep_time, spacing='LIN', hold_time=0, return_time=1e-3,
+                  trigger='AUTO', trigger_interval=None):
+        """
+        Configura un barrido de frecuencia hecho por el propio generador (subsistema SWEep).
+
+        Durante el barrido no hay comunicación con la computadora. Usar `sweep_frequency` para
+        saber qué frecuencia había en cada instante y alinear los datos adquiridos.
+
+        Args:
+            start (float): Frecuencia inicial en Hz.
+            stop (float): Frecuencia final en Hz.
+            sweep_time (float): Duración del barrido en segundos.
+            spacing (str, optional): 'LIN' (lineal) o 'LOG' (logarítmico). Default: 'LIN'.
+            hold_time (float, optional): Tiempo que se mantiene la frecuencia final, en segundos. Default: 0.
+            return_time (float, optional): Tiempo de retorno a la frecuencia inicial, en segundos. Default: 1e-3.
+            trigger (str, optional): Cómo se inicia cada barrido:
+                'AUTO' → se repite continuamente
+                'TIM' → cada `trigger_interval` segundos
+                'EXT' → con un flanco en la entrada de disparo externa
+                'MAN' → con `trigger_sweep()`
+                Default: 'AUTO'.
+            trigger_interval (float, optional): Intervalo entre barridos con trigger 'TIM'. Default: None.
+
+        Returns:
+            None
+
+        Raises:
+            ValueError: Si el espaciado o el disparo no son válidos, o si con trigger 'TIM' no se
+                indica `trigger_interval`.
+        """
+        spacing = spacing.upper()
+        trigger = trigger.upper()
+        if spacing not in ('LIN', 'LOG'):
+            raise ValueError("spacing debe ser 'LIN' o 'LOG'")
+        if trigger not in self._fuentes_disparo:
+            raise ValueError("trigger debe ser 'AUTO', 'TIM', 'EXT' o 'MAN'")
+        if trigger == 'TIM' and trigger_interval is None:
+            raise ValueError("trigger 'TIM' requiere trigger_interval")
+        with self._generador.batch():
+            self._generador.write('FREQ:MODE SWE')
+            self._generador.write(f'FREQ:STAR {start}')
+            self._generador.write(f'FREQ:STOP {stop}')
+            self._generador.write(f'SWE:SPAC {spacing}')
+            self._generador.write(f'SWE:TIME {sweep_time}')
+            self._generador.write(f'SWE:HTIM {hold_time}')
+            self._generador.write(f'SWE:RTIM {return_time}')
+            if trigger == 'AUTO':
+                self._generador.write('SWE:MODE AUTO')
+            else:
+                self._generador.write('SWE:MODE MAN')
+                self._generador.write('TRIG:SOUR {0}'.format(self._fuentes_disparo[trigger]))
+                if trigger == 'TIM':
+                    self._generador.write(f'TRIG:TIM {trigger_interval}')
+        self._sweep = {'start': start, 'stop': stop, 'sweep_time': sweep_time, 'spacing': spacing,
+                       'hold_time': hold_time, 'return_time': return_time, 'trigger': trigger,
+                       'trigger_interval': trigger_interval}
+
+    def trigger_sweep(self):
+        """Dispara un barrido (para trigger 'MAN', o como disparo adicional en los otros modos)."""
+        self._generador.write('TRIG')
+
+    def stop_sweep(self):
+        """Vuelve a frecuencia fija (FREQ:MODE CW)."""
+        self._generador.write('FREQ:MODE CW')
+        self._sweep = None
+
+    def sweep_frequency(self, t):
+        """
+        Calcula la frecuencia de salida en los instantes `t` del barrido configurado con `set_sweep`.
+
+        Args:
+            t (array_like): Tiempos en segundos medidos desde el disparo del barrido (o desde el
+                inicio de un ciclo en modo 'AUTO').
+
+        Returns:
+            numpy.ndarray: Frecuencia en Hz en cada instante.
+
+        Raises:
+            RuntimeError: Si no hay un barrido configurado.
+        """
+        if self._sweep is None:
+            raise RuntimeError('No hay un barrido configurado (usar set_sweep)')
+        p = self._sweep
+        t = np.asarray(t, dtype=float)
+        ciclo = p['sweep_time'] + p['hold_time'] + p['return_time']
+        if p['trigger'] == 'AUTO':
+            t = np.mod(t, ciclo)
+        elif p['trigger'] == 'TIM':
+            t = np.mod(t, max(p['trigger_interval'], ciclo))
+
+        def recorrer(desde, hasta, u):
+            if p['spacing'] == 'LOG':
+                return desde * (hasta / desde) ** u
+            return desde + (hasta - desde) * u
+
+        fin_barrido = p['sweep_time']
+        fin_espera = fin_barrido + p['hold_time']
+        u_barrido = np.clip(t / p['sweep_time'], 0, 1)
+        u_retorno = np.clip((t - fin_espera) / p['return_time'], 0, 1) if p['return_time'] > 0 else np.ones_like(t)
+        return np.select(
+            [t < 0, t < fin_barrido, t < fin_espera, t < ciclo],
+            [p['start'], recorrer(p['start'], p['stop'], u_barrido), p['stop'],
+             recorrer(p['stop'], p['start'], u_retorno)],
+            default=p['start'])
+
+    def set_modulation(self, kind, frequency, amount, shape='SIN'):
+        """
+        Activa una modulación interna de la portadora.
+
+        Args:
+            kind (str): 'FM' (frecuencia) o 'AM' (amplitud).
+            frequency (float): Frecuencia de la moduladora en Hz.
+            amount (float): Desviación en Hz para 'FM', o profundidad en % para 'AM'.
+            shape (str, optional): Forma de la moduladora ('SIN', 'SQU', 'TRI', 'RAMP', 'NRAM', 'PRN',
+                'USER1'...). Default: 'SIN'.
+
+        Returns:
+            None
+
+        Raises:
+            ValueError: Si el tipo de modulación no es válido.
+        """
+        kind = kind.upper()
+        if kind not in ('FM', 'AM'):
+            raise ValueError("kind debe ser 'FM' o 'AM'")
+        with self._generador.batch():
+            self._generador.write(f'{kind}:SOUR INT')
+            self._generador.write(f'{kind}:INT:FUNC {shape}')
+            self._generador.write(f'{kind}:INT:FREQ {frequency}')
+            self._generador.write(f'FM:DEV {amount}' if kind == 'FM' else f'AM:DEPT {amount}')
+            self._generador.write(f'{kind}:STAT ON')
+
+    def disable_modulation(self, kind):
+        """
+        Desactiva la modulación indicada.
+
+        Args:
+            kind (str): 'FM' o 'AM'.
+
+        Returns:
+            None
+        """
+        self._generador.write(f'{kind.upper()}:STAT OFF')
 
@@ -4,50 +4,84 @@ Manual U (web): https://github.com/diegoshalom/labosdf/blob/master/manuales/TDS1
 Manual P (web): https://github.com/diegoshalom/labosdf/blob/master/manuales/TDS1000%20programming_manual.pdf
 """
 
-from matplotlib import pyplot as plt
+import threading
+import time
+
 import numpy as np
-import pyvisa
+from .buffers import RingBuffer
+from .demodulation import dominant_frequency
+from .sessions import get_pool
 
 class TDS1002B:
     """Clase para el manejo osciloscopio TDS2000 usando PyVISA de interfaz"""
+
+    # Mediciones que el equipo calcula internamente (MEASU:...:TYP)
+    measurement_types = {'vpp': 'PK2', 'frequency': 'FREQ', 'period': 'PERI', 'mean': 'MEAN',
+                         'rms': 'CRM', 'min': 'MINI', 'max': 'MAXI'}
+    # Mediciones que solo se pueden calcular a partir de las curvas
+    host_measurement_types = ('phase',)
+    # Cantidad de mediciones configurables en pantalla (MEASU:MEAS1..4)
+    measurement_slots = 4
     
-    def __init__(self, name):
+    def __init__(self, name, pool=None):
         """
         Inicializa el osciloscopio Tektronix TDS1002B mediante VISA y configura parámetros básicos de adquisición.
 
         Args:
             name (str): Dirección del recurso VISA del osciloscopio (ej. "USB0::0x0699::0x0363::C102223::INSTR").
+            pool (SessionPool, optional): Pool de sesiones a usar. Default: None (el del proceso).
 
         Raises:
             VISAIOError: Si no se puede establecer la conexión con el equipo.
         """
-        self._osci = pyvisa.ResourceManager().open_resource(name)
-        print(self._osci.query("*IDN?"))
-
-    	#Configuración de curva
-        
-        # Modo de transmision: Binario positivo.
-        self._osci.write('DAT:ENC RPB') 
-        # 1 byte de dato. Con RPB 127 es la mitad de la pantalla
-        self._osci.write('DAT:WID 1')
-        # La curva mandada inicia en el primer dato
-        self._osci.write("DAT:STAR 1") 
-        # La curva mandada finaliza en el último dato
-        self._osci.write("DAT:STOP 2500") 
-
-        #Adquisición por sampleo
-        self._osci.write("ACQ:MOD SAMP")
-				
-        #Bloquea el control del osciloscopio
-        self._osci.write("LOC")
+        self._pool = pool if pool is not None else get_pool()
+        self._direccion = name
+        self._osci = self._pool.acquire(name, separator=';:', max_length=1024)
+        print(self._pool.idn(name))
+
+        # Lo que se sabe del equipo se comparte con los demás TDS1002B que usan la misma sesión
+        self._compartido = self._pool.state(name)
+        # Preámbulos (xze, xin, yze, ymu, yoff) por canal. Se invalidan al cambiar escalas.
+        self._preambulos = self._compartido.setdefault('preambulos', {})
+        # Canal seleccionado como fuente de datos (DAT:SOU) y canales ya habilitados en pantalla
+        self._compartido.setdefault('fuente', None)
+        self._canales_activos = self._compartido.setdefault('canales_activos', set())
+        # Medición configurada en cada slot MEASU:MEASn, como (tipo, canal)
+        self._medidas = self._compartido.setdefault('medidas', {})
+
+        with self._osci.batch():
+            #Configuración de curva: binario positivo (RPB), 1 byte, los 2500 puntos
+            self.set_transfer(start=1, stop=2500, stride=1, width=1)
+
+            #Adquisición por sampleo
+            self._osci.write("ACQ:MOD SAMP")
+
+            #Bloquea el control del osciloscopio
+            self._osci.write("LOC")
     	
     def __del__(self):
         """
-        Cierra la conexión con el osciloscopio al eliminar el objeto.
+        Devuelve la conexión con el osciloscopio al pool al eliminar el objeto.
 
-        Esta función se invoca automáticamente. Libera el recurso VISA.
+        Esta función se invoca automáticamente. La sesión VISA queda abierta en el pool para reutilizarla.
         """
-        self._osci.close()			
+        self._pool.release(self._direccion)			
+
+    @property
+    def _fuente(self):
+        return self._compartido['fuente']
+
+    @_fuente.setter
+    def _fuente(self, channel):
+        self._compartido['fuente'] = channel
+
+    @property
+    def _transfer(self):
+        return self._compartido['transfer']
+
+    @_transfer.setter
+    def _transfer(self, transfer):
+        self._compartido['transfer'] = transfer
 
     def config(self):
         """
@@ -58,9 +92,10 @@ class TDS1002B:
         Returns:
             None
         """
-        self.set_channel(channel=1, scale=20e-3)
-        self.set_channel(channel=2, scale=20e-3)
-        self.set_time(scale=1e-3, zero=0)
+        with self._osci.batch():
+            self.set_channel(channel=1, scale=20e-3)
+            self.set_channel(channel=2, scale=20e-3)
+            self.set_time(scale=1e-3, zero=0)
 
     def unlock(self):
         """
@@ -87,8 +122,10 @@ class TDS1002B:
     	    #coup = "DC"
     	#self._osci.write("CH{0}:COUP ".format(canal) + coup) #Acoplamiento DC
     	#self._osci.write("CH{0}:PROB 
-        self._osci.write("CH{0}:SCA {1}".format(channel, scale))
-        self._osci.write("CH{0}:POS {1}".format(channel, zero))
+        with self._osci.batch():
+            self._osci.write("CH{0}:SCA {1}".format(channel, scale))
+            self._osci.write("CH{0}:POS {1}".format(channel, zero))
+        self._preambulos.pop(channel, None)
 	
     def get_channel(self, channel):
         """
@@ -113,8 +150,10 @@ class TDS1002B:
         Returns:
             None
         """
-        self._osci.write("HOR:SCA {0}".format(scale))
-        self._osci.write("HOR:POS {0}".format(zero))	
+        with self._osci.batch():
+            self._osci.write("HOR:SCA {0}".format(scale))
+            self._osci.write("HOR:POS {0}".format(zero))
+        self._preambulos.clear()	
 	
     def get_time(self):
         """
@@ -125,6 +164,132 @@ class TDS1002B:
         """
         return self._osci.query("HOR?")
 	
+    def set_transfer(self, start=1, stop=2500, stride=1, width=1):
+        """
+        Configura la porción de la curva que se transfiere y su codificación.
+
+        Solo se transfieren los puntos entre `start` y `stop`, lo que reduce el tiempo de cada
+        lectura cuando interesa una ventana alrededor del disparo.
+
+        Args:
+            start (int, optional): Primer punto a transferir (1 a 2500). Default: 1.
+            stop (int, optional): Último punto a transferir (1 a 2500). Default: 2500.
+            stride (int, optional): Se conserva un punto cada `stride`. El TDS1002B no permite
+                diezmar en el equipo, así que se aplica al recibir la curva. Default: 1.
+            width (int, optional): Bytes por punto: 1 (uint8) o 2 (uint16, necesario para
+                aprovechar la resolución de ACQ:MOD AVE). Default: 1.
+
+        Returns:
+            None
+
+        Raises:
+            ValueError: Si la ventana, el paso o el ancho no son válidos.
+        """
+        if not 1 <= start <= stop <= 2500:
+            raise ValueError('Ventana inválida: se requiere 1 <= start <= stop <= 2500')
+        if stride < 1:
+            raise ValueError('stride debe ser mayor o igual a 1')
+        if width not in (1, 2):
+            raise ValueError('width debe ser 1 o 2')
+        # Modo de transmision: Binario positivo. Con 1 byte, 127 es la mitad de la pantalla
+        with self._osci.batch():
+            self._osci.write('DAT:ENC RPB')
+            self._osci.write('DAT:WID {0}'.format(width))
+            self._osci.write('DAT:STAR {0}'.format(start))
+            self._osci.write('DAT:STOP {0}'.format(stop))
+        self._transfer = {'start': int(start), 'stop': int(stop), 'stride': int(stride), 'width': int(width)}
+        self._preambulos.clear()
+
+    def get_transfer(self):
+        """
+        Devuelve la configuración de transferencia de curvas.
+
+        Returns:
+            dict: Claves 'start', 'stop', 'stride' y 'width' (ver `set_transfer`).
+        """
+        return dict(self._transfer)
+
+    def set_acquisition(self, mode='SAMP', averages=None):
+        """
+        Configura el modo de adquisición.
+
+        Args:
+            mode (str, optional): 'SAMP' (sampleo), 'PEAK' (detección de picos) o 'AVE' (promedio). Default: 'SAMP'.
+            averages (int, optional): Cantidad de promedios en modo 'AVE' (4, 16, 64 o 128). Default: None.
+
+        Returns:
+            None
+        """
+        with self._osci.batch():
+            self._osci.write('ACQ:MOD {0}'.format(mode))
+            if averages is not None:
+                self._osci.write('ACQ:NUMAV {0}'.format(averages))
+        self._preambulos.clear()
+
+    def refresh_preamble(self, channel=None):
+        """
+        Descarta los preámbulos guardados para que se vuelvan a consultar en la próxima lectura.
+
+        Usar si la escala se modificó por fuera de `set_channel`/`set_time` (por ejemplo con `write`).
+
+        Args:
+            channel (int, optional): Canal a invalidar. Si es None se invalidan todos. Default: None.
+
+        Returns:
+            None
+        """
+        if channel is None:
+            self._preambulos.clear()
+        else:
+            self._preambulos.pop(channel, None)
+
+    def get_preamble(self, channel):
+        """
+        Devuelve el preámbulo de escalado del canal, consultándolo al equipo solo si no está guardado.
+
+        Args:
+            channel (int): Número de canal (1 o 2).
+
+        Returns:
+            tuple: (xze, xin, yze, ymu, yoff)
+                - xze: tiempo del primer punto transferido (según la ventana de `set_transfer`)
+                - xin: intervalo entre puntos transferidos (incluye el `stride`)
+                - yze: cero vertical
+                - ymu: factor de escala vertical
+                - yoff: offset vertical
+        """
+        if channel not in self._preambulos:
+            # Selecciona el canal y pide el preámbulo en una sola transacción
+            xze, xin, yze, ymu, yoff = self._osci.query_ascii_values(
+                'DAT:SOU CH{0};:WFMPRE:XZE?;XIN?;YZE?;YMU?;YOFF?;'.format(channel), separator=';')
+            self._fuente = channel
+            # XZE corresponde al primer punto del registro: se corre al inicio de la ventana
+            xze += (self._transfer['start'] - 1) * xin
+            xin *= self._transfer['stride']
+            self._preambulos[channel] = (xze, xin, yze, ymu, yoff)
+        return self._preambulos[channel]
+
+    def _habilitar(self, channel):
+        """Hace aparecer el canal en pantalla, solo la primera vez que se lo usa."""
+        if channel not in self._canales_activos:
+            self._osci.write("SEL:CH{0} ON".format(channel))
+            self._canales_activos.add(channel)
+
+    def _curva(self, channel):
+        """Pide la curva cruda del canal, seleccionándolo como fuente en la misma transacción si hace falta."""
+        orden = 'CURV?'
+        if self._fuente != channel:
+            orden = 'DAT:SOU CH{0};:CURV?'.format(channel)
+            self._fuente = channel
+        # Con container=np.array PyVISA devuelve una vista (np.frombuffer) sobre los bytes recibidos
+        if self._transfer['width'] == 1:
+            curva = self._osci.query_binary_values(orden, datatype='B', container=np.array)
+        else:
+            curva = self._osci.query_binary_values(orden, datatype='H', is_big_endian=True,
+                                                   container=np.array)
+        stride = self._transfer['stride']
+        return curva[::stride] if stride > 1 else curva
+
     def read_data(self, channel):
         """
         Adquiere una forma de onda del canal especificado y la devuelve como arrays de tiempo y voltaje.
@@ -143,20 +308,107 @@ class TDS1002B:
             VISAIOError: Si ocurre un problema de comunicación con el equipo.
         """
         # Hace aparecer el canal en pantalla. Por si no está habilitado
-        self._osci.write("SEL:CH{0} ON".format(channel)) 
-        # Selecciona el canal
-        self._osci.write("DAT:SOU CH{0}".format(channel)) 
-    	#xze primer punto de la waveform
-    	#xin intervalo de sampleo
-    	#ymu factor de escala vertical
-    	#yoff offset vertical
-        xze, xin, yze, ymu, yoff = self._osci.query_ascii_values('WFMPRE:XZE?;XIN?;YZE?;YMU?;YOFF?;', 
-                                                                 separator=';') 
-        data = (self._osci.query_binary_values('CURV?', datatype='B', 
-                                               container=np.array) - yoff) * ymu + yze        
+        self._habilitar(channel)
+        xze, xin, yze, ymu, yoff = self.get_preamble(channel)
+        data = (self._curva(channel) - yoff) * ymu + yze
         tiempo = xze + np.arange(len(data)) * xin
         return tiempo, data
+
+    def read_raw(self, channel):
+        """
+        Adquiere una forma de onda del canal sin convertirla, para guardarla o procesarla después.
+
+        Args:
+            channel (int): Número de canal (1 o 2).
+
+        Returns:
+            WaveformFrame: Curva cruda con su preámbulo y el tiempo de adquisición.
+        """
+        self._habilitar(channel)
+        preambulo = self.get_preamble(channel)
+        return WaveformFrame(0, time.time(), self._curva(channel), preambulo)
+
+    def read_channels(self, channels=(1, 2), detener=True):
+        """
+        Adquiere las formas de onda de varios canales de una misma adquisición.
+
+        Detiene la adquisición (ACQ:STATE STOP) para que todas las curvas correspondan al mismo
+        disparo, las lee usando los preámbulos guardados y vuelve a poner el equipo en RUN.
+
+        Args:
+            channels (tuple of int, optional): Canales a leer. Default: (1, 2).
+            detener (bool, optional): Si es False no se detiene la adquisición, y las curvas pueden
+                provenir de disparos distintos. Default: True.
+
+        Returns:
+            tuple:
+                - tiempo (numpy.ndarray): Array de tiempos, común a todos los canales.
+                - data (numpy.ndarray): Array de forma (len(channels), N) con los voltajes de cada canal.
+
+        Raises:
+            ValueError: Si no se indica ningún canal.
+        """
+        channels = tuple(channels)
+        if not channels:
+            raise ValueError('Se requiere al menos un canal')
+        with self._osci.batch():
+            for channel in channels:
+                self._habilitar(channel)
+            preambulos = [self.get_preamble(channel) for channel in channels]
+
+        try:
+            # La orden de detener viaja en el mismo mensaje que el primer CURV?
+            with self._osci.batch():
+                if detener:
+                    self._osci.write("ACQ:STATE STOP")
+                data = None
+                for fila, (channel, (xze, xin, yze, ymu, yoff)) in enumerate(zip(channels, preambulos)):
+                    curva = self._curva(channel)
+                    if data is None:
+                        data = np.empty((len(channels), len(curva)))
+                    np.subtract(curva, yoff, out=data[fila])
+                    data[fila] *= ymu
+                    data[fila] += yze
+        finally:
+            if detener:
+                self._osci.write("ACQ:STATE RUN")
+
+        xze, xin = preambulos[0][:2]
+        tiempo = xze + np.arange(data.shape[1]) * xin
+        return tiempo, data
     
+    def stream(self, channel=1, capacity=64, n_frames=None, backpressure='overwrite'):
+        """
+        Crea una adquisición continua del canal sobre un buffer circular de curvas crudas.
+
+        Las curvas se guardan como enteros crudos en un buffer de tamaño fijo, por lo que la memoria
+        se mantiene constante durante toda la captura. Cada iteración entrega un `WaveformFrame` que
+        apunta al buffer sin copiar; la conversión a voltios se hace solo si se pide.
+
+        La lectura no está libre de reservas de memoria: PyVISA no permite leer sobre un buffer
+        existente, así que cada curva llega en un bloque de bytes nuevo (del que `_curva` toma una
+        vista, sin convertirla) y se copia a su lugar en el buffer circular.
+
+        ⚠️ Mientras el stream está activo no usar otros métodos del osciloscopio.
+
+        Args:
+            channel (int, optional): Canal a adquirir (1 o 2). Default: 1.
+            capacity (int, optional): Cantidad de curvas que entran en el buffer. Default: 64.
+            n_frames (int, optional): Cantidad de curvas a adquirir. None para adquirir hasta `stop()`. Default: None.
+            backpressure (str, optional): Política del buffer lleno ('overwrite', 'drop' o 'block').
+                Ver `RingBuffer`. Default: 'overwrite'.
+
+        Returns:
+            TDS1002BStream: Iterador de curvas. Usar como context manager o llamar a `stop()` al terminar.
+
+        Example:
+            with osci.stream(channel=1, n_frames=1000) as s:
+                for frame in s:
+                    picos.append(frame.raw.max())
+            print(s.overruns, s.dropped)
+        """
+        return TDS1002BStream(self, channel, capacity, n_frames, backpressure)
+
     def get_range(self, channel):
         """
         Devuelve el rango de voltaje de la señal visible del canal especificado.
@@ -167,10 +419,244 @@ class TDS1002B:
         Returns:
             numpy.ndarray: Array con los valores mínimo y máximo de voltaje del canal.
         """
-        xze, xin, yze, ymu, yoff = self._osci.query_ascii_values('WFMPRE:XZE?;XIN?;YZE?;YMU?;YOFF?;', 
-                                                                 separator=';')         
-        rango = (np.array((0, 255))-yoff)*ymu +yze
-        return rango   
+        xze, xin, yze, ymu, yoff = self.get_preamble(channel)
+        rango = (np.array((0, 256 ** self._transfer['width'] - 1))-yoff)*ymu +yze
+        return rango
+
+    def configure_measurements(self, specs):
+        """
+        Asigna mediciones a los slots MEASU:MEAS1..4 del equipo. Solo reconfigura los slots que cambian.
+
+        Args:
+            specs (sequence of tuple): Hasta 4 pares (tipo, canal), con tipo en `measurement_types`
+                (por ejemplo [('vpp', 1), ('vpp', 2), ('frequency', 1)]).
+
+        Returns:
+            None
+
+        Raises:
+            ValueError: Si hay más de 4 mediciones o un tipo no soportado por el equipo.
+        """
+        specs = [tuple(spec) for spec in specs]
+        if len(specs) > self.measurement_slots:
+            raise ValueError('El equipo tiene {0} slots de medición'.format(self.measurement_slots))
+        with self._osci.batch():
+            for slot, (tipo, canal) in enumerate(specs, start=1):
+                if tipo not in self.measurement_types:
+                    raise ValueError('Medición no soportada por el equipo: {0}'.format(tipo))
+                if self._medidas.get(slot) != (tipo, canal):
+                    self._osci.write('MEASU:MEAS{0}:SOU CH{1};TYP {2}'.format(
+                        slot, canal, self.measurement_types[tipo]))
+                    self._medidas[slot] = (tipo, canal)
+
+    def measure(self, specs=(('vpp', 1), ('vpp', 2)), mode='auto'):
+        """
+        Obtiene mediciones escalares de los canales sin transferir curvas, si es posible.
+
+        En modo 'scalar' las mediciones las calcula el osciloscopio: las primeras 4 se asignan a los
+        slots MEASU:MEAS1..4 (configurados una sola vez) y el resto se piden con MEASU:IMM, todo en
+        una única consulta. En modo 'trace' se adquieren los canales con `read_channels` y se calculan
+        en la computadora. En modo 'auto' se usa 'scalar' salvo que alguna medición requiera las curvas.
+
+        Args:
+            specs (sequence of tuple, optional): Pares (tipo, canal). Tipos: 'vpp', 'frequency',
+                'period', 'mean', 'rms', 'min', 'max' y 'phase' (fase en grados del canal respecto
+                del canal 1, solo con curvas). 'rms' es el RMS de ciclo (CRM) en ambos modos: en
+                'trace' se calcula sobre el mayor número entero de períodos del registro.
+                Default: (('vpp', 1), ('vpp', 2)).
+            mode (str, optional): 'auto', 'scalar' o 'trace'. Default: 'auto'.
+
+        Returns:
+            dict: Valor de cada medición, indexado por (tipo, canal). Las mediciones que el equipo
+                no puede calcular (por ejemplo frecuencia sin señal) se devuelven como NaN.
+
+        Raises:
+            ValueError: Si el modo no es válido o se piden en modo 'scalar' mediciones que requieren curvas.
+        """
+        specs = [tuple(spec) for spec in specs]
+        requiere_curvas = any(tipo in self.host_measurement_types for tipo, canal in specs)
+        if mode == 'auto':
+            mode = 'trace' if requiere_curvas else 'scalar'
+        if mode == 'scalar':
+            if requiere_curvas:
+                raise ValueError('Las mediciones {0} requieren curvas'.format(self.host_measurement_types))
+            return self._medir_en_equipo(specs)
+        if mode == 'trace':
+            return self._medir_en_host(specs)
+        raise ValueError("mode debe ser 'auto', 'scalar' o 'trace'")
+
+    def _medir_en_equipo(self, specs):
+        """Pide todas las mediciones en una sola consulta usando los slots y MEASU:IMM."""
+        en_slots = specs[:self.measurement_slots]
+        ordenes = ['MEASU:MEAS{0}:VAL?'.format(slot) for slot in range(1, len(en_slots) + 1)]
+        for tipo, canal in specs[self.measurement_slots:]:
+            if tipo not in self.measurement_types:
+                raise ValueError('Medición no soportada por el equipo: {0}'.format(tipo))
+            ordenes.append('MEASU:IMM:SOU CH{0};TYP {1};VAL?'.format(canal, self.measurement_types[tipo]))
+        # Si cambia la asignación de slots, los comandos viajan junto con la consulta
+        with self._osci.batch():
+            self.configure_measurements(en_slots)
+            valores = self._osci.query_ascii_values(';:'.join(ordenes), separator=';', container=np.array)
+        # El equipo devuelve 9.9E37 cuando no puede calcular la medición
+        valores[np.abs(valores) >= 9.9e37] = np.nan
+        return dict(zip(specs, valores))
+
+    def _medir_en_host(self, specs):
+        """Adquiere los canales involucrados en una sola adquisición y calcula las mediciones."""
+        canales = sorted({canal for tipo, canal in specs} |
+                         ({1} if any(tipo == 'phase' for tipo, canal in specs) else set()))
+        tiempo, data = self.read_channels(canales)
+        fila = {canal: i for i, canal in enumerate(canales)}
+        dt = tiempo[1] - tiempo[0]
+
+        # Frecuencia dominante de cada canal por FFT con interpolación parabólica del pico
+        frecuencia = dominant_frequency(data, dt)
+
+        def ciclos(i):
+            # Como CRM del equipo: el RMS se toma sobre un número entero de períodos, así no depende
+            # del ancho de la ventana. Con menos de un período se usa el registro completo.
+            periodos = np.floor(len(data[i]) * dt * frecuencia[i]) if np.isfinite(frecuencia[i]) else 0
+            if periodos < 1:
+                return data[i]
+            return data[i][:int(round(periodos / (frecuencia[i] * dt)))]
+
+        calculos = {
+            'vpp': lambda i: data[i].max() - data[i].min(),
+            'min': lambda i: data[i].min(),
+            'max': lambda i: data[i].max(),
+            'mean': lambda i: data[i].mean(),
+            'rms': lambda i: np.sqrt(np.mean(ciclos(i) ** 2)),
+            'frequency': lambda i: frecuencia[i],
+            'period': lambda i: 1 / frecuencia[i],
+        }
+        resultado = {}
+        for tipo, canal in specs:
+            if tipo == 'phase':
+                # Proyección de ambos canales (sin su continua) sobre la frecuencia del canal 1
+                base = np.exp(-2j * np.pi * frecuencia[fila[1]] * tiempo)
+                alterna = data - data.mean(axis=1, keepdims=True)
+                fase = np.angle(np.dot(alterna[fila[canal]], base) / np.dot(alterna[fila[1]], base), deg=True)
+                resultado[(tipo, canal)] = fase
+            elif tipo in calculos:
+                resultado[(tipo, canal)] = calculos[tipo](fila[canal])
+            else:
+                raise ValueError('Medición desconocida: {0}'.format(tipo))
+        return resultado
+
+
+class WaveformFrame:
+    """Curva cruda adquirida por `TDS1002B.stream`, con conversión a voltios diferida."""
+
+    __slots__ = ('index', 'timestamp', 'raw', 'preamble')
+
+    def __init__(self, index, timestamp, raw, preamble):
+        self.index = index
+        self.timestamp = timestamp
+        self.raw = raw
+        self.preamble = preamble
+
+    def volts(self, out=None):
+        """
+        Convierte la curva cruda a voltios.
+
+        Args:
+            out (numpy.ndarray, optional): Array de floats donde escribir el resultado, para no reservar memoria.
+
+        Returns:
+            numpy.ndarray: Voltajes de la curva.
+        """
+        xze, xin, yze, ymu, yoff = self.preamble
+        out = np.subtract(self.raw, yoff, out=out, dtype=float)
+        out *= ymu
+        out += yze
+        return out
+
+    def tiempo(self):
+        """
+        Devuelve el eje temporal de la curva.
+
+        Returns:
+            numpy.ndarray: Tiempos de cada punto.
+        """
+        xze, xin = self.preamble[:2]
+        return xze + np.arange(len(self.raw)) * xin
+
+    def copy(self):
+        """Devuelve una copia independiente del buffer circular."""
+        return WaveformFrame(self.index, self.timestamp, self.raw.copy(), self.preamble)
+
+
+class TDS1002BStream:
+    """Adquisición continua del osciloscopio en un hilo aparte, consumida como iterador."""
+
+    def __init__(self, osci, channel, capacity, n_frames, backpressure):
+        self._osci = osci
+        self.channel = channel
+        self.n_frames = n_frames
+        self.buffer = RingBuffer(capacity, policy=backpressure)
+        self._detener = threading.Event()
+        self._error = None
+        self._hilo = None
+        self.preamble = None
+
+    def start(self):
+        """Empieza a adquirir. Se llama automáticamente al iterar o al entrar al bloque `with`."""
+        if self._hilo is None:
+            self._osci._habilitar(self.channel)
+            self.preamble = self._osci.get_preamble(self.channel)
+            self._hilo = threading.Thread(target=self._adquirir, daemon=True)
+            self._hilo.start()
+        return self
+
+    def stop(self):
+        """Detiene la adquisición y espera a que termine el hilo."""
+        self._detener.set()
+        self.buffer.close()
+        if self._hilo is not None:
+            self._hilo.join()
+
+    def _adquirir(self):
+        try:
+            adquiridas = 0
+            while not self._detener.is_set() and (self.n_frames is None or adquiridas < self.n_frames):
+                self.buffer.push(self._osci._curva(self.channel), time.time())
+                adquiridas += 1
+        except Exception as error:
+            self._error = error
+        finally:
+            self.buffer.close()
+
+    def __iter__(self):
+        self.start()
+        try:
+            while True:
+                registro = self.buffer.pop()
+                if registro is None:
+                    break
+                yield WaveformFrame(registro[0], registro[1], registro[2], self.preamble)
+        finally:
+            # Un `break` o una excepción en el bucle del consumidor también detienen la adquisición
+            self.stop()
+        if self._error is not None:
+            raise self._error
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
 
+    @property
+    def overruns(self):
+        """Curvas pisadas en el buffer antes de que el consumidor las leyera."""
+        return self.buffer.overruns
 
+    @property
+    def dropped(self):
+        """Curvas descartadas por buffer lleno (política 'drop' o 'block')."""
+        return self.buffer.dropped
 
+    @property
+    def acquired(self):
+        """Cantidad total de curvas guardadas en el buffer."""
+        return self.buffer.written
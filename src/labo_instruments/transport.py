@@ -0,0 +1,186 @@
+"""
+Capa de transporte SCPI compartida por todos los controladores.
+
+Envuelve un recurso de PyVISA y permite agrupar varios comandos en un solo mensaje, de modo que
+una reconfiguración completa pague la latencia del bus unas pocas veces en lugar de una por comando.
+"""
+
+import threading
+from contextlib import contextmanager
+
+from . import instrumentation
+
+
+class _EstadoLote(threading.local):
+    """Lote en armado de cada hilo: los comandos de un hilo nunca se mezclan con los de otro."""
+
+    def __init__(self):
+        self.pendientes = []
+        self.avisos = []  # función a llamar cuando se envíe cada comando pendiente (o None)
+        self.lotes = 0
+        self.opc = False
+
+
+class SCPITransport:
+    """Recurso VISA con agrupamiento de comandos (`batch`)."""
+
+    def __init__(self, resource, separator=';:', max_length=256):
+        """
+        Envuelve un recurso abierto con PyVISA.
+
+        Args:
+            resource (pyvisa.resources.Resource): Recurso abierto.
+            separator (str, optional): Separador entre comandos de un mismo mensaje. ';:' para equipos
+                SCPI con árbol de comandos (cada comando vuelve a la raíz); ';' para equipos como el
+                SR830 que no tienen jerarquía. Default: ';:'.
+            max_length (int, optional): Largo máximo de cada mensaje, según el buffer de entrada del
+                equipo. Default: 256.
+        """
+        self.resource = resource
+        self.separator = separator
+        self.max_length = max_length
+        self._estado = _EstadoLote()
+        self._lock = threading.RLock()  # una transacción por vez aunque la sesión se use desde varios hilos
+        self.monitor = None  # IOMonitor propio; si es None se usa instrumentation.default_monitor
+
+    def __getattr__(self, nombre):
+        # Todo lo que no se redefine aquí (timeout, close, read, resource_name, ...) va al recurso
+        if nombre == 'resource':
+            raise AttributeError(nombre)
+        return getattr(self.resource, nombre)
+
+    def _io(self, operacion, orden, *args, **kwargs):
+        """
+        Llama al método `operacion` del recurso, de a una transacción por vez, registrándola si hay
+        un monitor activo.
+        """
+        funcion = getattr(self.resource, operacion)
+        monitor = self.monitor if self.monitor is not None else instrumentation.default_monitor
+        with self._lock:
+            if monitor is None:
+                return funcion(*args, **kwargs) if orden is None else funcion(orden, *args, **kwargs)
+            return instrumentation.timed(monitor, self, operacion, funcion, orden, *args, **kwargs)
+
+    def _unir(self, ordenes):
+        mensaje = ordenes[0]
+        for orden in ordenes[1:]:
+            # Los comandos comunes (*CLS, *OPC?) no llevan ':' inicial
+            mensaje += (';' if orden.startswith('*') else self.separator) + orden
+        return mensaje
+
+    def _agrupar(self, ordenes):
+        """Reparte los comandos en mensajes que no superan `max_length`."""
+        mensajes = []
+        actual = []
+        for orden in ordenes:
+            if actual and len(self._unir(actual + [orden])) > self.max_length:
+                mensajes.append(actual)
+                actual = []
+            actual.append(orden)
+        if actual:
+            mensajes.append(actual)
+        return mensajes
+
+    @staticmethod
+    def _avisar(avisos):
+        for aviso in avisos:
+            if aviso is not None:
+                aviso()
+
+    def _consulta(self, operacion, consulta, *args, **kwargs):
+        """Hace la consulta, agregando los últimos comandos pendientes como prefijo si entran."""
+        estado = self._estado
+        if not estado.pendientes:
+            return self._io(operacion, consulta, *args, **kwargs)
+        mensajes = self._agrupar(estado.pendientes + [consulta])
+        avisos, estado.pendientes, estado.avisos = estado.avisos, [], []
+        for mensaje in mensajes[:-1]:
+            self._io('write', self._unir(mensaje))
+        respuesta = self._io(operacion, self._unir(mensajes[-1]), *args, **kwargs)
+        self._avisar(avisos)
+        return respuesta
+
+    def flush(self):
+        """Envía los comandos pendientes del lote actual."""
+        estado = self._estado
+        pendientes, avisos = estado.pendientes, estado.avisos
+        estado.pendientes, estado.avisos = [], []
+        for mensaje in self._agrupar(pendientes):
+            self._io('write', self._unir(mensaje))
+        self._avisar(avisos)
+
+    @contextmanager
+    def batch(self, opc=False):
+        """
+        Agrupa los comandos escritos dentro del bloque en la menor cantidad de mensajes posible.
+
+        Los comandos se envían al salir del bloque, o antes si dentro del bloque se hace una consulta
+        (en ese caso viajan en el mismo mensaje que la consulta). Los bloques se pueden anidar: los
+        comandos se envían al salir del bloque exterior. Cada hilo arma su propio lote.
+
+        Si el bloque termina con una excepción, se descartan los comandos que escribió y que todavía
+        no se enviaron, para que no llegue al equipo una configuración a medias.
+
+        Args:
+            opc (bool, optional): True para terminar con *OPC? y esperar a que el equipo complete
+                todos los comandos. En un bloque anidado se aplica al salir del bloque exterior. Default: False.
+
+        Example:
+            with transporte.batch():
+                transporte.write('CH1:SCA 0.1')
+                transporte.write('CH1:POS 0')
+        """
+        estado = self._estado
+        desde = len(estado.pendientes)
+        estado.lotes += 1
+        estado.opc = estado.opc or opc
+        try:
+            yield self
+        except BaseException:
+            del estado.pendientes[desde:]
+            del estado.avisos[desde:]
+            estado.lotes -= 1
+            if estado.lotes == 0:
+                estado.opc = False
+            raise
+        estado.lotes -= 1
+        if estado.lotes == 0:
+            opc, estado.opc = estado.opc, False
+            if opc:
+                self.query('*OPC?')
+            else:
+                self.flush()
+
+    def write(self, orden, on_sent=None):
+        """
+        Escribe un comando, o lo deja pendiente si hay un lote en armado.
+
+        Args:
+            orden (str): Comando.
+            on_sent (callable, optional): Función sin argumentos a llamar cuando el comando se haya
+                enviado sin errores. No se llama si el comando se descarta o el envío falla. Default: None.
+        """
+        estado = self._estado
+        if estado.lotes:
+            estado.pendientes.append(orden)
+            estado.avisos.append(on_sent)
+        else:
+            self._io('write', orden)
+            self._avisar([on_sent])
+
+    def query(self, orden, *args, **kwargs):
+        return self._consulta('query', orden, *args, **kwargs)
+
+    def query_ascii_values(self, orden, *args, **kwargs):
+        return self._consulta('query_ascii_values', orden, *args, **kwargs)
+
+    def query_binary_values(self, orden, *args, **kwargs):
+        return self._consulta('query_binary_values', orden, *args, **kwargs)
+
+    def write_binary_values(self, orden, *args, **kwargs):
+        self.flush()
+        return self._io('write_binary_values', orden, *args, **kwargs)
+
+    def read_bytes(self, *args, **kwargs):
+        self.flush()
+        return self._io('read_bytes', None, *args, **kwargs)
@@ -0,0 +1,285 @@
+"""
+Archivo de curvas del osciloscopio sobre disco mapeado en memoria.
+
+Las curvas crudas (enteros tal como llegan del TDS1002B) se agregan al final de un archivo binario
+que nunca se reescribe, y un índice de registros de tamaño fijo guarda la posición de cada curva,
+su canal, el tiempo de adquisición y el preámbulo (XZE, XIN, YZE, YMU, YOFF). Agregar una curva
+cuesta lo mismo sin importar el tamaño del archivo, y leerlas devuelve vistas sobre el mapa de
+memoria: la conversión a voltios se hace solo cuando se pide. Cada registro del índice se escribe
+a disco apenas se agrega su curva, así un lector en modo 'r' ve las curvas que otro proceso va
+agregando.
+
+Ejemplo:
+    with WaveformArchive('capturas') as archivo:
+        with osci.stream(channel=1, n_frames=5000) as s:
+            for frame in s:
+                archivo.append_frame(frame, channel=1)
+
+    archivo = WaveformArchive('capturas', mode='r')
+    elegidas = archivo.select(start=t0, stop=t0 + 60, channel=1)
+    v = archivo.volts(elegidas)  # array (len(elegidas), N)
+"""
+
+import os
+import time
+
+import numpy as np
+
+from .tektronix_tds1002b import WaveformFrame
+
+# Registro del índice, uno por curva
+index_dtype = np.dtype([('offset', '<i8'), ('length', '<i4'), ('format', 'S3'), ('channel', 'i1'),
+                        ('time', '<f8'), ('xze', '<f8'), ('xin', '<f8'), ('yze', '<f8'),
+                        ('ymu', '<f8'), ('yoff', '<f8')])
+
+# Tipos de curva admitidos y cómo se guardan (little endian, sin importar la máquina)
+_formatos = {'u1': np.dtype('u1'), 'u2': np.dtype('<u2'), 'i1': np.dtype('i1'), 'i2': np.dtype('<i2')}
+
+_curvas = 'curves.bin'
+_indice = 'index.bin'
+
+
+class WaveformArchive:
+    """Curvas crudas en un archivo de solo agregado, con índice de tiempos y preámbulos."""
+
+    def __init__(self, path, mode='a'):
+        """
+        Abre (o crea) el archivo de curvas.
+
+        Args:
+            path (str): Directorio del archivo.
+            mode (str, optional): 'a' para agregar y leer, 'r' solo lectura. Default: 'a'.
+
+        Raises:
+            ValueError: Si el modo no es válido.
+            FileNotFoundError: Si se abre en modo 'r' un archivo que no existe.
+        """
+        if mode not in ('a', 'r'):
+            raise ValueError("mode debe ser 'a' o 'r'")
+        self.path = path
+        self.mode = mode
+        if mode == 'a':
+            os.makedirs(path, exist_ok=True)
+        elif not os.path.exists(os.path.join(path, _indice)):
+            raise FileNotFoundError(os.path.join(path, _indice))
+        ruta_indice = os.path.join(path, _indice)
+        ruta_curvas = os.path.join(path, _curvas)
+        # Un corte durante una escritura puede dejar un registro incompleto al final: se descarta
+        self._n = os.path.getsize(ruta_indice) // index_dtype.itemsize if os.path.exists(ruta_indice) else 0
+        self._fin = os.path.getsize(ruta_curvas) if os.path.exists(ruta_curvas) else 0
+        if mode == 'a':
+            if os.path.exists(ruta_indice):
+                os.truncate(ruta_indice, self._n * index_dtype.itemsize)
+            self._archivo_curvas = open(ruta_curvas, 'ab')
+            self._archivo_indice = open(ruta_indice, 'ab')
+        else:
+            self._archivo_curvas = self._archivo_indice = None
+        self._mapa_curvas = None
+        self._mapa_indice = None
+
+    def __len__(self):
+        self._releer()
+        return self._n
+
+    def _releer(self):
+        """En modo 'r', incorpora los registros que otro proceso agregó al índice desde la última lectura."""
+        if self.mode == 'r':
+            self._n = os.path.getsize(os.path.join(self.path, _indice)) // index_dtype.itemsize
+
+    def append(self, raw, preamble, timestamp=None, channel=0):
+        """
+        Agrega una curva cruda al final del archivo.
+
+        Args:
+            raw (array_like): Curva cruda (enteros de 1 o 2 bytes, como los devuelve el osciloscopio).
+            preamble (tuple): (xze, xin, yze, ymu, yoff) de la curva (ver `TDS1002B.get_preamble`).
+            timestamp (float, optional): Tiempo de adquisición (epoch en segundos). Default: None (ahora).
+            channel (int, optional): Canal de la curva. Default: 0.
+
+        Returns:
+            int: Posición de la curva en el archivo.
+
+        Raises:
+            ValueError: Si el archivo es de solo lectura o la curva no es de enteros de 1 o 2 bytes.
+        """
+        if self._archivo_curvas is None:
+            raise ValueError('Archivo abierto en modo solo lectura')
+        raw = np.asarray(raw)
+        clave = '{0}{1}'.format(raw.dtype.kind, raw.dtype.itemsize)
+        if clave not in _formatos:
+            raise ValueError('Tipo de curva no soportado: {0}'.format(raw.dtype))
+        datos = raw.astype(_formatos[clave], copy=False).tobytes()
+        self._archivo_curvas.write(datos)
+        registro = np.array([(self._fin, raw.size, clave, channel, time.time() if timestamp is None else timestamp)
+                             + tuple(float(p) for p in preamble)], dtype=index_dtype)
+        # La curva se escribe antes que su registro: el índice nunca apunta a datos que no están.
+        # El registro va a disco enseguida, para los lectores y para no quedar atrás tras un corte
+        self._archivo_curvas.flush()
+        self._archivo_indice.write(registro.tobytes())
+        self._archivo_indice.flush()
+        self._fin += len(datos)
+        self._n += 1
+        return self._n - 1
+
+    def append_frame(self, frame, channel=0):
+        """
+        Agrega una curva de `TDS1002B.stream` o `TDS1002B.read_raw`.
+
+        Args:
+            frame (WaveformFrame): Curva a guardar.
+            channel (int, optional): Canal de la curva. Default: 0.
+
+        Returns:
+            int: Posición de la curva en el archivo.
+        """
+        return self.append(frame.raw, frame.preamble, frame.timestamp, channel)
+
+    def flush(self):
+        """Escribe a disco lo que quede en los buffers de los archivos."""
+        if self._archivo_curvas is not None:
+            self._archivo_curvas.flush()
+            self._archivo_indice.flush()
+
+    def _mapas(self):
+        """Mapas en memoria del índice y las curvas, renovados si el archivo creció desde el último uso."""
+        self._releer()
+        if self._mapa_indice is None or len(self._mapa_indice) != self._n:
+            self.flush()
+            if self._n == 0:
+                self._mapa_indice = np.zeros(0, dtype=index_dtype)
+                self._mapa_curvas = np.zeros(0, dtype=np.uint8)
+            else:
+                self._mapa_indice = np.memmap(os.path.join(self.path, _indice), dtype=index_dtype,
+                                              mode='r', shape=(self._n,))
+                self._mapa_curvas = np.memmap(os.path.join(self.path, _curvas), dtype=np.uint8, mode='r')
+        return self._mapa_indice, self._mapa_curvas
+
+    @property
+    def index(self):
+        """Índice completo como array estructurado de solo lectura (ver `index_dtype`)."""
+        return self._mapas()[0]
+
+    def raw(self, i):
+        """
+        Devuelve la curva cruda `i` como vista sobre el archivo, sin copiarla.
+
+        Args:
+            i (int): Posición de la curva.
+
+        Returns:
+            numpy.ndarray: Curva cruda.
+        """
+        indice, curvas = self._mapas()
+        registro = indice[i]
+        formato = _formatos[registro['format'].decode()]
+        inicio = int(registro['offset'])
+        return curvas[inicio:inicio + int(registro['length']) * formato.itemsize].view(formato)
+
+    def __getitem__(self, i):
+        """
+        Devuelve la curva `i` como `WaveformFrame` (vista sobre el archivo, con su preámbulo).
+
+        Args:
+            i (int): Posición de la curva.
+
+        Returns:
+            WaveformFrame: Curva con `raw`, `timestamp` y `preamble`; `volts()` y `tiempo()` la convierten.
+        """
+        n = len(self)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError(i)
+        registro = self.index[i]
+        preambulo = tuple(float(registro[campo]) for campo in ('xze', 'xin', 'yze', 'ymu', 'yoff'))
+        return WaveformFrame(i, float(registro['time']), self.raw(i), preambulo)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def select(self, start=None, stop=None, channel=None):
+        """
+        Busca las curvas adquiridas en un intervalo de tiempo.
+
+        Args:
+            start (float, optional): Tiempo inicial (inclusive). Default: None (desde el principio).
+            stop (float, optional): Tiempo final (exclusive). Default: None (hasta el final).
+            channel (int, optional): Quedarse solo con este canal. Default: None.
+
+        Returns:
+            numpy.ndarray: Posiciones de las curvas, en orden de escritura.
+        """
+        indice = self.index
+        mascara = np.ones(len(indice), dtype=bool)
+        if start is not None:
+            mascara &= indice['time'] >= start
+        if stop is not None:
+            mascara &= indice['time'] < stop
+        if channel is not None:
+            mascara &= indice['channel'] == channel
+        return np.flatnonzero(mascara)
+
+    def stack(self, indices=None):
+        """
+        Devuelve varias curvas crudas como un array 2-D.
+
+        Si las curvas tienen igual largo y tipo y están una a continuación de la otra en el archivo
+        (lo habitual al guardar un solo canal), el resultado es una vista sin copia; si no, se copian.
+
+        Args:
+            indices (array_like, optional): Posiciones de las curvas. Default: None (todas).
+
+        Returns:
+            numpy.ndarray: Array de forma (len(indices), N) con las curvas crudas.
+
+        Raises:
+            ValueError: Si las curvas no tienen todas el mismo largo.
+        """
+        indice, curvas = self._mapas()
+        indices = np.arange(self._n) if indices is None else np.asarray(indices, dtype=int).ravel()
+        registros = indice[indices]
+        if len(registros) == 0:
+            return np.zeros((0, 0), dtype=np.uint8)
+        largos = registros['length']
+        formatos = registros['format']
+        if np.any(largos != largos[0]):
+            raise ValueError('Las curvas tienen distinto largo')
+        formato = _formatos[formatos[0].decode()]
+        paso = int(largos[0]) * formato.itemsize
+        if np.all(formatos == formatos[0]) and (len(registros) == 1 or np.all(np.diff(registros['offset']) == paso)):
+            inicio = int(registros['offset'][0])
+            bloque = curvas[inicio:inicio + paso * len(registros)]
+            return bloque.view(formato).reshape(len(registros), int(largos[0]))
+        return np.stack([self.raw(i) for i in indices])
+
+    def volts(self, indices=None, out=None):
+        """
+        Convierte varias curvas a voltios de una sola vez, cada una con su preámbulo.
+
+        Args:
+            indices (array_like, optional): Posiciones de las curvas. Default: None (todas).
+            out (numpy.ndarray, optional): Array de floats de forma (len(indices), N) donde escribir el resultado.
+
+        Returns:
+            numpy.ndarray: Voltajes, de forma (len(indices), N).
+        """
+        indices = np.arange(len(self)) if indices is None else np.asarray(indices, dtype=int).ravel()
+        registros = self.index[indices]
+        out = np.subtract(self.stack(indices), registros['yoff'][:, None], out=out, dtype=float)
+        out *= registros['ymu'][:, None]
+        out += registros['yze'][:, None]
+        return out
+
+    def close(self):
+        """Cierra los archivos. Las vistas ya entregadas siguen siendo válidas."""
+        if self._archivo_curvas is not None:
+            self._archivo_curvas.close()
+            self._archivo_indice.close()
+            self._archivo_curvas = self._archivo_indice = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
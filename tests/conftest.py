@@ -0,0 +1,143 @@
+import contextlib
+import io
+import struct
+
+import pytest
+import pyvisa
+
+from labo_instruments.sessions import SessionPool
+from labo_instruments.simulation import addresses, simulated_lab
+
+
+class Recurso:
+    """
+    Recurso VISA falso: registra cada transacción y contesta las consultas con `responder(mensaje)`.
+
+    Los comandos escritos también se pasan a `responder`, que puede usarlos para llevar un estado. Los
+    mensajes que agrupan varios comandos (`SCPITransport.batch`) se separan como lo haría el equipo: cada
+    comando va por separado y la consulta final, entera, es la que se contesta.
+    """
+
+    def __init__(self, resource_name, responder):
+        self.resource_name = resource_name
+        self.responder = responder
+        self.mensajes = []
+        self.timeout = 2000
+
+    @staticmethod
+    def _partir(mensaje):
+        """
+        Separa un mensaje en comandos. Un `;` solo abre un comando nuevo si lo que sigue empieza con `:`
+        o `*`, o si el comando anterior está en la raíz (no tiene `:`), como los del SR830.
+        """
+        comandos = []
+        for parte in mensaje.split(';'):
+            raiz = comandos and ':' not in comandos[-1].split(';')[-1].split(' ')[0].lstrip(':')
+            if comandos and not parte.startswith((':', '*')) and not raiz:
+                comandos[-1] += ';' + parte
+            else:
+                comandos.append(parte)
+        return comandos
+
+    def _responder(self, mensaje):
+        """Pasa los comandos al `responder` y devuelve la respuesta a la consulta del final."""
+        comandos = self._partir(mensaje)
+        consulta = next(i for i, comando in enumerate(comandos) if '?' in comando)
+        for comando in comandos[:consulta]:
+            self.responder(comando.lstrip(':'))
+        return self.responder(';'.join(comandos[consulta:]).lstrip(':'))
+
+    def write(self, mensaje):
+        self.mensajes.append(('write', mensaje))
+        for comando in self._partir(mensaje):
+            self.responder(comando.lstrip(':'))
+
+    def query(self, mensaje):
+        self.mensajes.append(('query', mensaje))
+        return str(self._responder(mensaje))
+
+    def query_ascii_values(self, mensaje, converter='f', separator=',', container=list):
+        self.mensajes.append(('query_ascii_values', mensaje))
+        respuesta = self._responder(mensaje)
+        if isinstance(respuesta, str):
+            respuesta = [float(valor) for valor in respuesta.split(separator) if valor.strip()]
+        return container(respuesta)
+
+    def query_binary_values(self, mensaje, datatype='f', is_big_endian=False, container=list,
+                            header_fmt='ieee', data_points=0, **kwargs):
+        self.mensajes.append(('query_binary_values', mensaje))
+        respuesta = self._responder(mensaje)
+        if not isinstance(respuesta, (bytes, bytearray)):
+            return container(respuesta)
+        # Bloque crudo: se decodifica como lo hace PyVISA
+        if header_fmt == 'ieee':
+            return pyvisa.util.from_ieee_block(respuesta, datatype, is_big_endian, container)
+        return pyvisa.util.from_binary_block(respuesta, 0, data_points * struct.calcsize(datatype) or None,
+                                             datatype, is_big_endian, container)
+
+    def write_binary_values(self, mensaje, values, **kwargs):
+        self.mensajes.append(('write_binary_values', mensaje))
+
+    def read_bytes(self, count, **kwargs):
+        """Devuelve `responder('read_bytes')`: el responder guarda la respuesta al escribir la consulta."""
+        self.mensajes.append(('read_bytes', count))
+        return bytes(self.responder('read_bytes'))[:count]
+
+    def close(self):
+        pass
+
+    def comandos(self):
+        """Comandos enviados, uno por elemento, sin importar cómo se agruparon en mensajes."""
+        return [parte.strip().lstrip(':') for _, mensaje in self.mensajes
+                for parte in mensaje.split(';') if parte.strip()]
+
+    def escrituras(self):
+        """Comandos que no son consultas, como los separa el equipo, aunque hayan viajado junto a una."""
+        return [comando.lstrip(':') for operacion, mensaje in self.mensajes if operacion != 'read_bytes'
+                for comando in self._partir(mensaje) if '?' not in comando]
+
+
+@pytest.fixture
+def conectar():
+    """
+    Crea un controlador sobre un `Recurso` falso, sin imprimir el *IDN?. Cada controlador usa un
+    `SessionPool` propio, así las sesiones no pasan de un test a otro.
+
+    Devuelve una función crear(clase, responder, *args, **kwargs) -> (controlador, recurso).
+    """
+    def crear(clase, responder=lambda mensaje: '0', *args, **kwargs):
+        recursos = []
+
+        class Manager:
+            def open_resource(self, nombre, **opciones):
+                recursos.append(Recurso(nombre, responder))
+                return recursos[-1]
+
+        kwargs.setdefault('pool', SessionPool(Manager()))
+        with contextlib.redirect_stdout(io.StringIO()):
+            controlador = clase('FAKE::INSTR', *args, **kwargs)
+        return controlador, recursos[0]
+    return crear
+
+
+@pytest.fixture
+def abrir():
+    """
+    Crea controladores sobre un laboratorio simulado (ver `simulated_lab`), sin imprimir el *IDN?.
+
+    Devuelve una función crear(clase, *args, **kwargs) -> controlador. Los controladores de un mismo
+    test comparten el laboratorio, así el generador excita lo que miden el osciloscopio y el Lock-in.
+    Con un envoltorio de `aio` devuelve la corrutina de `open`. El laboratorio queda en `crear.manager`.
+    """
+    manager = simulated_lab(realtime=False, seed=0)
+    pool = SessionPool(manager)
+
+    def crear(clase, *args, **kwargs):
+        driver = getattr(clase, 'driver_class', None)
+        if driver is not None:
+            return clase.open(addresses[driver.__name__], *args, pool=pool, **kwargs)
+        with contextlib.redirect_stdout(io.StringIO()):
+            return clase(addresses[clase.__name__], *args, pool=pool, **kwargs)
+    crear.manager = manager
+    yield crear
+    pool.close()
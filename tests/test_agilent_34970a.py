@@ -0,0 +1,235 @@
+import datetime
+import queue
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from labo_instruments import AGILENT34970A, AGILENT34970AService
+from labo_instruments.agilent_34970a import parse_readings, reading_dtype
+
+
+class Multiplexor:
+    """
+    34970A falso: después de INIT, cada DATA:POINTS? encuentra `paso` barridos más en memoria, hasta TRIG:COUNT.
+
+    La lectura del canal c en el barrido k vale 1000·k + c y se toma en el segundo k.
+    """
+
+    def __init__(self, paso=3):
+        self.paso = paso
+        self.canales = ()
+        self.cuenta = 1
+        self.barridos = 0
+        self.corriendo = False
+        self.memoria = []
+
+    def __call__(self, mensaje):
+        if mensaje.startswith('ROUTE:SCAN'):
+            self.canales = [int(canal) for canal in mensaje[len('ROUTE:SCAN (@'):-1].split(',')]
+        elif mensaje.startswith('TRIG:COUNT'):
+            argumento = mensaje.split()[1]
+            self.cuenta = float('inf') if argumento == 'INF' else int(argumento)
+        elif mensaje == 'INIT':
+            self.corriendo = True
+        elif mensaje == 'ABORT':
+            self.corriendo = False
+        elif mensaje == 'DATA:POINTS?':
+            for _ in range(self.paso):
+                if self.corriendo and self.barridos < self.cuenta:
+                    self.memoria += [(1000 * self.barridos + canal, self.barridos, canal) for canal in self.canales]
+                    self.barridos += 1
+            return str(len(self.memoria))
+        elif mensaje == 'SYST:LFR?':
+            return '60'
+        elif mensaje.startswith('DATA:REMOVE?'):
+            n = int(mensaje.split()[1])
+            assert n <= len(self.memoria)
+            leidas, self.memoria = self.memoria[:n], self.memoria[n:]
+            return ','.join('%g,2024,5,1,12,0,%d,%d' % lectura for lectura in leidas)
+        return '0'
+
+
+@pytest.fixture
+def mux(conectar, monkeypatch):
+    monkeypatch.setattr(time, 'sleep', lambda segundos: None)
+    return conectar(AGILENT34970A, Multiplexor(), scanInterval=0.5, channelDelay=0, channelsList=(101, 102, 103))
+
+
+def test_scan_blocks_lee_la_cantidad_pedida_en_bloques(mux):
+    mux, recurso = mux
+    bloques = list(mux.scan_blocks(n_scans=7, max_scans_per_block=2))
+    assert [len(bloque) for bloque in bloques] == [6, 6, 6, 3]
+    registros = np.concatenate(bloques)
+    barrido = np.repeat(np.arange(7), 3)
+    np.testing.assert_array_equal(registros['chan'], np.tile([101, 102, 103], 7))
+    np.testing.assert_array_equal(registros['value'], 1000 * barrido + registros['chan'])
+    np.testing.assert_allclose(np.diff(registros['time']), np.diff(barrido))
+
+    escrituras = recurso.escrituras()
+    assert escrituras[-6:] == ['TRIG:SOURCE TIMER', 'TRIG:TIMER 0.5', 'TRIG:COUNT 7', 'INIT',
+                               'ABORT', 'TRIG:COUNT 1']
+
+
+def test_scan_blocks_detiene_los_barridos_al_cortar_el_for(mux):
+    mux, recurso = mux
+    for i, bloque in enumerate(mux.scan_blocks()):
+        if i == 2:
+            break
+    assert 'TRIG:COUNT INF' in recurso.escrituras()
+    assert recurso.escrituras()[-2:] == ['ABORT', 'TRIG:COUNT 1']
+
+
+
+
+def test_scan_blocks_termina_con_el_evento_stop(conectar):
+    mux, recurso = conectar(AGILENT34970A, Multiplexor(paso=0), channelDelay=0, channelsList=(101,))
+    stop = threading.Event()
+    threading.Timer(0.05, stop.set).start()
+    inicio = time.monotonic()
+    assert list(mux.scan_blocks(poll=10, stop=stop)) == []
+    assert time.monotonic() - inicio < 1
+    assert recurso.escrituras()[-2:] == ['ABORT', 'TRIG:COUNT 1']
+
+
+def _esperar(cola, n, timeout=5):
+    barridos = []
+    limite = time.monotonic() + timeout
+    while len(barridos) < n and time.monotonic() < limite:
+        barridos.append(cola.get(timeout=timeout))
+    return barridos
+
+
+def test_service_se_puede_reiniciar(mux):
+    mux, recurso = mux
+    servicio = AGILENT34970AService(mux)
+    cola = servicio.subscribe()
+    for _ in range(2):
+        servicio.start()
+        barridos = _esperar(cola, 3)
+        servicio.stop()
+        assert len(barridos) == 3
+        assert list(barridos[0]['chan']) == [101, 102, 103]
+    assert recurso.escrituras().count('INIT') == 2
+
+
+def test_service_unsubscribe_mientras_se_reparte_a_una_cola_llena(mux):
+    mux, recurso = mux
+    servicio = AGILENT34970AService(mux)
+    llena = servicio.subscribe(maxsize=1)
+
+    def quitar_y_fallar(barrido):
+        # Otro hilo quita la cola justo cuando el reparto la encuentra llena
+        hilo = threading.Thread(target=servicio.unsubscribe, args=(llena,))
+        hilo.start()
+        hilo.join(0.1)
+        raise queue.Full
+    llena.put_nowait = quitar_y_fallar
+    cola = servicio.subscribe()
+    with servicio:
+        assert len(_esperar(cola, 3, timeout=2)) == 3
+    assert servicio.stats()['dropped'] == 0
+    assert servicio.error is None
+
+
+def test_service_stop_sin_barridos_no_se_cuelga(conectar):
+    mux, recurso = conectar(AGILENT34970A, Multiplexor(paso=0), channelDelay=0, channelsList=(101,))
+    servicio = AGILENT34970AService(mux, poll=10).start()
+    inicio = time.monotonic()
+    servicio.stop()
+    assert time.monotonic() - inicio < 1
+
+
+def test_service_stop_propaga_el_error(mux, monkeypatch):
+    mux, recurso = mux
+
+    def falla():
+        raise RuntimeError('sin conexión')
+    monkeypatch.setattr(mux, 'readings_available', falla)
+    servicio = AGILENT34970AService(mux).start()
+    with pytest.raises(RuntimeError, match='sin conexión'):
+        servicio.stop()
+    assert isinstance(servicio.error, RuntimeError)
+
+    # Dentro de un with, el error del hilo no tapa la excepción del bloque
+    with pytest.raises(KeyError):
+        with AGILENT34970AService(mux) as servicio:
+            servicio._hilos[0].join()
+            raise KeyError('del bloque')
+    assert isinstance(servicio.error, RuntimeError)
+
+
+def test_config_channels_aplica_el_perfil(mux):
+    mux, recurso = mux
+    inicio = len(recurso.escrituras())
+    mux.config_channels('RES', channels=(101, 102), profile='precise', rango=1000, delay=0.05)
+    assert recurso.escrituras()[inicio:] == [
+        'CONF:RES 1000,(@101,102)', 'SENS:RES:NPLC 10,(@101,102)', 'SENS:ZERO:AUTO ON,(@101,102)',
+        'ROUT:CHAN:DELAY 0.05,(@101,102)', 'ROUTE:SCAN (@101,102,103)']
+    assert mux.channelSettings[102] == {'nplc': 10, 'autozero': 'ON', 'delay': 0.05, 'function': 'RES',
+                                        'rango': 1000, 'profile': 'precise'}
+
+    inicio = len(recurso.escrituras())
+    mux.config_channels('VOLT:AC', channels=(103,), profile='fast')
+    assert not any('NPLC' in mensaje for mensaje in recurso.escrituras()[inicio:])
+    with pytest.raises(ValueError):
+        mux.config_channels(profile='lento')
+
+
+def test_estimate_scan_time_usa_la_frecuencia_de_linea(mux):
+    mux, recurso = mux
+    assert mux.lineFrequency == 60
+    # Sin configurar: NPLC 1 con autocero ON (dos integraciones) y channelDelay 0
+    assert mux.estimate_scan_time() == pytest.approx(3 * (2 / 60 + mux.channel_overhead))
+    mux.config_channels('VOLT:DC', profile='balanced')
+    assert mux.estimate_scan_time() == pytest.approx(3 * (1 / 60 + 0.01 + mux.channel_overhead))
+    assert mux.choose_profile(1.5) == 'precise'
+    assert mux.choose_profile(0.1) == 'balanced'
+    assert mux.choose_profile(0.02) == 'fast'
+    assert mux.choose_profile(0.001) is None
+
+
+def test_frecuencia_de_linea_explicita(conectar):
+    mux, recurso = conectar(AGILENT34970A, Multiplexor(), channelDelay=0, channelsList=(101,), lineFrequency=50)
+    assert ('query_ascii_values', 'SYST:LFR?') not in recurso.mensajes
+    assert mux.estimate_scan_time() == pytest.approx(2 / 50 + mux.channel_overhead)
+
+
+@pytest.fixture
+def horario_de_verano(monkeypatch):
+    """Hora local de Nueva York, que pasa al horario de verano el 10/3/2024 a las 2:00."""
+    monkeypatch.setenv('TZ', 'America/New_York')
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def test_parse_readings_abs_usa_la_hora_local_de_cada_lectura(horario_de_verano):
+    raw = ('+2.15E+01,2024,03,10,01,59,59.250,101,'
+           '+2.20E+01,2024,03,10,03,00,00.500,102,'
+           '+2.30E+01,2024,12,31,23,59,59.500,103')
+    lecturas = parse_readings(raw, 'ABS')
+    esperados = [datetime.datetime(2024, 3, 10, 1, 59, 59, 250000).timestamp(),
+                 datetime.datetime(2024, 3, 10, 3, 0, 0, 500000).timestamp(),
+                 datetime.datetime(2024, 12, 31, 23, 59, 59, 500000).timestamp()]
+    assert lecturas['value'] == pytest.approx([21.5, 22.0, 23.0])
+    assert list(lecturas['chan']) == [101, 102, 103]
+    # El bloque cruza el cambio de horario: entre las dos primeras lecturas pasa 1.25 s, no una hora
+    assert lecturas['time'] == pytest.approx(esperados, abs=1e-3)
+    assert lecturas['time'][1] - lecturas['time'][0] == pytest.approx(1.25)
+
+
+def test_parse_readings_rel_y_out():
+    out = np.zeros(4, dtype=reading_dtype)
+    parse_readings(b'+1.0E+00,0.000,101,+2.0E+00,0.125,102', 'REL', out=out, offset=1)
+    assert list(out['value']) == [0, 1, 2, 0]
+    assert list(out['time']) == [0, 0, 0.125, 0]
+    assert list(out['chan']) == [0, 101, 102, 0]
+    assert len(parse_readings('', 'ABS')) == 0
+
+
+def test_parse_readings_rechaza_datos_corruptos():
+    with pytest.raises(ValueError):
+        parse_readings('+1.0E+00,0.000,101,+2.0E+00,0.1#5,102', 'REL')
@@ -0,0 +1,99 @@
+import asyncio
+import threading
+import time
+
+from labo_instruments.aio import AsyncAGILENT34970A, AsyncSR830, AsyncTDS1002B
+from labo_instruments.simulation import addresses
+from labo_instruments.sr830 import SR830
+
+
+def test_equipos_distintos_corren_en_hilos_distintos(abrir):
+    hilos = set()
+
+    async def main():
+        async with await abrir(AsyncTDS1002B) as osci, await abrir(AsyncSR830) as lockin:
+            (t, v), (x, y) = await asyncio.gather(osci.read_data(1), lockin.get_medicion())
+            for controlador in (osci, lockin):
+                hilos.add(await controlador._run(lambda: threading.current_thread().name))
+            return len(v)
+
+    assert asyncio.run(main()) == 2500
+    assert len(hilos) == 2 and threading.current_thread().name not in hilos
+
+
+def test_auto_scale_espera_con_asyncio(abrir, monkeypatch):
+    esperas = []
+
+    async def dormir(segundos):
+        esperas.append(segundos)
+
+    def bloquear(segundos):
+        raise AssertionError('auto_scale durmió el hilo del equipo')
+
+    async def main():
+        async with await abrir(AsyncSR830) as lockin:
+            monkeypatch.setattr(asyncio, 'sleep', dormir)
+            monkeypatch.setattr('labo_instruments.sr830.time.sleep', bloquear)
+            await lockin.auto_scale()
+            return lockin.auto_scale_report
+
+    reporte = asyncio.run(main())
+    assert len(esperas) == reporte['pasos']
+
+
+def test_envoltorio_creado_fuera_del_event_loop(abrir):
+    lockin = AsyncSR830(abrir(SR830))
+
+    async def main():
+        # Dos operaciones a la vez: la segunda espera el lock del equipo
+        return await asyncio.gather(lockin.get_medicion(), lockin.get_medicion())
+
+    for _ in range(2):
+        assert len(asyncio.run(main())) == 2
+
+
+def test_buffer_stream_espera_con_asyncio(abrir, monkeypatch):
+    esperas = []
+    sleep = asyncio.sleep
+
+    async def dormir(segundos):
+        esperas.append(segundos)
+        await sleep(segundos)
+
+    def bloquear(segundos):
+        raise AssertionError('buffer_stream durmió el hilo del equipo')
+
+    async def main():
+        async with await abrir(AsyncSR830) as lockin:
+            monkeypatch.setattr('labo_instruments.sr830.time.sleep', bloquear)
+            return [bloque async for bloque in lockin.buffer_stream(sample_rate=512, chunk=64, n_points=128)]
+
+    monkeypatch.setattr(asyncio, 'sleep', dormir)
+    bloques = asyncio.run(main())
+    assert sum(len(bloque['X']) for bloque in bloques) == 128
+    assert esperas
+
+
+def test_cancelar_scan_blocks_corta_la_espera(abrir):
+    async def main():
+        async with await abrir(AsyncAGILENT34970A) as mux:
+            bloques = []
+
+            async def leer():
+                async for bloque in mux.scan_blocks(poll=10):
+                    bloques.append(bloque)
+            tarea = asyncio.ensure_future(leer())
+            while not bloques:
+                await asyncio.sleep(0.01)
+            # El siguiente barrido tarda: la tarea queda en la espera de poll
+            await asyncio.sleep(0.05)
+            inicio = time.monotonic()
+            tarea.cancel()
+            try:
+                await tarea
+            except asyncio.CancelledError:
+                pass
+            return time.monotonic() - inicio
+
+    assert asyncio.run(main()) < 1
+    assert abrir.manager.instruments[addresses['AGILENT34970A']].errors == []
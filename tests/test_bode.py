@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+
+from labo_instruments import AFG3021B, TDS1002B, BodeSweep
+
+
+@pytest.fixture
+def equipos(abrir):
+    generador = abrir(AFG3021B)
+    generador.setAmplitude(1)
+    return generador, abrir(TDS1002B)
+
+
+def test_barrido_sigue_al_pasabajos(equipos):
+    frecuencias = np.array([200, 1000, 5000])
+    r = BodeSweep(*equipos).run(frecuencias)
+    # Pasabajos RC de 1 kHz entre el generador y el canal 2
+    esperada = 1 / np.hypot(1, frecuencias / 1000)
+    assert r['gain'] == pytest.approx(esperada, rel=0.05)
+    assert r['phase'] == pytest.approx(-np.degrees(np.arctan(frecuencias / 1000)), abs=3)
+    assert not r['clipped'].any()
+
+
+def test_marca_los_puntos_que_quedan_saturados(equipos):
+    # La amplitud prevista ocupa 10 medias pantallas y sin reintentos: todo queda recortado
+    bode = BodeSweep(*equipos, fill=10, max_retries=0)
+    r = bode.run([500, 1000])
+    assert r['clipped'].all()
+    assert bode.report['reescalados'] == 0
@@ -0,0 +1,53 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from labo_instruments.buffers import RingBuffer
+
+
+def test_overwrite_pisa_el_mas_viejo():
+    buffer = RingBuffer(3, shape=(2,), dtype=int)
+    for i in range(5):
+        assert buffer.push(np.full(2, i))
+    assert buffer.overruns == 2
+    assert [buffer.pop(timeout=0)[2][0] for _ in range(3)] == [2, 3, 4]
+    assert buffer.pop(timeout=0) is None
+
+
+def test_drop_descarta_el_nuevo():
+    buffer = RingBuffer(2, policy='drop')
+    resultados = [buffer.push(np.array([i])) for i in range(4)]
+    assert resultados == [True, True, False, False]
+    assert buffer.dropped == 2
+    assert [buffer.pop(timeout=0)[2][0] for _ in range(2)] == [0, 1]
+
+
+def test_block_espera_al_consumidor():
+    buffer = RingBuffer(1, policy='block')
+    buffer.push(np.array([0]))
+    assert not buffer.push(np.array([1]), timeout=0.01)
+    assert buffer.dropped == 1
+
+    hilo = threading.Thread(target=buffer.push, args=(np.array([2]),))
+    hilo.start()
+    time.sleep(0.05)
+    assert hilo.is_alive()  # el productor espera lugar
+    assert buffer.pop(timeout=1)[2][0] == 0
+    assert buffer.pop(timeout=1)[2][0] == 2  # liberar el registro anterior despierta al productor
+    hilo.join(1)
+    assert not hilo.is_alive()
+
+
+def test_pop_devuelve_none_al_cerrar():
+    buffer = RingBuffer(4)
+    buffer.push(np.array([1.0]))
+    buffer.close()
+    assert buffer.pop()[2][0] == 1.0
+    assert buffer.pop() is None
+
+
+def test_politica_invalida():
+    with pytest.raises(ValueError):
+        RingBuffer(4, policy='esperar')
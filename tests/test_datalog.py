@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from labo_instruments.agilent_34970a import reading_dtype
+from labo_instruments.datalog import ChunkedLogger, available_format, read_log
+
+
+def test_bloques_de_tamanio_fijo_e_indice(tmp_path):
+    with ChunkedLogger(str(tmp_path), chunk_size=4, format='npz') as registro:
+        registros = np.zeros(6, dtype=reading_dtype)
+        registros['chan'] = [101, 102] * 3
+        registros['value'] = np.arange(6)
+        registros['time'] = 100 + np.arange(6)
+        registro.append_records('34970A', registros)
+        assert registro.rows_written == 4
+        registro.append('SR830', (1, 2), (0.5, 0.25), 106)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['chunk-000000.npz', 'chunk-000001.npz', 'index.csv']
+
+    tabla = read_log(str(tmp_path))
+    assert list(tabla['value']) == [0, 1, 2, 3, 4, 5, 0.5, 0.25]
+    assert list(tabla['instrument']) == ['34970A'] * 6 + ['SR830'] * 2
+    assert tabla['instrument'].dtype == 'category'
+
+
+def test_read_log_abre_solo_los_bloques_del_intervalo(tmp_path, monkeypatch):
+    with ChunkedLogger(str(tmp_path), chunk_size=10, format='npz') as registro:
+        registro.append('A', 1, np.arange(30), np.arange(30))
+    abiertos = []
+    monkeypatch.setattr(np, 'load', lambda ruta, _load=np.load: abiertos.append(ruta) or _load(ruta))
+    tabla = read_log(str(tmp_path), start=12, stop=15)
+    assert list(tabla['time']) == [12, 13, 14]
+    assert len(abiertos) == 1
+
+
+def test_reabrir_agrega_bloques(tmp_path):
+    for inicio in (0, 10):
+        with ChunkedLogger(str(tmp_path), format='npz') as registro:
+            registro.append('A', 1, 0, np.arange(inicio, inicio + 10))
+    assert len(read_log(str(tmp_path))) == 20
+    assert len(read_log(str(tmp_path), channels=[2])) == 0
+
+
+def test_formato_sin_motor(tmp_path):
+    with pytest.raises(ValueError):
+        ChunkedLogger(str(tmp_path), format='csv')
+    if available_format() == 'npz':
+        with pytest.raises(ValueError):
+            ChunkedLogger(str(tmp_path), format='parquet')
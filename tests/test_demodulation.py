@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from labo_instruments.demodulation import demodulate, dominant_frequency, fit_sine
+
+f = 1000.0
+t = np.arange(2500) * 4e-6  # 10 ms: 10 períodos
+amplitudes = np.array([0.5, 1.0, 2.0])
+fases = np.radians([0.0, 30.0, -120.0])
+curvas = amplitudes[:, None] * np.sin(2 * np.pi * f * t + fases[:, None]) + 0.3
+
+
+def test_fit_sine_recupera_coeficientes():
+    ajuste = fit_sine(curvas, t, f)
+    np.testing.assert_allclose(ajuste['sin'], amplitudes * np.cos(fases), atol=1e-9)
+    np.testing.assert_allclose(ajuste['cos'], amplitudes * np.sin(fases), atol=1e-9)
+    np.testing.assert_allclose(ajuste['offset'], 0.3, atol=1e-9)
+    assert ajuste['cov'].shape == (3, 3, 3)
+    # Una sola curva devuelve escalares
+    assert np.ndim(fit_sine(curvas[0], t, f)['sin']) == 0
+
+
+def test_fit_sine_por_bloques_y_frecuencias_por_curva_coinciden():
+    ruido = np.random.default_rng(0).normal(0, 0.01, curvas.shape)
+    completo = fit_sine(curvas + ruido, t, f)
+    por_bloques = fit_sine(curvas + ruido, np.tile(t, (3, 1)), np.full(3, f), chunk_size=2)
+    for clave in ('sin', 'cos', 'offset', 'sigma'):
+        np.testing.assert_allclose(por_bloques[clave], completo[clave], rtol=1e-9)
+    assert completo['sigma'] == pytest.approx(np.full(3, 0.01), rel=0.1)
+
+
+def test_demodulate_como_el_sr830():
+    salida = demodulate(curvas, t, frequency=f)
+    np.testing.assert_allclose(salida['R'], amplitudes / np.sqrt(2), rtol=1e-9)
+    np.testing.assert_allclose(salida['theta'], np.degrees(fases), atol=1e-6)
+    np.testing.assert_allclose(salida['X'], salida['R'] * np.cos(fases), atol=1e-9)
+
+
+def test_demodulate_con_referencia_medida():
+    referencia = np.sin(2 * np.pi * f * t + np.radians(45))
+    salida = demodulate(curvas, t, reference=np.tile(referencia, (3, 1)))
+    np.testing.assert_allclose(salida['f'], f, rtol=1e-3)
+    np.testing.assert_allclose(salida['theta'], np.degrees(fases) - 45, atol=0.5)
+    assert dominant_frequency(referencia, t[1] - t[0]) == pytest.approx(f, rel=1e-3)
+    with pytest.raises(ValueError):
+        demodulate(curvas, t)
+
+
+def test_demodulate_en_varios_procesos():
+    en_serie = demodulate(curvas, t, frequency=f)
+    en_paralelo = demodulate(curvas, t, frequency=f, chunk_size=1, processes=2)
+    for clave in ('X', 'Y', 'R', 'theta'):
+        np.testing.assert_allclose(en_paralelo[clave], en_serie[clave], rtol=1e-12, atol=1e-12)
@@ -0,0 +1,103 @@
+import time
+
+import numpy as np
+import pytest
+
+from labo_instruments import SR830
+from labo_instruments.frequency_sweep import FrequencySweep
+
+
+def respuesta(frecuencia):
+    """Resonancia en 1 kHz con Q = 5 y 0.5 V en el pico."""
+    return 0.5 / (1 + 5j * (frecuencia / 1000 - 1000 / frecuencia))
+
+
+class Generador:
+
+    def __init__(self):
+        self.frecuencia = None
+
+    def setFrequency(self, freq):
+        self.frecuencia = freq
+
+
+class Lockin:
+    """Lock-in falso que mide `respuesta` a la frecuencia del generador, saturando en 1.1 veces la escala."""
+
+    scale_values = SR830.scale_values
+
+    def __init__(self, generador):
+        self.generador = generador
+        self.scale = len(self.scale_values) - 1
+        self.lecturas = 0
+        self.auto_scale_report = {}
+
+    def settling_time(self):
+        return 0.005
+
+    def set_scale(self, scale_number):
+        self.scale = scale_number
+
+    def _leer(self):
+        z = respuesta(self.generador.frecuencia)
+        self.lecturas += 1
+        return min(abs(z), 1.1 * self.scale_values[self.scale]), np.degrees(np.angle(z))
+
+    def get_medicion(self, isXY=True):
+        r, tita = self._leer()
+        return [r * np.cos(np.radians(tita)), r * np.sin(np.radians(tita))] if isXY else [r, tita]
+
+    def auto_scale(self, debug=False, sup_threshold=1, inf_threshold=0.1):
+        valores = np.asarray(self.scale_values)
+        self.scale = int(np.argmax(abs(respuesta(self.generador.frecuencia)) <= valores * sup_threshold))
+        self.auto_scale_report = {'pasos': 1, 'tiempo': 0.0, 'escala': self.scale}
+        return self._leer()
+
+
+@pytest.fixture
+def esperas(monkeypatch):
+    esperas = []
+    monkeypatch.setattr(time, 'sleep', esperas.append)
+    return esperas
+
+
+@pytest.fixture
+def barrido():
+    generador = Generador()
+    return FrequencySweep(generador, Lockin(generador))
+
+
+def test_mide_la_respuesta_en_orden_creciente(barrido, esperas):
+    frecuencias = np.logspace(2, 4, 21)
+    medidas = []
+    resultado = barrido.run(frecuencias[::-1], callback=lambda i, f, x, y: medidas.append(f))
+    assert medidas == sorted(medidas)
+    np.testing.assert_allclose(resultado['frequency'], frecuencias)
+    np.testing.assert_allclose(resultado['X'] + 1j * resultado['Y'], respuesta(frecuencias))
+    np.testing.assert_allclose(resultado['theta'], np.degrees(np.angle(respuesta(frecuencias))))
+    # Cada escala usada contiene a R con el margen de sup_threshold
+    escalas = np.asarray(SR830.scale_values)[resultado['scale']]
+    assert np.all(resultado['R'] <= escalas * barrido.sup_threshold)
+    assert barrido.report['puntos'] == 21
+    np.testing.assert_allclose(esperas, np.maximum(0.005, barrido.pll_periods / frecuencias))
+
+
+def test_reescalado_reusa_la_lectura_de_auto_scale(barrido, esperas):
+    barrido.run(np.logspace(2, 4, 21))
+    # La lectura con que termina auto_scale es la del punto: no se vuelve a leer
+    assert barrido.report['reescalados'] > 0
+    assert barrido.lockin.lecturas == 21 + barrido.report['reescalados']
+
+
+def test_refinamiento_agrega_puntos_alrededor_del_pico(barrido, esperas):
+    frecuencias = np.logspace(2, 4, 21)
+    resultado = barrido.run(frecuencias, refine=2, refine_points=3)
+    f = resultado['frequency']
+    assert np.all(np.diff(f) > 0)
+    assert barrido.report['puntos'] == len(f) > 21
+    assert set(frecuencias) <= set(f)
+    nuevas = np.setdiff1d(f, frecuencias)
+    # Todas las nuevas caen entre los vecinos del pico en 1 kHz
+    assert np.all((nuevas > frecuencias[9]) & (nuevas < frecuencias[11]))
+    np.testing.assert_allclose(resultado['X'] + 1j * resultado['Y'], respuesta(f))
+    np.testing.assert_allclose(resultado['R'], np.abs(respuesta(f)))
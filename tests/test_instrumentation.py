@@ -0,0 +1,65 @@
+import threading
+
+import pytest
+
+from labo_instruments import instrumentation
+from labo_instruments.sr830 import SR830
+from labo_instruments.transport import SCPITransport
+
+
+class Timeout(Exception):
+    pass
+
+
+class RecursoLento:
+    """Recurso que no contesta las consultas, como un equipo que deja vencer el timeout."""
+
+    resource_name = 'GPIB0::9::INSTR'
+
+    def write(self, mensaje):
+        pass
+
+    def query(self, mensaje):
+        raise Timeout(mensaje)
+
+
+def test_caller_salta_metodos_auxiliares(conectar):
+    lockin, _ = conectar(SR830)
+    monitor = instrumentation.IOMonitor().attach(lockin)
+    lockin.invalidate()
+    lockin.set_scale(3)
+    assert [fila['key'] for fila in monitor.stats.summary()] == ['SR830.set_scale']
+
+
+def test_caller_del_constructor(conectar):
+    with instrumentation.IOMonitor() as monitor:
+        conectar(SR830)
+    assert 'SR830.__init__' in [fila['key'] for fila in monitor.stats.summary()]
+
+
+def test_registra_transacciones_fallidas():
+    transporte = SCPITransport(RecursoLento())
+    monitor = instrumentation.IOMonitor().attach(transporte)
+    transporte.write('FREQ 1000')
+    with pytest.raises(Timeout):
+        transporte.query('FREQ?')
+    totales = monitor.stats.by_command
+    assert totales['FREQ']['errors'] == 0
+    assert totales['FREQ?']['count'] == 1
+    assert totales['FREQ?']['errors'] == 1
+    assert monitor.recorded == 2
+
+
+def test_seen_cuenta_todas_las_transacciones_entre_hilos():
+    monitor = instrumentation.IOMonitor(sinks=[], sample_rate=0.5, seed=0)
+
+    def ofrecer():
+        for _ in range(20000):
+            monitor.sample()
+
+    hilos = [threading.Thread(target=ofrecer) for _ in range(4)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    assert monitor.seen == 80000
@@ -0,0 +1,20 @@
+import os
+import subprocess
+import sys
+
+import labo_instruments
+
+
+def test_import_no_carga_los_controladores():
+    codigo = ('import sys, labo_instruments; '
+              'print(any(m in sys.modules for m in ("numpy", "pyvisa", "labo_instruments.sr830")))')
+    entorno = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    salida = subprocess.run([sys.executable, '-c', codigo], env=entorno, check=True, capture_output=True, text=True)
+    assert salida.stdout.strip() == 'False'
+    assert salida.stderr == ''
+
+
+def test_clases_se_cargan_al_usarlas():
+    from labo_instruments.sr830 import SR830
+    assert labo_instruments.SR830 is SR830
+    assert 'AFG3021B' in dir(labo_instruments)
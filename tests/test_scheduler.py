@@ -0,0 +1,114 @@
+import threading
+import time
+
+import pytest
+
+from labo_instruments.agilent_34970a import AGILENT34970A
+from labo_instruments.scheduler import AcquisitionScheduler, interface_of
+from labo_instruments.simulation import addresses
+from labo_instruments.sr830 import SR830
+from labo_instruments.tektronix_tds1002b import TDS1002B
+
+
+class Equipo:
+    def __init__(self):
+        self.lecturas = 0
+        self.liberar = threading.Event()
+
+    def leer(self):
+        self.lecturas += 1
+        return self.lecturas
+
+    def leer_lento(self):
+        self.liberar.wait(5)
+        return 'lento'
+
+
+def test_reinicio_despues_de_stop_sin_leer_samples():
+    equipo = Equipo()
+    programa = AcquisitionScheduler()
+    programa.add_task('a', equipo, 'leer', interface='bus')
+    for _ in range(2):
+        programa.start()
+        programa.trigger()
+        time.sleep(0.05)
+        programa.stop(timeout=1)
+    # La primera ejecución dejó su registro y su fin de secuencia sin leer
+    registros = list(programa.samples(timeout=1))
+    assert [registro['values'] for registro in registros] == [{'a': 2}]
+
+
+def test_start_espera_a_la_lectura_que_no_termino():
+    equipo = Equipo()
+    programa = AcquisitionScheduler()
+    programa.add_task('lento', equipo, 'leer_lento', interface='bus lento')
+    programa.add_task('rapido', equipo, 'leer', interface='bus rapido')
+    programa.start()
+    programa.trigger('lento')
+    programa.stop(timeout=0.05)
+    # El hilo de 'bus lento' sigue en la lectura: no puede haber otro en la misma interfaz
+    with pytest.raises(RuntimeError, match='bus lento'):
+        programa.start()
+
+    equipo.liberar.set()
+    for _ in range(100):
+        try:
+            programa.start()
+            break
+        except RuntimeError:
+            time.sleep(0.01)
+    programa.trigger('rapido')
+    time.sleep(0.05)
+    programa.stop(timeout=1)
+    # El resultado de la lectura lenta llegó después de su `stop` y se descarta
+    registros = list(programa.samples(timeout=1))
+    assert [registro['values'] for registro in registros] == [{'rapido': 1}]
+
+
+def test_start_dos_veces_falla():
+    programa = AcquisitionScheduler()
+    programa.add_task('a', Equipo(), 'leer', interface='bus')
+    programa.start()
+    try:
+        with pytest.raises(RuntimeError):
+            programa.start()
+    finally:
+        programa.stop(timeout=1)
+
+
+def test_equipos_gpib_comparten_la_interfaz(abrir):
+    lockin = abrir(SR830)
+    mux = abrir(AGILENT34970A)
+    osci = abrir(TDS1002B)
+    assert interface_of(lockin) == interface_of(mux) == 'GPIB0'
+    assert interface_of(osci) == addresses['TDS1002B']
+    programa = AcquisitionScheduler()
+    programa.add_task('r', lockin, 'get_medicion')
+    programa.add_task('scan', mux, 'one_scan')
+    programa.add_task('ch1', osci, 'read_data', args=(1,))
+    assert programa.interfaces == {'GPIB0': ['r', 'scan'], addresses['TDS1002B']: ['ch1']}
+
+
+def test_stop_con_timeout_entrega_lo_completado():
+    equipo = Equipo()
+    programa = AcquisitionScheduler()
+    programa.add_task('lento', equipo, 'leer_lento', period=10, interface='bus lento')
+    programa.add_task('rapido', equipo, 'leer', period=0.05, interface='bus rapido')
+    programa.start()
+    time.sleep(0.3)
+    programa.stop(timeout=0.01)
+    equipo.liberar.set()
+    registros = list(programa.samples(timeout=1))
+    assert len(registros) == equipo.lecturas > 1
+    assert isinstance(registros[0]['errors']['lento'], TimeoutError)
+    assert [registro['values']['rapido'] for registro in registros] == list(range(1, equipo.lecturas + 1))
+    assert [registro['t'] for registro in registros] == sorted(registro['t'] for registro in registros)
+
+
+def test_no_se_arman_disparos_despues_de_stop():
+    programa = AcquisitionScheduler()
+    programa.add_task('a', Equipo(), 'leer', period=0.01, interface='bus')
+    programa.start()
+    programa.stop(timeout=1)
+    programa._disparar(['a'], programa.clock())
+    assert programa._disparos == {}
@@ -0,0 +1,115 @@
+import contextlib
+import gc
+import io
+
+import numpy as np
+
+from labo_instruments import sessions
+from labo_instruments.sessions import SessionPool
+from labo_instruments.sr830 import SR830
+from labo_instruments.tektronix_afg3021b import AFG3021B
+from labo_instruments.tektronix_tds1002b import TDS1002B
+
+from .conftest import Recurso
+
+
+class Manager:
+    """ResourceManager falso que cuenta las sesiones abiertas."""
+
+    def __init__(self):
+        self.recursos = []
+
+    def open_resource(self, nombre, **opciones):
+        self.recursos.append(Recurso(nombre, lambda mensaje: 'IDN' if mensaje == '*IDN?' else '0'))
+        return self.recursos[-1]
+
+
+def test_acquire_reutiliza_la_sesion():
+    manager = Manager()
+    pool = SessionPool(manager)
+    primera = pool.acquire('A::INSTR')
+    pool.release('A::INSTR')
+    assert pool.is_open('A::INSTR')
+    assert pool.acquire('A::INSTR') is primera
+    assert pool.acquire('B::INSTR') is not primera
+    assert len(manager.recursos) == 2
+
+
+def test_idn_se_consulta_una_vez():
+    pool = SessionPool(Manager())
+    sesion = pool.acquire('A::INSTR')
+    assert pool.idn('A::INSTR') == 'IDN'
+    assert pool.idn('A::INSTR') == 'IDN'
+    assert sesion.mensajes == [('query', '*IDN?')]
+    pool.idn('A::INSTR', refresh=True)
+    assert len(sesion.mensajes) == 2
+
+
+def test_idle_timeout_cierra_las_sesiones_sin_usar(monkeypatch):
+    ahora = [0.0]
+    monkeypatch.setattr(sessions.time, 'monotonic', lambda: ahora[0])
+    pool = SessionPool(Manager(), idle_timeout=10)
+    pool.acquire('A::INSTR')
+    pool.acquire('B::INSTR')
+    pool.release('A::INSTR')
+    ahora[0] = 11
+    pool.acquire('C::INSTR')
+    assert not pool.is_open('A::INSTR')
+    # Una sesión prestada no vence
+    assert pool.is_open('B::INSTR')
+
+
+def test_context_manager_cierra_todo():
+    with SessionPool(Manager()) as pool:
+        pool.acquire('A::INSTR')
+    assert not pool.is_open('A::INSTR')
+
+
+def test_controlador_recreado_no_repite_la_apertura(monkeypatch):
+    esperas = []
+    monkeypatch.setattr('labo_instruments.sr830.time.sleep', esperas.append)
+    manager = Manager()
+    pool = SessionPool(manager)
+    with contextlib.redirect_stdout(io.StringIO()):
+        lockin = SR830('GPIB0::8::INSTR', pool=pool)
+        del lockin
+        SR830('GPIB0::8::INSTR', pool=pool)
+    assert len(manager.recursos) == 1
+    assert esperas == [1]
+    assert manager.recursos[0].mensajes.count(('query', '*IDN?')) == 1
+
+
+def test_release_devuelve_los_controladores_restantes():
+    pool = SessionPool(Manager())
+    pool.acquire('A::INSTR')
+    pool.acquire('A::INSTR')
+    ultimos = []
+    assert pool.release('A::INSTR', on_last=ultimos.append) == 1
+    assert ultimos == []
+    assert pool.release('A::INSTR', on_last=ultimos.append) == 0
+    assert len(ultimos) == 1
+
+
+def test_controladores_de_un_equipo_comparten_transporte_y_estado(abrir):
+    abrir(AFG3021B).setAmplitude(2)
+    a = abrir(TDS1002B)
+    b = abrir(TDS1002B)
+    assert a._osci is b._osci
+    _, uno = a.read_data(1)
+    _, dos = b.read_data(2)
+    # `a` tiene que volver a seleccionar CH1: `b` dejó DAT:SOU en CH2
+    _, otra_vez = a.read_data(1)
+    assert np.abs(otra_vez - uno).max() < np.abs(dos - uno).max() / 10
+
+
+def test_lockin_desbloquea_el_panel_con_el_ultimo_controlador(abrir):
+    l1 = abrir(SR830)
+    l2 = abrir(SR830)
+    del l1
+    assert l2._lockin.query('LOCL?') == '2'
+    l2.set_scale(10)
+    assert abrir(SR830).scale == 10
+    lockin = l2._lockin
+    del l2
+    gc.collect()
+    assert lockin.query('LOCL?') == '0'
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from labo_instruments.agilent_34970a import AGILENT34970A
+from labo_instruments.simulation import LinkModel, SimulatedResourceManager, SimulatedSR830, addresses
+from labo_instruments.sr830 import SR830
+from labo_instruments.tektronix_afg3021b import AFG3021B
+from labo_instruments.tektronix_tds1002b import TDS1002B
+
+
+def test_osciloscopio_ve_la_salida_del_generador(abrir):
+    generador = abrir(AFG3021B)
+    osci = abrir(TDS1002B)
+    generador.setAmplitude(2)
+    tiempo, data = osci.read_data(1)
+    assert len(tiempo) == len(data) == 2500
+    assert np.ptp(data) == pytest.approx(2, rel=0.1)
+    assert abrir.manager.instruments[addresses['TDS1002B']].errors == []
+
+
+def test_lockin_mide_la_respuesta(abrir):
+    abrir(AFG3021B).setFrequency(1000)
+    lockin = abrir(SR830)
+    lockin.set_scale(25)
+    x, y = lockin.get_medicion()
+    # Pasabajos RC en su frecuencia de corte: H = (1 - j) / 2
+    r = np.hypot(x, y)
+    assert np.degrees(np.arctan2(y, x)) == pytest.approx(-45, abs=1)
+    assert r > 0
+    assert abrir.manager.instruments[addresses['SR830']].errors == []
+
+
+def test_multiplexor_devuelve_un_barrido(abrir):
+    mux = abrir(AGILENT34970A, channelsList=(101, 102, 103))
+    data, valores, tiempos, canales = mux.one_scan()
+    assert list(canales) == [101, 102, 103]
+    assert valores == pytest.approx([20.5, 21, 21.5], abs=0.5)
+    assert mux.lineFrequency == 50
+
+
+def test_link_model_cuenta_bytes_y_tiempo_de_bus():
+    manager = SimulatedResourceManager(LinkModel(latency=1e-3, bandwidth=1e3), realtime=False)
+    manager.add('SIM::INSTR', SimulatedSR830())
+    sesion = manager.open_resource('SIM::INSTR')
+    sesion.query('*IDN?')
+    stats = manager.stats()
+    assert stats['transacciones'] == 1
+    assert stats['bytes_escritos'] == len('*IDN?') + 1
+    assert stats['tiempo_bus'] == pytest.approx(2e-3 + (stats['bytes_escritos'] + stats['bytes_leidos']) / 1e3)
+
+
+def test_consulta_no_simulada():
+    manager = SimulatedResourceManager(realtime=False)
+    manager.add('SIM::INSTR', SimulatedSR830())
+    with pytest.raises(ValueError):
+        manager.open_resource('SIM::INSTR').query('XYZ?')
@@ -0,0 +1,168 @@
+import time
+
+import numpy as np
+import pytest
+
+from labo_instruments import SR830
+
+
+class LockinConBuffer:
+    """
+    SR830 falso con buffer: cada SPTS? encuentra `paso` puntos más, hasta `capacidad`.
+
+    El punto i del segmento s (s cuenta los REST) vale 1000·s + i en CH1 y -(1000·s + i) en CH2.
+    """
+
+    def __init__(self, capacidad=16383, paso=3):
+        self.capacidad = capacidad
+        self.paso = paso
+        self.guardados = 0
+        self.segmento = -1  # buffer_config también manda REST
+        self.pendiente = b''
+
+    def _valores(self, canal, inicio, cantidad):
+        valores = 1000.0 * self.segmento + np.arange(inicio, inicio + cantidad)
+        return valores if canal == 1 else -valores
+
+    def __call__(self, mensaje):
+        if mensaje == 'REST':
+            self.guardados = 0
+            self.segmento += 1
+        elif mensaje == 'SPTS?':
+            self.guardados = min(self.guardados + self.paso, self.capacidad)
+            return str(self.guardados)
+        elif mensaje.startswith('TRCB?'):
+            canal, inicio, cantidad = (int(valor) for valor in mensaje.split()[1].split(','))
+            return self._valores(canal, inicio, cantidad).astype('<f4').tobytes()
+        elif mensaje.startswith('TRCL?'):
+            canal, inicio, cantidad = (int(valor) for valor in mensaje.split()[1].split(','))
+            # Mantisa y exponente: valor = mantisa·2^(exponente - 124), con 8 bits fraccionarios
+            valores = self._valores(canal, inicio, cantidad)
+            exponentes = np.full(cantidad, 124 - 8)
+            mantisas = np.rint(valores * 2 ** 8)
+            self.pendiente = np.column_stack((mantisas, exponentes)).astype('<i2').tobytes()
+        elif mensaje == 'read_bytes':
+            return self.pendiente
+        return '0'
+
+
+class LockinConSenal:
+    """
+    SR830 falso con una señal de amplitud R: la lectura satura (LIAS? bit 2) si R supera la escala.
+
+    `amplitudes` da la R de cada SNAP? sucesivo; la última se repite.
+    """
+
+    def __init__(self, *amplitudes):
+        self.amplitudes = list(amplitudes)
+        self.escala = 0
+
+    def __call__(self, mensaje):
+        if mensaje == 'SENS ?':
+            return str(self.escala)
+        elif mensaje.startswith('SENS '):
+            self.escala = int(mensaje.split()[1])
+        elif mensaje == 'LIAS?':
+            return '4' if self.amplitudes[0] > SR830.scale_values[self.escala] else '0'
+        elif mensaje.startswith('SNAP?'):
+            r = self.amplitudes.pop(0) if len(self.amplitudes) > 1 else self.amplitudes[0]
+            return '%g,0' % min(r, 1.1 * SR830.scale_values[self.escala])
+        return '0'
+
+
+@pytest.fixture
+def sin_esperas(monkeypatch):
+    monkeypatch.setattr(time, 'sleep', lambda segundos: None)
+
+
+def test_trcl_decodifica_mantisa_y_exponente(conectar, sin_esperas):
+    # Valores conocidos: 16384·2^(109-124) = 0.5 y -3·2^(124-124) = -3
+    crudo = np.array([[16384, 109], [-3, 124], [1, 100]], dtype='<i2').tobytes()
+    respuestas = {'read_bytes': crudo}
+    lockin, recurso = conectar(SR830, lambda mensaje: respuestas.get(mensaje, '0'))
+    data = lockin.buffer_read(0, 3, formato='TRCL')
+    np.testing.assert_array_equal(data[0], [0.5, -3.0, 2.0 ** -24])
+    assert ('write', 'TRCL? 1,0,3') in recurso.mensajes
+
+
+def test_trcb_sin_encabezado(conectar, sin_esperas):
+    lockin, recurso = conectar(SR830, LockinConBuffer())
+    lockin.buffer_config(sample_rate=512)
+    data = lockin.buffer_read(2, 4)
+    np.testing.assert_array_equal(data, [[2, 3, 4, 5], [-2, -3, -4, -5]])
+
+
+def test_buffer_stream_reinicia_el_buffer_lleno(conectar, sin_esperas):
+    lockin, recurso = conectar(SR830, LockinConBuffer(capacidad=10, paso=3))
+    lockin.buffer_size = 10
+    bloques = list(lockin.buffer_stream(sample_rate=512, chunk=4, n_points=25))
+    x = np.concatenate([bloque['X'] for bloque in bloques])
+    esperado = np.concatenate([np.arange(10), 1000 + np.arange(10), 2000 + np.arange(5)])
+    np.testing.assert_array_equal(x, esperado)
+    np.testing.assert_allclose(np.concatenate([bloque['R'] for bloque in bloques]), np.hypot(esperado, esperado))
+    assert sorted({bloque['segment'] for bloque in bloques}) == [0, 1, 2]
+    # Tiempos exactos dentro de cada segmento
+    for bloque in bloques:
+        np.testing.assert_allclose(np.diff(bloque['t']), 1 / 512)
+    assert recurso.escrituras().count('REST') == 3  # buffer_config y dos segmentos nuevos
+    assert recurso.escrituras()[-1] == 'PAUS'
+
+
+def test_buffer_acquire_trcl(conectar, sin_esperas):
+    lockin, recurso = conectar(SR830, LockinConBuffer(paso=100))
+    salida = lockin.buffer_acquire(50, sample_rate=64, formato='TRCL')
+    np.testing.assert_array_equal(salida['X'], np.arange(50))
+    np.testing.assert_array_equal(salida['Y'], -np.arange(50))
+    np.testing.assert_allclose(salida['t'], np.arange(50) / 64)
+
+
+def test_auto_scale_biseca_desde_sobrecarga(conectar, sin_esperas):
+    lockin, recurso = conectar(SR830, LockinConSenal(0.25))
+    lockin.set_scale(0)
+    r, tita = lockin.auto_scale()
+    assert r == 0.25
+    assert lockin.scale_values[lockin.scale] == 500e-3
+    assert lockin.auto_scale_report['pasos'] < 10
+
+
+def test_auto_scale_vuelve_a_la_ultima_escala_valida(conectar, sin_esperas):
+    # R ≈ 25 mV en 1 V salta a 50 mV; después la señal crece a 0.7 V y satura todas las escalas menores a 1 V
+    lockin, recurso = conectar(SR830, LockinConSenal(0.025, 0.7))
+    lockin.set_scale(len(SR830.scale_values) - 1)
+    r, tita = lockin.auto_scale()
+    assert lockin.scale_values[lockin.scale] == 1
+    assert r == 0.7
+    assert recurso.escrituras().count('SENS 22') == 1  # pasó por 50 mV
+
+
+def test_estado_evita_escrituras_y_consultas_repetidas(conectar, sin_esperas):
+    lockin, recurso = conectar(SR830, LockinConSenal(0.1))
+    lockin.set_scale(5)
+    lockin.set_scale(5)
+    assert recurso.escrituras().count('SENS 5') == 1
+    assert lockin.get_scale() == 5
+    assert recurso.mensajes.count(('query_ascii_values', 'SENS ?')) == 1  # solo la del __init__
+    assert lockin.get_transaction_stats()['ahorradas'] >= 2
+
+    lockin.invalidate('SENS')
+    assert lockin.get_scale() == 5
+    assert recurso.mensajes.count(('query_ascii_values', 'SENS ?')) == 2
+    lockin.set_scale(5)
+    assert recurso.escrituras().count('SENS 5') == 1
+
+
+def test_estado_se_actualiza_al_enviar_el_lote(conectar, sin_esperas):
+    lockin, recurso = conectar(SR830, LockinConSenal(0.1))
+    lockin.set_scale(5)
+    with lockin._lockin.batch():
+        lockin.set_scale(7)
+        assert 'SENS' not in lockin._estado
+    assert lockin._estado['SENS'] == 7
+
+    with pytest.raises(RuntimeError):
+        with lockin._lockin.batch():
+            lockin.set_scale(9)
+            raise RuntimeError
+    lockin.set_scale(7)  # el 9 no llegó al equipo, pero tampoco se da por sabido el 7
+    assert recurso.comandos().count('SENS 7') == 2
+    assert 'SENS 9' not in recurso.comandos()
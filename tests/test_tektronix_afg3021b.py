@@ -0,0 +1,114 @@
+import numpy as np
+import pytest
+
+from labo_instruments import AFG3021B
+from labo_instruments.tektronix_afg3021b import quantize_waveform
+
+
+@pytest.fixture
+def generador(conectar):
+    return conectar(AFG3021B)
+
+
+@pytest.mark.parametrize('largo', [0, 1, 65537])
+def test_load_waveform_rechaza_largos_invalidos(generador, largo):
+    generador, recurso = generador
+    enviados = len(recurso.mensajes)
+    with pytest.raises(ValueError):
+        generador.load_waveform(np.zeros(largo))
+    assert generador._slots == {}
+    assert len(recurso.mensajes) == enviados
+
+
+def test_load_waveform_reutiliza_la_memoria(generador):
+    generador, recurso = generador
+    onda = np.sin(np.linspace(0, 2 * np.pi, 1000, endpoint=False))
+    assert generador.load_waveform(onda, select=False) == 'USER1'
+    assert recurso.mensajes[-3:] == [('write', 'DATA:DEF EMEM,1000'), ('write_binary_values', 'DATA:DATA EMEM,'),
+                                     ('write', 'DATA:COPY USER1,EMEM')]
+    enviados = len(recurso.mensajes)
+    assert generador.load_waveform(onda, select=False) == 'USER1'
+    assert len(recurso.mensajes) == enviados
+
+
+def test_load_waveform_reemplaza_la_memoria_usada_hace_mas_tiempo(generador):
+    generador, recurso = generador
+    ondas = [np.linspace(0, 1, 10) ** potencia for potencia in range(1, 6)]
+    for onda in ondas[:4]:
+        generador.load_waveform(onda)
+    generador.load_waveform(ondas[0])  # USER1 pasa a ser la usada más recientemente
+    assert recurso.escrituras()[-1] == 'FUNC USER1'
+    assert generador.load_waveform(ondas[4]) == 'USER2'
+    assert recurso.escrituras()[-2:] == ['DATA:COPY USER2,EMEM', 'FUNC USER2']
+
+
+def test_quantize_waveform_usa_todo_el_rango_del_dac():
+    datos = quantize_waveform(np.array([-2.0, 0.0, 2.0]))
+    np.testing.assert_array_equal(datos, [0, 8191, AFG3021B.dac_max])
+    assert datos.dtype == np.uint16
+
+
+def test_set_sweep_lineal_con_espera(generador):
+    generador, recurso = generador
+    generador.set_sweep(100, 1100, sweep_time=2, hold_time=0.5, return_time=0.5)
+    assert recurso.escrituras()[-8:] == ['FREQ:MODE SWE', 'FREQ:STAR 100', 'FREQ:STOP 1100', 'SWE:SPAC LIN',
+                                         'SWE:TIME 2', 'SWE:HTIM 0.5', 'SWE:RTIM 0.5', 'SWE:MODE AUTO']
+    # Barrido, espera en la final, retorno, y el ciclo se repite cada 3 s
+    t = [0, 1, 2.2, 2.75, 3.0, 4.0]
+    np.testing.assert_allclose(generador.sweep_frequency(t), [100, 600, 1100, 600, 100, 600])
+
+
+def test_set_sweep_logaritmico(generador):
+    generador, recurso = generador
+    generador.set_sweep(10, 1000, sweep_time=1, spacing='log', return_time=0, trigger='EXT')
+    assert recurso.escrituras()[-2:] == ['SWE:MODE MAN', 'TRIG:SOUR EXT']
+    np.testing.assert_allclose(generador.sweep_frequency([0, 0.5, 0.999999, 1.5, -1]),
+                               [10, 100, 1000, 10, 10], rtol=1e-4)
+
+
+def test_set_sweep_disparado_por_timer(generador):
+    generador, recurso = generador
+    generador.set_sweep(100, 200, sweep_time=1, return_time=0.5, trigger='TIM', trigger_interval=4)
+    assert recurso.escrituras()[-3:] == ['SWE:MODE MAN', 'TRIG:SOUR TIM', 'TRIG:TIM 4']
+    # Entre el fin del retorno y el disparo siguiente queda en la frecuencia inicial
+    np.testing.assert_allclose(generador.sweep_frequency([0.5, 1.25, 3, 4.5]), [150, 150, 100, 150])
+
+
+def test_set_sweep_manual_y_validaciones(generador):
+    generador, recurso = generador
+    generador.set_sweep(100, 200, sweep_time=1, trigger='MAN')
+    assert recurso.escrituras()[-1] == 'TRIG:SOUR EXT'
+    generador.trigger_sweep()
+    assert recurso.escrituras()[-1] == 'TRIG'
+
+    enviados = len(recurso.mensajes)
+    for argumentos in ({'trigger': 'TIM'}, {'trigger': 'BUS'}, {'spacing': 'EXP'}):
+        with pytest.raises(ValueError):
+            generador.set_sweep(100, 200, sweep_time=1, **argumentos)
+    assert len(recurso.mensajes) == enviados
+
+    generador.stop_sweep()
+    assert recurso.escrituras()[-1] == 'FREQ:MODE CW'
+    with pytest.raises(RuntimeError):
+        generador.sweep_frequency(0)
+
+
+def test_modulacion(generador):
+    generador, recurso = generador
+    generador.set_modulation('fm', 10, 50, shape='TRI')
+    assert recurso.escrituras()[-5:] == ['FM:SOUR INT', 'FM:INT:FUNC TRI', 'FM:INT:FREQ 10', 'FM:DEV 50',
+                                         'FM:STAT ON']
+    generador.set_modulation('AM', 5, 80)
+    assert recurso.escrituras()[-2:] == ['AM:DEPT 80', 'AM:STAT ON']
+    generador.disable_modulation('am')
+    assert recurso.escrituras()[-1] == 'AM:STAT OFF'
+    with pytest.raises(ValueError):
+        generador.set_modulation('PM', 10, 1)
+
+
+def test_get_amplitude_consulta_volt(abrir):
+    generador = abrir(AFG3021B)
+    generador.setFrequency(2000)
+    generador.setAmplitude(0.5)
+    assert generador.getAmplitude() == [0.5]
+    assert generador.getFrequency() == [2000]
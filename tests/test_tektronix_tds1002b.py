@@ -0,0 +1,234 @@
+import numpy as np
+import pytest
+
+from labo_instruments import TDS1002B
+
+curva = np.arange(2500) % 256
+
+
+class Osciloscopio:
+    """Osciloscopio falso: todos los canales devuelven `curva`, con YMU = 0.04·canal."""
+
+    def __init__(self):
+        self.fuente = 1
+
+    def __call__(self, mensaje):
+        if mensaje.startswith('DAT:SOU CH'):
+            self.fuente = int(mensaje[-1])
+        if 'WFMPRE' in mensaje:
+            return '0;1e-05;0;{0};128'.format(0.04 * self.fuente)
+        if mensaje.endswith('CURV?'):
+            return curva
+        return 'TEKTRONIX,TDS 1002B'
+
+
+@pytest.fixture
+def osci(conectar):
+    return conectar(TDS1002B, Osciloscopio())
+
+
+def _preambulos(recurso):
+    return [mensaje for _, mensaje in recurso.mensajes if 'WFMPRE' in mensaje]
+
+
+def test_preambulo_se_consulta_una_vez_por_canal(osci):
+    osci, recurso = osci
+    for _ in range(3):
+        tiempo, data = osci.read_data(1)
+    assert len(_preambulos(recurso)) == 1
+    np.testing.assert_allclose(data, (curva - 128) * 0.04)
+    np.testing.assert_allclose(tiempo, np.arange(2500) * 1e-5)
+
+    osci.set_channel(1, 0.5)
+    osci.read_data(1)
+    osci.set_time(1e-3)
+    osci.read_data(1)
+    assert len(_preambulos(recurso)) == 3
+
+
+def test_read_channels_lee_un_mismo_disparo(osci):
+    osci, recurso = osci
+    tiempo, data = osci.read_channels((1, 2))
+    assert data.shape == (2, 2500)
+    np.testing.assert_allclose(data[1], (curva - 128) * 0.08)
+    comandos = recurso.comandos()
+    curvas = [i for i, comando in enumerate(comandos) if comando == 'CURV?']
+    assert len(curvas) == 2
+    assert comandos.index('ACQ:STATE STOP') < curvas[0]
+    assert comandos.index('ACQ:STATE RUN') > curvas[1]
+
+
+def test_read_channels_vuelve_a_run_si_falla_la_lectura(conectar):
+    responder = Osciloscopio()
+    fallar = []
+
+    def falla_en_ch2(mensaje):
+        if fallar and mensaje.endswith('CURV?') and responder.fuente == 2:
+            raise TimeoutError(mensaje)
+        return responder(mensaje)
+
+    osci, recurso = conectar(TDS1002B, falla_en_ch2)
+    osci.read_data(2)  # preámbulo guardado: la falla ocurre recién con la curva
+    fallar.append(True)
+    with pytest.raises(TimeoutError):
+        osci.read_channels((1, 2))
+    assert recurso.comandos()[-1] == 'ACQ:STATE RUN'
+
+
+def test_read_channels_sin_canales(osci):
+    osci, recurso = osci
+    with pytest.raises(ValueError):
+        osci.read_channels(())
+
+
+def test_stream_se_detiene_al_cortar_el_for(osci):
+    osci, recurso = osci
+    stream = osci.stream(channel=1, capacity=4)
+    for i, frame in enumerate(stream):
+        np.testing.assert_array_equal(frame.raw, curva)
+        if i == 2:
+            break
+    assert not stream._hilo.is_alive()
+    tiempo, data = osci.read_data(1)  # la sesión queda libre
+    assert len(data) == 2500
+
+
+def test_stream_n_frames(osci):
+    osci, recurso = osci
+    with osci.stream(channel=2, capacity=16, n_frames=5) as stream:
+        frames = list(stream)
+    assert [frame.index for frame in frames] == [0, 1, 2, 3, 4]
+    np.testing.assert_allclose(frames[0].volts(), (curva - 128) * 0.08)
+
+
+class Ventana:
+    """Osciloscopio falso que respeta la ventana de transferencia (DAT:STAR / DAT:STOP)."""
+
+    registro = (np.arange(2500) * 7) % 256
+
+    def __init__(self):
+        self.inicio, self.fin = 1, 2500
+
+    def __call__(self, mensaje):
+        for parte in mensaje.split(';'):
+            parte = parte.strip().lstrip(':')
+            if parte.startswith('DAT:STAR '):
+                self.inicio = int(parte.split()[1])
+            elif parte.startswith('DAT:STOP '):
+                self.fin = int(parte.split()[1])
+        if 'WFMPRE' in mensaje:
+            # XZE es el tiempo del primer punto del registro, no de la ventana
+            return '-0.0125;1e-05;0;0.04;128'
+        if mensaje.endswith('CURV?'):
+            return self.registro[self.inicio - 1:self.fin]
+        return 'TEKTRONIX,TDS 1002B'
+
+
+def test_ventana_y_stride_conservan_el_eje_de_tiempos(conectar):
+    osci, recurso = conectar(TDS1002B, Ventana())
+    tiempo_completo, data_completa = osci.read_data(1)
+    assert len(tiempo_completo) == 2500
+
+    osci.set_transfer(start=1001, stop=1500, stride=5)
+    assert 'DAT:STAR 1001' in recurso.comandos()
+    tiempo, data = osci.read_data(1)
+    np.testing.assert_allclose(tiempo, tiempo_completo[1000:1500:5], atol=1e-12)
+    np.testing.assert_allclose(data, data_completa[1000:1500:5])
+    xze, xin = osci.get_preamble(1)[:2]
+    assert xze == pytest.approx(-0.0125 + 1000 * 1e-5)
+    assert xin == pytest.approx(5e-5)
+
+
+def test_set_transfer_valida(osci):
+    osci, recurso = osci
+    for argumentos in ({'start': 0}, {'start': 10, 'stop': 5}, {'stride': 0}, {'width': 3}):
+        with pytest.raises(ValueError):
+            osci.set_transfer(**argumentos)
+
+
+def test_measure_escalar_en_una_consulta(conectar):
+    respuestas = []
+    responder = Osciloscopio()
+
+    def responder_mediciones(mensaje):
+        if mensaje.startswith('MEASU:MEAS1:VAL?'):
+            respuestas.append(mensaje)
+            return '1;2;1000;9.9E37;0.5'
+        return responder(mensaje)
+
+    osci, recurso = conectar(TDS1002B, responder_mediciones)
+    specs = [('vpp', 1), ('vpp', 2), ('frequency', 1), ('mean', 2), ('rms', 1)]
+    valores = osci.measure(specs)
+    assert respuestas == ['MEASU:MEAS1:VAL?;:MEASU:MEAS2:VAL?;:MEASU:MEAS3:VAL?;:MEASU:MEAS4:VAL?;'
+                          ':MEASU:IMM:SOU CH1;TYP CRM;VAL?']
+    assert valores[('vpp', 1)] == 1
+    assert valores[('frequency', 1)] == 1000
+    assert np.isnan(valores[('mean', 2)])  # 9.9E37: el equipo no pudo medir
+    assert valores[('rms', 1)] == 0.5
+    slots = [mensaje for mensaje in recurso.escrituras() if mensaje.startswith('MEASU:MEAS')]
+    assert slots == ['MEASU:MEAS1:SOU CH1;TYP PK2', 'MEASU:MEAS2:SOU CH2;TYP PK2',
+                     'MEASU:MEAS3:SOU CH1;TYP FREQ', 'MEASU:MEAS4:SOU CH2;TYP MEAN']
+
+    # Los slots que no cambian no se vuelven a configurar
+    osci.measure([('vpp', 1), ('vpp', 2), ('period', 1), ('mean', 2)])
+    slots = [mensaje for mensaje in recurso.escrituras() if mensaje.startswith('MEASU:MEAS')]
+    assert slots[4:] == ['MEASU:MEAS3:SOU CH1;TYP PERI']
+
+
+class Senoidales:
+    """Osciloscopio falso con una senoidal de 1 kHz en cada canal; la del canal 2 atrasa 60°."""
+
+    tiempo = np.arange(2500) * 1e-5
+    frecuencia = 1000
+    continua = 0
+
+    def __init__(self):
+        self.fuente = 1
+
+    def __call__(self, mensaje):
+        for parte in mensaje.split(';'):
+            parte = parte.strip().lstrip(':')
+            if parte.startswith('DAT:SOU CH'):
+                self.fuente = int(parte[-1])
+        if 'WFMPRE' in mensaje:
+            return '0;1e-05;0;0.01;128'
+        if mensaje.endswith('CURV?'):
+            amplitud, fase = (100, 0) if self.fuente == 1 else (50, -np.pi / 3)
+            continua = 0 if self.fuente == 1 else self.continua
+            senal = continua + amplitud * np.sin(2 * np.pi * self.frecuencia * self.tiempo + fase)
+            return np.rint(128 + senal).astype(np.uint8)
+        return 'TEKTRONIX,TDS 1002B'
+
+
+def test_measure_fase_se_calcula_con_las_curvas(conectar):
+    osci, recurso = conectar(TDS1002B, Senoidales())
+    valores = osci.measure([('phase', 2), ('vpp', 2), ('frequency', 1)])
+    assert valores[('phase', 2)] == pytest.approx(-60, abs=0.5)
+    assert valores[('vpp', 2)] == pytest.approx(1.0, abs=0.02)
+    assert valores[('frequency', 1)] == pytest.approx(1000, rel=1e-3)
+    assert not any(comando.startswith('MEASU') for comando in recurso.comandos())
+    with pytest.raises(ValueError):
+        osci.measure([('phase', 2)], mode='scalar')
+
+
+class SenoidalesCortadas(Senoidales):
+    """Senoidales que no completan un número entero de períodos; el canal 2 tiene continua."""
+
+    frecuencia = 1100
+    continua = 60
+
+
+def test_measure_rms_de_ciclo_y_fase_sin_continua(conectar):
+    osci, recurso = conectar(TDS1002B, SenoidalesCortadas())
+    valores = osci.measure([('rms', 1), ('rms', 2), ('phase', 2)])
+    # 27.5 períodos en pantalla: el RMS de ciclo no depende del medio período sobrante
+    assert valores[('rms', 1)] == pytest.approx(1 / np.sqrt(2), rel=5e-3)
+    assert valores[('rms', 2)] == pytest.approx(np.hypot(0.6, 0.5 / np.sqrt(2)), rel=5e-3)
+    assert valores[('phase', 2)] == pytest.approx(-60, abs=0.5)
+
+
+def test_set_channel_en_un_mensaje(osci):
+    osci, recurso = osci
+    enviados = len(recurso.mensajes)
+    osci.set_channel(1, scale=0.1, zero=0)
+    assert recurso.mensajes[enviados:] == [('write', 'CH1:SCA 0.1;:CH1:POS 0')]
@@ -0,0 +1,98 @@
+import threading
+
+import pytest
+
+from labo_instruments.transport import SCPITransport
+
+
+class Recurso:
+    """Recurso mínimo que registra los mensajes enviados."""
+
+    def __init__(self):
+        self.mensajes = []
+
+    def write(self, mensaje):
+        self.mensajes.append(('write', mensaje))
+
+    def query(self, mensaje):
+        self.mensajes.append(('query', mensaje))
+        return '1'
+
+
+@pytest.fixture
+def transporte():
+    return SCPITransport(Recurso(), separator=';:', max_length=40)
+
+
+def test_batch_agrupa_al_salir(transporte):
+    with transporte.batch():
+        transporte.write('CH1:SCA 0.1')
+        transporte.write('CH1:POS 0')
+        assert transporte.resource.mensajes == []
+    assert transporte.resource.mensajes == [('write', 'CH1:SCA 0.1;:CH1:POS 0')]
+
+
+def test_batch_respeta_max_length(transporte):
+    with transporte.batch():
+        for canal in range(1, 5):
+            transporte.write('CH{0}:SCA 0.1'.format(canal))
+    assert [len(m) <= 40 for _, m in transporte.resource.mensajes] == [True, True]
+
+
+def test_consulta_lleva_los_pendientes(transporte):
+    with transporte.batch():
+        transporte.write('DAT:SOU CH1')
+        transporte.query('CURV?')
+    assert transporte.resource.mensajes == [('query', 'DAT:SOU CH1;:CURV?')]
+
+
+def test_batch_con_error_descarta_los_pendientes(transporte):
+    with pytest.raises(RuntimeError):
+        with transporte.batch():
+            transporte.write('CH1:SCA 0.1')
+            raise RuntimeError
+    transporte.write('LOC')
+    assert transporte.resource.mensajes == [('write', 'LOC')]
+
+
+def test_error_en_bloque_anidado_conserva_los_del_exterior(transporte):
+    with transporte.batch():
+        transporte.write('CH1:SCA 0.1')
+        with pytest.raises(RuntimeError):
+            with transporte.batch():
+                transporte.write('CH2:SCA 0.1')
+                raise RuntimeError
+    assert transporte.resource.mensajes == [('write', 'CH1:SCA 0.1')]
+
+
+def test_opc_anidado_se_aplica_al_salir(transporte):
+    with transporte.batch():
+        with transporte.batch(opc=True):
+            transporte.write('CH1:SCA 0.1')
+    assert transporte.resource.mensajes == [('query', 'CH1:SCA 0.1;*OPC?')]
+    with transporte.batch():
+        transporte.write('LOC')
+    assert transporte.resource.mensajes[-1] == ('write', 'LOC')
+
+
+def test_lote_de_otro_hilo_no_se_mezcla(transporte):
+    with transporte.batch():
+        transporte.write('CH1:SCA 0.1')
+        hilo = threading.Thread(target=transporte.write, args=('ACQ:STATE RUN',))
+        hilo.start()
+        hilo.join()
+        assert transporte.resource.mensajes == [('write', 'ACQ:STATE RUN')]
+    assert transporte.resource.mensajes[-1] == ('write', 'CH1:SCA 0.1')
+
+
+def test_on_sent_se_llama_al_enviar_el_lote(transporte):
+    enviados = []
+    with transporte.batch():
+        transporte.write('CH1:SCA 0.1', on_sent=lambda: enviados.append(1))
+        assert enviados == []
+    assert enviados == [1]
+    with pytest.raises(RuntimeError):
+        with transporte.batch():
+            transporte.write('CH1:SCA 0.2', on_sent=lambda: enviados.append(2))
+            raise RuntimeError
+    assert enviados == [1]
@@ -0,0 +1,75 @@
+import os
+
+import numpy as np
+import pytest
+
+from labo_instruments.tektronix_tds1002b import TDS1002B
+from labo_instruments.waveform_archive import WaveformArchive, index_dtype
+
+preambulo = (0.0, 1e-5, 0.1, 0.04, 128.0)
+
+
+def _curva(k, dtype='u1'):
+    return (np.arange(2500) + k).astype(dtype)
+
+
+def test_ida_y_vuelta(tmp_path):
+    with WaveformArchive(str(tmp_path)) as archivo:
+        for k in range(3):
+            archivo.append(_curva(k), preambulo, timestamp=100.0 + k, channel=1)
+        archivo.append(_curva(7, '<i2'), preambulo, timestamp=101.5, channel=2)
+
+    archivo = WaveformArchive(str(tmp_path), mode='r')
+    assert len(archivo) == 4
+    assert archivo.raw(3).dtype == np.dtype('<i2')
+    np.testing.assert_array_equal(archivo.raw(3), _curva(7, '<i2'))
+    np.testing.assert_array_equal(archivo.select(start=101, stop=103, channel=1), [1, 2])
+    np.testing.assert_array_equal(archivo.select(channel=2), [3])
+
+    crudas = archivo.stack([0, 1, 2])
+    np.testing.assert_array_equal(crudas, np.stack([_curva(k) for k in range(3)]))
+    assert np.shares_memory(crudas, archivo.raw(0))  # vista sobre el archivo, sin copia
+
+    frame = archivo[-1]
+    assert frame.timestamp == 101.5
+    assert frame.preamble == pytest.approx(preambulo)
+    np.testing.assert_allclose(archivo.volts([0, 1]),
+                               (np.stack([_curva(0), _curva(1)]) - 128.0) * 0.04 + 0.1)
+    with pytest.raises(ValueError):
+        archivo.append(_curva(0), preambulo)
+    archivo.close()
+
+
+def test_descarta_registro_incompleto(tmp_path):
+    with WaveformArchive(str(tmp_path)) as archivo:
+        archivo.append(_curva(0), preambulo, timestamp=1.0)
+    with open(os.path.join(str(tmp_path), 'index.bin'), 'ab') as indice:
+        indice.write(b'\0' * (index_dtype.itemsize // 2))
+
+    with WaveformArchive(str(tmp_path)) as archivo:
+        assert len(archivo) == 1
+        archivo.append(_curva(1), preambulo, timestamp=2.0)
+        np.testing.assert_array_equal(archivo.stack(), np.stack([_curva(0), _curva(1)]))
+        assert list(archivo.index['time']) == [1.0, 2.0]
+
+
+def test_lector_ve_lo_que_agrega_el_escritor(tmp_path):
+    with WaveformArchive(str(tmp_path)) as escritor:
+        escritor.append(_curva(0), preambulo, timestamp=1.0)
+        lector = WaveformArchive(str(tmp_path), mode='r')
+        assert len(lector) == 1
+        for k in (1, 2):
+            escritor.append(_curva(k), preambulo, timestamp=1.0 + k)
+        assert len(lector) == 3
+        np.testing.assert_array_equal(lector.raw(2), _curva(2))
+        np.testing.assert_array_equal(lector.stack(), np.stack([_curva(k) for k in range(3)]))
+        assert list(lector.index['time']) == [1.0, 2.0, 3.0]
+        assert lector[-1].timestamp == 3.0
+
+
+def test_read_raw_del_osciloscopio(abrir, tmp_path):
+    osci = abrir(TDS1002B)
+    frame = osci.read_raw(1)
+    with WaveformArchive(str(tmp_path)) as archivo:
+        archivo.append_frame(frame, channel=1)
+        np.testing.assert_allclose(archivo.volts([0])[0], frame.volts())